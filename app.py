@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from us_visa.constants import APP_HOST, APP_PORT
+from us_visa.entity.config_entity import ServingConfig
+from us_visa.logger import logging
+from us_visa.pipline.prediction_pipeline import ModelCache, USvisaClassifier
+from us_visa.utils.micro_batcher import MicroBatcher
+
+serving_config = ServingConfig()
+
+
+class VisaCase(BaseModel):
+    """Input fields of a visa case, as in config/schema.yaml."""
+    case_id: Optional[str] = None
+    continent: str
+    education_of_employee: str
+    has_job_experience: str
+    requires_job_training: str
+    no_of_employees: int
+    yr_of_estab: int
+    region_of_employment: str
+    prevailing_wage: float
+    unit_of_wage: str
+    full_time_position: str
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One scoring thread: batches run back to back while the event loop queues the next one
+    executor = ThreadPoolExecutor(max_workers=1)
+    model_cache = None
+    if serving_config.model_source == "storage":
+        # Newer pushed versions are loaded in the background and swapped in between batches
+        model_cache = ModelCache(serving_config)
+        model_cache.start()
+    classifier = USvisaClassifier(model_file_path=serving_config.model_file_path, model_cache=model_cache)
+    app.state.classifier = classifier
+    app.state.batcher = MicroBatcher(predict_fn=classifier.predict,
+                                     max_batch_size=serving_config.max_batch_size,
+                                     max_wait_ms=serving_config.max_wait_ms,
+                                     executor=executor,
+                                     latency_window=serving_config.latency_window)
+    await app.state.batcher.start()
+    logging.info(f"Serving {classifier.model} from "
+                 + (f"model version {classifier.model_version}" if model_cache else serving_config.model_file_path))
+    yield
+    await app.state.batcher.stop()
+    if model_cache is not None:
+        model_cache.stop()
+    executor.shutdown()
+
+
+app = FastAPI(title="US visa approval prediction", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.post("/predict")
+async def predict(case: VisaCase):
+    """Predicts the case status of one visa case; concurrent requests are scored in micro-batches."""
+    case_status = await app.state.batcher.submit(case.model_dump())
+    return {"case_id": case.case_id, "case_status": case_status}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Latency percentiles, batch sizes and throughput of the prediction endpoint, and the served model version."""
+    return dict(app.state.batcher.get_metrics(), model_version=app.state.classifier.model_version)
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=APP_HOST, port=APP_PORT)
@@ -0,0 +1,110 @@
+"""
+Import time benchmark and budget of the us_visa entry points.
+
+Imports every entry point in a fresh interpreter with `python -X importtime`, repeated, and prints
+the median import time against its budget, the heaviest modules it pulls in, and any module it
+must not import (dependencies meant to be loaded lazily by the components that use them, such as
+pymongo for MongoDB access or dill for legacy model files). Exits with status 1 when an entry
+point is over budget or imports a forbidden module, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_import_time.py --repeat 7 --top 5
+    python benchmarks/bench_import_time.py --budget-scale 2  # slower machine
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules loaded lazily by the code paths that need them
+LAZY_MODULES = ["pymongo", "bson", "dill", "from_root", "boto3", "botocore", "fastapi"]
+
+# entry point -> (budget in ms, forbidden modules)
+ENTRY_POINTS = {
+    "us_visa.exception": (5, LAZY_MODULES + ["dotenv", "numpy", "pandas"]),
+    "us_visa.constants": (15, LAZY_MODULES + ["dotenv", "numpy", "pandas"]),
+    "us_visa.logger": (25, LAZY_MODULES + ["dotenv", "numpy", "pandas"]),
+    "us_visa.entity.config_entity": (60, LAZY_MODULES + ["dotenv", "numpy", "pandas"]),
+    "us_visa.utils.model_artifact": (150, LAZY_MODULES + ["pandas", "scipy"]),
+    "us_visa.pipline.prediction_pipeline": (600, LAZY_MODULES + ["scipy", "sklearn"]),
+    "us_visa.components.data_ingestion": (2500, LAZY_MODULES),
+    "app": (1100, ["pymongo", "bson", "dill", "from_root", "boto3", "botocore"]),
+}
+
+
+def import_once(module: str) -> list:
+    """
+    Imports `module` in a fresh interpreter and returns its `-X importtime` records.
+
+    Returns:
+        list: `(module name, self microseconds, cumulative microseconds, depth)` of every module
+            imported by `module`, excluding those imported at interpreter startup.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        # Everything before (and including) site was imported by the interpreter itself
+        if name.strip() == "site" and depth == 0:
+            records = []
+    return records
+
+
+def measure(module: str, repeat: int) -> tuple:
+    """Returns the median import time of `module` in ms and the records of its median run."""
+    runs = []
+    for _ in range(repeat):
+        records = import_once(module)
+        total_us = next(cumulative for name, _, cumulative, depth in records if name == module and depth == 0)
+        runs.append((total_us, records))
+    runs.sort(key=lambda run: run[0])
+    total_us, records = runs[len(runs) // 2]
+    return total_us / 1000, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="heaviest imported packages listed per entry point")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplies every budget")
+    parser.add_argument("--module", action="append", help="entry points to measure, default all")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or ENTRY_POINTS:
+        budget_ms, forbidden = ENTRY_POINTS.get(module, (float("inf"), LAZY_MODULES))
+        budget_ms *= args.budget_scale
+        total_ms, records = measure(module, args.repeat)
+        imported = {name for name, _, _, _ in records}
+        forbidden_imported = sorted(name for name in forbidden if name in imported)
+
+        # Cumulative time of top-level packages, e.g. pandas with all its submodules. Records are
+        # listed after their own imports, so a package's largest record is its outermost import
+        packages = {}
+        for name, _, cumulative_us, _ in records:
+            package = name.split(".")[0]
+            if package != module.split(".")[0]:
+                packages[package] = max(packages.get(package, 0), cumulative_us)
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+
+        status = "ok" if total_ms <= budget_ms and not forbidden_imported else "FAIL"
+        failed = failed or status == "FAIL"
+        print(f"{module:<38} {total_ms:8.1f}ms / budget {budget_ms:6.0f}ms  {status}")
+        print("    heaviest: " + ", ".join(f"{name} {us / 1000:.1f}ms" for name, us in heaviest))
+        if forbidden_imported:
+            print(f"    imports lazily loaded modules: {', '.join(forbidden_imported)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Latency benchmark of the logging call in the "sync" and "queue" logging modes.
+
+Logs `--records` lines like the "Entered the load_object method of utils" lines of the hot
+paths, timing every call, and prints the median, 99th percentile and maximum latency of the
+call in each mode, the time until every record is in the file, and the number of lines written.
+`--stall-every`/`--stall-ms` make the file handler block on some writes, as a slow or busy disk
+(or a network file system) does; in "queue" mode only the listener thread waits for them.
+
+Usage:
+    python benchmarks/bench_logging.py --records 50000 --stall-every 1000 --stall-ms 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import us_visa.logger as logger  # noqa: E402
+from us_visa.logger import configure_logging, logging  # noqa: E402
+
+
+def run(mode: str, log_format: str, records: int, stall_every: int, stall_ms: float, directory: str):
+    logger.log_dir = os.path.join(directory, mode)
+    configure_logging(mode=mode, level="DEBUG", log_format=log_format)
+
+    # Simulated disk stalls: every `stall_every`-th write blocks for `stall_ms`
+    emit = logger._LazyFileHandler.emit
+    writes = [0]
+
+    def stalling_emit(handler, record):
+        writes[0] += 1
+        if stall_every and writes[0] % stall_every == 0:
+            time.sleep(stall_ms / 1000)
+        emit(handler, record)
+
+    logger._LazyFileHandler.emit = stalling_emit
+    latencies = np.empty(records)
+    try:
+        start = time.perf_counter()
+        for i in range(records):
+            call_start = time.perf_counter()
+            logging.info("Entered the load_object method of utils, call %d", i)
+            latencies[i] = time.perf_counter() - call_start
+        logged = time.perf_counter() - start
+        # Drains the queue in "queue" mode
+        configure_logging(mode="sync")
+        written = time.perf_counter() - start
+    finally:
+        logger._LazyFileHandler.emit = emit
+
+    with open(os.path.join(logger.log_dir, logger.LOG_FILE)) as file_obj:
+        lines = sum(1 for _ in file_obj)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+    print(f"{mode:<6} call p50={p50:7.1f}us p99={p99:8.1f}us max={latencies.max() * 1e3:7.2f}ms | "
+          f"calls {logged:6.2f}s, all written {written:6.2f}s, lines {lines}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--format", default="text", choices=["text", "json"])
+    parser.add_argument("--stall-every", type=int, default=0, help="every n-th write stalls, 0 never")
+    parser.add_argument("--stall-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("sync", "queue"):
+            run(mode, args.format, args.records, args.stall_every, args.stall_ms, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Load time benchmark of the model artifact format against plain dill pickles.
+
+Fits a RandomForestClassifier and a KNeighborsClassifier on random data shaped like the
+transformed EasyVisa features, saves each with dill (the former `save_object`) and with the
+model artifact format of `save_object`, and prints file sizes, the bytes stored as memory-mappable
+buffers and the best load time of each. Files are read once before timing, so the page cache is
+warm, as for the second and later uvicorn workers loading the same model.
+
+Usage:
+    python benchmarks/bench_model_artifact.py --rows 200000 --trees 200 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import dill
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.neighbors import KNeighborsClassifier  # noqa: E402
+
+from us_visa.utils.main_utils import load_object, save_object  # noqa: E402
+from us_visa.utils.model_artifact import read_header  # noqa: E402
+
+
+def best_time(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(name: str, model, directory: str, repeat: int):
+    """Saves `model` in both formats and prints their sizes and load times."""
+    dill_path = os.path.join(directory, f"{name}_dill.pkl")
+    artifact_path = os.path.join(directory, f"{name}_artifact.pkl")
+    with open(dill_path, "wb") as file_obj:
+        dill.dump(model, file_obj)
+    save_object(artifact_path, model)
+
+    mapped = sum(nbytes for _, nbytes in read_header(artifact_path)["buffers"])
+
+    def load_dill():
+        with open(dill_path, "rb") as file_obj:
+            return dill.load(file_obj)
+
+    load_dill()
+    load_object(artifact_path)
+    dill_time = best_time(load_dill, repeat)
+    mmap_time = best_time(lambda: load_object(artifact_path), repeat)
+    read_time = best_time(lambda: load_object(artifact_path, mmap_arrays=False), repeat)
+    print(f"{name:<14} dill={os.path.getsize(dill_path) / 1e6:7.1f}MB artifact={os.path.getsize(artifact_path) / 1e6:7.1f}MB "
+          f"(mapped buffers {mapped / 1e6:7.1f}MB) | load dill={dill_time * 1000:8.1f}ms "
+          f"artifact mmap={mmap_time * 1000:8.1f}ms artifact read={read_time * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--features", type=int, default=24)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random_state = np.random.RandomState(42)
+    features = random_state.rand(args.rows, args.features).astype(np.float32)
+    target = (features[:, 0] + random_state.normal(scale=0.3, size=args.rows) > 0.5).astype(np.int8)
+
+    with tempfile.TemporaryDirectory() as directory:
+        measure("knn", KNeighborsClassifier().fit(features, target), directory, args.repeat)
+        forest = RandomForestClassifier(n_estimators=args.trees, max_depth=12, n_jobs=-1, random_state=42)
+        measure("random_forest", forest.fit(features, target), directory, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Memory/time benchmark of the MongoDB export used by data ingestion.
+
+Compares the original `list(collection.find())` export with the streaming export of
+`USvisaData` against an in-memory mongomock collection filled from notebook/EasyVisa.csv.
+
+Usage:
+    pip install mongomock
+    python benchmarks/bench_mongo_export.py --rows 200000 --batch-size 10000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_NAME", "US_VISA")
+
+import mongomock  # noqa: E402
+
+from us_visa.configuration.mongo_db_connection import MongoDBClient  # noqa: E402
+from us_visa.data_access.usvisa_data import USvisaData  # noqa: E402
+
+COLLECTION_NAME = "visa_data"
+SAMPLE_FILE_PATH = os.path.join("notebook", "EasyVisa.csv")
+
+
+def fill_collection(rows: int):
+    """Replicates the sample csv until the collection holds `rows` documents."""
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    repeats = int(np.ceil(rows / len(sample)))
+    data = pd.concat([sample] * repeats, ignore_index=True).iloc[:rows]
+    data["case_id"] = [f"EZYV{i}" for i in range(rows)]
+    MongoDBClient.client = mongomock.MongoClient()
+    collection = MongoDBClient.client[os.environ["DATABASE_NAME"]][COLLECTION_NAME]
+    collection.insert_many(data.to_dict(orient="records"))
+
+
+def legacy_export(usvisa_data: USvisaData) -> pd.DataFrame:
+    """The export as it was implemented before streaming."""
+    collection = usvisa_data.get_collection(COLLECTION_NAME)
+    df = pd.DataFrame(list(collection.find()))
+    if "_id" in df.columns.to_list():
+        df = df.drop(columns=["_id"])
+    df.replace({"na": np.nan}, inplace=True)
+    return df
+
+
+def measure(name: str, export):
+    """Runs `export` once and prints wall time, peak traced memory and frame size."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = export()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{name:<12} rows={len(df):>9} time={elapsed:8.2f}s peak={peak / 1e6:9.1f}MB frame={frame_mb:8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    fill_collection(args.rows)
+    usvisa_data = USvisaData()
+
+    measure("legacy", lambda: legacy_export(usvisa_data))
+    measure("streaming", lambda: usvisa_data.export_collection_as_dataframe(
+        collection_name=COLLECTION_NAME, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
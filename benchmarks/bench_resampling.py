@@ -0,0 +1,94 @@
+"""
+Benchmark of the SMOTEENN resampling of the data transformation stage.
+
+Transforms notebook/EasyVisa.csv with the stage's preprocessing pipeline, replicates it to
+`--rows` rows (with a little noise, so the copies are not exact duplicates) and resamples it with
+imblearn's SMOTEENN and with `SMOTEENNResampler`, printing the time, the peak memory traced by
+tracemalloc, the resulting class counts and whether both produce the same samples.
+
+Usage:
+    python benchmarks/bench_resampling.py --rows 200000 --n-jobs -1 --chunk-size 50000
+    python benchmarks/bench_resampling.py --rows 1000000 --skip-imblearn
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from us_visa.components.data_transformation import DataTransformation  # noqa: E402
+from us_visa.constants import TARGET_COLUMN  # noqa: E402
+from us_visa.entity.config_entity import DataTransformationConfig  # noqa: E402
+from us_visa.entity.estimator import TargetValueMapping  # noqa: E402
+from us_visa.utils.main_utils import cast_to_schema_type, get_schema_column_types  # noqa: E402
+from us_visa.utils.resampling import SMOTEENNResampler  # noqa: E402
+
+SAMPLE_FILE_PATH = os.path.join("notebook", "EasyVisa.csv")
+
+
+def load_training_arrays(rows: int):
+    """Transforms the sample csv and replicates it to `rows` rows of float32 features and target."""
+    data_transformation = DataTransformation(data_ingestion_artifact=None,
+                                             data_transformation_config=DataTransformationConfig(sparse_threshold=0),
+                                             data_validation_artifact=None)
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    column_types = get_schema_column_types(data_transformation._schema_config)
+    sample = sample.apply(lambda column: cast_to_schema_type(column, column_types[column.name]))
+
+    features = data_transformation.get_data_transformer_object().fit_transform(
+        sample.drop(columns=[TARGET_COLUMN])).astype(np.float32)
+    target = sample[TARGET_COLUMN].astype("object").map(TargetValueMapping()._asdict()).to_numpy(np.float32)
+
+    repeats = int(np.ceil(rows / len(sample)))
+    features = np.tile(features, (repeats, 1))[:rows]
+    target = np.tile(target, repeats)[:rows]
+    if repeats > 1:
+        features += np.random.RandomState(0).normal(scale=1e-3, size=features.shape).astype(np.float32)
+    return features, target
+
+
+def measure(name: str, resample, features: np.ndarray, target: np.ndarray):
+    """Runs `resample` once and prints its time, peak traced memory and output class counts."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    x_res, y_res = resample(features, target)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    classes, counts = np.unique(y_res, return_counts=True)
+    print(f"{name:<28} rows={len(target):>9} time={elapsed:8.2f}s rows/sec={len(target) / elapsed:10,.0f} "
+          f"peak={peak / 1e6:8.1f}MB classes={dict(zip(classes.astype(int).tolist(), counts.tolist()))}")
+    return x_res, y_res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--n-jobs", type=int, default=DataTransformationConfig.resampler_n_jobs)
+    parser.add_argument("--chunk-size", type=int, default=DataTransformationConfig.resampler_chunk_size)
+    parser.add_argument("--skip-imblearn", action="store_true", help="Only run SMOTEENNResampler")
+    args = parser.parse_args()
+
+    features, target = load_training_arrays(args.rows)
+
+    resampler = SMOTEENNResampler(sampling_strategy="minority", n_jobs=args.n_jobs, chunk_size=args.chunk_size,
+                                  random_state=42)
+    x_fast, y_fast = measure(f"SMOTEENNResampler jobs={resampler.n_jobs}", resampler.fit_resample,
+                             features, target)
+
+    if not args.skip_imblearn:
+        from imblearn.combine import SMOTEENN
+
+        baseline = SMOTEENN(sampling_strategy="minority", random_state=42)
+        x_base, y_base = measure("imblearn SMOTEENN", baseline.fit_resample, features, target)
+        same = x_base.shape == x_fast.shape and np.array_equal(y_base, y_fast) and np.allclose(x_base, x_fast)
+        print(f"identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,16 @@
 #     raise USvisaException(e,sys)
 
 # training pipeline test and Data Validation pipeline test
+import argparse
+
 from us_visa.pipline.training_pipeline import TrainPipeline
 
-object = TrainPipeline()
+parser = argparse.ArgumentParser(description="Runs the training pipeline.")
+parser.add_argument("--profile", action="store_true",
+                    help="write a cProfile of every stage to the profile directory of the run's artifacts")
+args = parser.parse_args()
+
+object = TrainPipeline(profile=args.profile)
 object.run_pipeline()
 
 
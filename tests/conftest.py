@@ -0,0 +1,11 @@
+import pytest
+
+import us_visa.logger
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_dir(tmp_path_factory):
+    """Writes the log file of the test run to a temporary directory instead of the project's logs."""
+    log_dir = tmp_path_factory.mktemp("logs")
+    us_visa.logger.log_dir = str(log_dir)
+    return log_dir
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str, **env) -> str:
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=dict(os.environ, **env),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_importing_the_configs_does_not_load_the_environment():
+    output = run_python("import sys, us_visa.constants as constants, us_visa.entity.config_entity; "
+                        "print('dotenv' in sys.modules, 'FILE_NAME' in vars(constants))")
+    assert output == "False False"
+
+
+def test_environment_defaults_are_resolved_when_a_config_is_created():
+    output = run_python("from us_visa.entity.config_entity import DataIngestionConfig, ModelPusherConfig; "
+                        "print(DataIngestionConfig().training_file_path.endswith('train.csv'), "
+                        "ModelPusherConfig().storage_backend)",
+                        FEATURE_STORE_FILE_FORMAT="csv", MODEL_STORAGE_BACKEND="local")
+    assert output == "True local"
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from us_visa.exception import USvisaException
+from us_visa.utils.dag_executor import DAGExecutor
+from us_visa.utils.main_utils import read_yaml_file
+
+
+def sleeper(seconds: float, value):
+    def func(**inputs):
+        time.sleep(seconds)
+        return value if not inputs else [value, *sorted(inputs.items())]
+    return func
+
+
+def make_dag() -> DAGExecutor:
+    # Two chains joined at the end: slow -> after_slow is the longer one
+    dag = DAGExecutor(name="test", max_workers=4)
+    dag.add_node("slow", sleeper(0.3, "slow"))
+    dag.add_node("fast", sleeper(0.05, "fast"))
+    dag.add_node("after_slow", sleeper(0.05, "after_slow"), depends_on=("slow",))
+    dag.add_node("after_fast", sleeper(0.05, "after_fast"), depends_on=("fast",))
+    dag.add_node("join", sleeper(0.05, "join"), depends_on=("after_slow", "after_fast"))
+    return dag
+
+
+def test_nodes_run_after_their_dependencies_and_receive_their_results():
+    dag = make_dag()
+    results = dag.run()
+
+    assert results["after_slow"] == ["after_slow", ("slow", "slow")]
+    assert results["join"] == ["join", ("after_fast", results["after_fast"]), ("after_slow", results["after_slow"])]
+    timings = {entry["node"]: entry for entry in dag.trace}
+    for name, node in dag.nodes.items():
+        for dependency in node.depends_on:
+            assert timings[name]["start"] >= timings[dependency]["end"]
+
+
+def test_independent_nodes_overlap(tmp_path):
+    dag = make_dag()
+    dag.run()
+    timings = {entry["node"]: entry for entry in dag.trace}
+
+    # The fast chain runs while the slow node sleeps
+    assert timings["fast"]["start"] < timings["slow"]["end"]
+    assert timings["after_fast"]["end"] < timings["slow"]["end"]
+    wall_time = max(entry["end"] for entry in dag.trace)
+    assert wall_time < sum(entry["duration"] for entry in dag.trace)
+
+    assert dag.critical_path() == ["slow", "after_slow", "join"]
+    dag.write_trace(str(tmp_path / "trace.yaml"))
+    assert read_yaml_file(str(tmp_path / "trace.yaml"))["critical_path"] == ["slow", "after_slow", "join"]
+
+
+def test_a_failing_node_stops_the_run():
+    def fail():
+        time.sleep(0.05)
+        raise ValueError("node failed")
+
+    started = []
+    dag = DAGExecutor(name="test", max_workers=4)
+    dag.add_node("slow", sleeper(0.2, "slow"))
+    dag.add_node("fail", fail)
+    dag.add_node("dependant", lambda fail: started.append("dependant"), depends_on=("fail",))
+
+    with pytest.raises(USvisaException, match="node failed"):
+        dag.run()
+    assert not started
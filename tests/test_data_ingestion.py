@@ -0,0 +1,127 @@
+import os
+
+import mongomock
+import pandas as pd
+import pytest
+
+from us_visa.components import data_ingestion
+from us_visa.components.data_ingestion import DataIngestion
+from us_visa.configuration.mongo_db_connection import MongoDBClient
+from us_visa.constants import DATA_INGESTION_COLLECTION_NAME
+from us_visa.data_access import usvisa_data
+from us_visa.entity.config_entity import DataIngestionConfig
+from us_visa.exception import USvisaException
+from us_visa.utils.main_utils import read_dataframe
+
+SAMPLE_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "notebook", "EasyVisa.csv")
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(MongoDBClient, "client", mongomock.MongoClient())
+    monkeypatch.setattr(usvisa_data, "DATABASE_NAME", "US")
+    return MongoDBClient.client["US"][DATA_INGESTION_COLLECTION_NAME]
+
+
+@pytest.fixture
+def documents():
+    return [dict(record, _id=i) for i, record in enumerate(pd.read_csv(SAMPLE_FILE_PATH, nrows=300).to_dict("records"))]
+
+
+@pytest.fixture(params=["parquet", "csv"])
+def config(request, tmp_path) -> DataIngestionConfig:
+    store_dir = str(tmp_path / "incremental_store")
+    return DataIngestionConfig(
+        incremental=True,
+        incremental_store_dir=store_dir,
+        incremental_feature_store_file_path=os.path.join(store_dir, "feature_store", f"usvisa.{request.param}"),
+        incremental_training_file_path=os.path.join(store_dir, "ingested", f"train.{request.param}"),
+        incremental_testing_file_path=os.path.join(store_dir, "ingested", f"test.{request.param}"),
+        watermark_file_path=os.path.join(store_dir, "watermark.yaml"),
+        append_journal_file_path=os.path.join(store_dir, "append_journal.yaml"),
+    )
+
+
+def count_rows(config: DataIngestionConfig) -> tuple:
+    return tuple(len(read_dataframe(file_path)) for file_path in (config.incremental_feature_store_file_path,
+                                                                  config.incremental_training_file_path,
+                                                                  config.incremental_testing_file_path))
+
+
+def test_incremental_ingestion_appends_only_new_documents(collection, documents, config):
+    collection.insert_many(documents[:200])
+    DataIngestion(config).initiate_data_ingestion()
+    assert count_rows(config) == (200, 160, 40)
+
+    # Nothing new: the store is left as it is
+    DataIngestion(config).initiate_data_ingestion()
+    assert count_rows(config) == (200, 160, 40)
+
+    collection.insert_many(documents[200:])
+    DataIngestion(config).initiate_data_ingestion()
+    assert count_rows(config) == (300, 240, 60)
+    assert sorted(read_dataframe(config.incremental_feature_store_file_path)["case_id"]) == \
+        sorted(document["case_id"] for document in documents)
+
+
+def test_failed_append_is_rolled_back_on_retry(collection, documents, config, monkeypatch):
+    collection.insert_many(documents[:200])
+    DataIngestion(config).initiate_data_ingestion()
+    collection.insert_many(documents[200:])
+
+    # Fail after the feature store and training rows were appended, before the watermark moved
+    append_dataframe = data_ingestion.append_dataframe
+    calls = []
+
+    def failing_append_dataframe(file_path, dataframe):
+        calls.append(file_path)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        append_dataframe(file_path=file_path, dataframe=dataframe)
+
+    monkeypatch.setattr(data_ingestion, "append_dataframe", failing_append_dataframe)
+    with pytest.raises(USvisaException):
+        DataIngestion(config).initiate_data_ingestion()
+    assert os.path.exists(config.append_journal_file_path)
+    assert len(read_dataframe(config.incremental_feature_store_file_path)) == 300
+
+    monkeypatch.setattr(data_ingestion, "append_dataframe", append_dataframe)
+    DataIngestion(config).initiate_data_ingestion()
+    assert count_rows(config) == (300, 240, 60)
+    assert not os.path.exists(config.append_journal_file_path)
+    assert read_dataframe(config.incremental_feature_store_file_path)["case_id"].is_unique
+
+
+def test_committed_append_is_kept_when_only_the_journal_remains(collection, documents, config, monkeypatch):
+    collection.insert_many(documents[:200])
+    # Fail after the watermark was written, before the journal was removed
+    write_watermark = DataIngestion.write_watermark
+
+    def failing_write_watermark(self, value, rows):
+        write_watermark(self, value, rows)
+        raise OSError("crash")
+
+    monkeypatch.setattr(DataIngestion, "write_watermark", failing_write_watermark)
+    with pytest.raises(USvisaException):
+        DataIngestion(config).initiate_data_ingestion()
+    assert os.path.exists(config.append_journal_file_path)
+    monkeypatch.setattr(DataIngestion, "write_watermark", write_watermark)
+
+    DataIngestion(config).initiate_data_ingestion()
+    assert count_rows(config) == (200, 160, 40)
+    assert not os.path.exists(config.append_journal_file_path)
+
+
+@pytest.mark.parametrize("export_partitions", [1, 3])
+def test_full_ingestion_holds_out_the_same_rows_in_every_run(collection, documents, tmp_path, export_partitions):
+    collection.insert_many(documents)
+    test_case_ids = []
+    for run in range(2):
+        run_dir = str(tmp_path / f"run_{run}")
+        config = DataIngestionConfig(feature_store_file_path=os.path.join(run_dir, "usvisa.parquet"),
+                                     training_file_path=os.path.join(run_dir, "train.parquet"),
+                                     testing_file_path=os.path.join(run_dir, "test.parquet"),
+                                     export_partitions=export_partitions if run else 1)
+        artifact = DataIngestion(config).initiate_data_ingestion()
+        test_case_ids.append(read_dataframe(artifact.test_file_path)["case_id"].astype(str).to_list())
+    assert test_case_ids[0] == test_case_ids[1]
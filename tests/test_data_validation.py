@@ -0,0 +1,110 @@
+import os
+
+import pandas as pd
+import pytest
+
+from us_visa.components import data_validation
+from us_visa.components.data_validation import DataValidation
+from us_visa.entity.artifact_entity import DataIngestionArtifact
+from us_visa.entity.config_entity import DataValidationConfig
+from us_visa.utils.main_utils import read_typed_dataframe, write_dataframe
+
+SAMPLE_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "notebook", "EasyVisa.csv")
+
+
+@pytest.fixture
+def validation(tmp_path):
+    dataframe = pd.read_csv(SAMPLE_FILE_PATH, nrows=1000)
+    artifact = DataIngestionArtifact(train_file_path=str(tmp_path / "train.parquet"),
+                                     test_file_path=str(tmp_path / "test.csv"))
+    write_dataframe(artifact.train_file_path, dataframe.iloc[:800])
+    write_dataframe(artifact.test_file_path, dataframe.iloc[800:])
+    config = DataValidationConfig(data_validation_dir=str(tmp_path),
+                                  drift_report_file_path=str(tmp_path / "drift_report" / "report.yaml"),
+                                  reference_profile_file_path=str(tmp_path / "drift_report" / "profile.yaml"),
+                                  trace_file_path=str(tmp_path / "trace.json"),
+                                  schema_report_file_path=str(tmp_path / "schema_report.yaml"),
+                                  baseline_profile_file_path=str(tmp_path / "baseline" / "profile.yaml"),
+                                  baseline_drift_report_file_path=str(tmp_path / "drift_report" / "baseline.yaml"),
+                                  chunk_size=300)
+    return DataValidation(artifact, config)
+
+
+def test_each_file_is_read_once(validation, monkeypatch):
+    iter_dataframe_chunks = data_validation.iter_dataframe_chunks
+    reads = []
+
+    def counting_iter_dataframe_chunks(file_path, **kwargs):
+        reads.append(file_path)
+        return iter_dataframe_chunks(file_path, **kwargs)
+
+    monkeypatch.setattr(data_validation, "iter_dataframe_chunks", counting_iter_dataframe_chunks)
+    artifact = validation.initialize_data_validation()
+
+    assert artifact.validation_status
+    assert sorted(reads) == sorted([validation.data_ingestion_artifact.train_file_path,
+                                    validation.data_ingestion_artifact.test_file_path])
+
+
+@pytest.mark.parametrize("split", ["train_file_path", "test_file_path"])
+def test_chunked_read_matches_the_typed_read(validation, split):
+    file_path = getattr(validation.data_ingestion_artifact, split)
+    dataframe, report = validation.read_and_validate_data(file_path)
+
+    assert report["valid"]
+    assert report["n_rows"] == len(dataframe)
+    pd.testing.assert_frame_equal(dataframe, read_typed_dataframe(file_path, report_memory=False),
+                                  check_categorical=False)
+
+
+def test_invalid_values_fail_the_validation(validation):
+    dataframe = pd.read_csv(validation.data_ingestion_artifact.test_file_path)
+    dataframe.loc[5, "continent"] = "Atlantis"
+    write_dataframe(validation.data_ingestion_artifact.test_file_path, dataframe)
+
+    artifact = validation.initialize_data_validation()
+
+    assert not artifact.validation_status
+    assert artifact.message == "Invalid values in columns ['continent'] of test dataframe."
+
+
+def test_training_data_is_checked_against_the_previous_valid_run(validation):
+    train_file_path = validation.data_ingestion_artifact.train_file_path
+    baseline_profile_file_path = validation.data_validation_config.baseline_profile_file_path
+
+    artifact = validation.initialize_data_validation()
+    assert artifact.baseline_drift_status is None
+    assert artifact.message == "Drift not detected"
+    assert os.path.exists(baseline_profile_file_path)
+
+    artifact = validation.initialize_data_validation()
+    assert artifact.baseline_drift_status is False
+    assert artifact.message == "Drift not detected. Drift not detected against the baseline profile"
+
+    # Invalid data is not checked against the baseline and does not replace it
+    dataframe = pd.read_parquet(train_file_path)
+    with open(baseline_profile_file_path) as baseline_file:
+        baseline = baseline_file.read()
+    write_dataframe(train_file_path, dataframe.assign(continent="Atlantis"))
+    artifact = validation.initialize_data_validation()
+    assert not artifact.validation_status
+    assert artifact.baseline_drift_status is None
+    with open(baseline_profile_file_path) as baseline_file:
+        assert baseline_file.read() == baseline
+
+    shifted = dataframe.assign(prevailing_wage=dataframe["prevailing_wage"] * 5,
+                               no_of_employees=dataframe["no_of_employees"] * 5,
+                               continent="Europe", education_of_employee="Doctorate", has_job_experience="N",
+                               requires_job_training="Y", region_of_employment="Island")
+    write_dataframe(train_file_path, shifted)
+    artifact = validation.initialize_data_validation()
+    assert artifact.baseline_drift_status is True
+    assert artifact.message.endswith(". Drift detected against the baseline profile")
+    # The drifted run keeps the baseline, so the next run is still compared with the undrifted data
+    with open(baseline_profile_file_path) as baseline_file:
+        assert baseline_file.read() == baseline
+    assert validation.initialize_data_validation().baseline_drift_status is True
+
+    validation.data_validation_config.advance_baseline_on_drift = True
+    assert validation.initialize_data_validation().baseline_drift_status is True
+    assert validation.initialize_data_validation().baseline_drift_status is False
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from us_visa.utils.drift_utils import (build_reference_profile, calculate_data_drift,
+                                       calculate_data_drift_from_profile, sample_indices)
+
+CATEGORIES = list("ABCDEFGHIJ")
+
+
+def make_frames(categorical: bool):
+    reference = pd.Series(["A"] * 500 + ["B"] * 500)
+    current = pd.Series(["A"] * 560 + ["B"] * 440)
+    if categorical:
+        # Eight categories of the dtype are never observed
+        reference = reference.astype(pd.CategoricalDtype(CATEGORIES))
+        current = current.astype(pd.CategoricalDtype(CATEGORIES))
+    return pd.DataFrame({"column": reference}), pd.DataFrame({"column": current})
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_unused_categories_do_not_weaken_the_chi_square_test(categorical):
+    reference_df, current_df = make_frames(categorical)
+
+    report = calculate_data_drift(reference_df, current_df, numerical_columns=[], categorical_columns=["column"])
+    assert report["column"]["p_value"] == pytest.approx(1.48e-4, rel=0.01)
+    assert report["column"]["drift_detected"]
+
+    profile = build_reference_profile(reference_df, numerical_columns=[], categorical_columns=["column"])
+    assert profile["categorical"]["column"]["categories"] == ["A", "B"]
+    report = calculate_data_drift_from_profile(profile, current_df)
+    assert report["column"]["p_value"] == pytest.approx(1.48e-4, rel=0.01)
+
+
+def test_profiles_with_unused_categories_are_still_read_correctly():
+    _, current_df = make_frames(categorical=True)
+    # Profile written before unused categories were dropped
+    profile = {"numerical": {}, "categorical": {"column": {"categories": CATEGORIES, "counts": [500, 500] + [0] * 8,
+                                                           "missing": 0}}}
+    report = calculate_data_drift_from_profile(profile, current_df)
+    assert report["column"]["p_value"] == pytest.approx(1.48e-4, rel=0.01)
+
+
+def test_sample_indices_are_a_sorted_uniform_sample():
+    indices = sample_indices(n_rows=1000, sample_size=100, random_state=0)
+    assert len(indices) == 100
+    assert np.all(np.diff(indices) > 0)
+    assert indices.min() >= 0 and indices.max() < 1000
+    np.testing.assert_array_equal(indices, sample_indices(n_rows=1000, sample_size=100, random_state=0))
+    np.testing.assert_array_equal(sample_indices(n_rows=50, sample_size=100), np.arange(50))
+
+    # Every row is drawn with probability sample_size / n_rows
+    draws = np.concatenate([sample_indices(n_rows=20, sample_size=5, random_state=seed) for seed in range(4000)])
+    frequencies = np.bincount(draws, minlength=20) / 4000
+    np.testing.assert_allclose(frequencies, 0.25, atol=0.03)
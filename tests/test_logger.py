@@ -0,0 +1,44 @@
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+from us_visa.logger import ModuleLevelFilter, configure_logging
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    configure_logging()
+
+
+def test_invalid_environment_does_not_break_the_import(tmp_path):
+    env = dict(os.environ, LOG_LEVEL="verbose", LOG_MODULE_LEVELS="us_visa.utils=loud,botocore",
+               LOG_MODE="fast", LOG_FORMAT="xml")
+    result = subprocess.run([sys.executable, "-c", "import logging, us_visa.logger; "
+                                                   "print(logging.getLogger().level)"],
+                            cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(logging.INFO)
+    assert "Unknown log level 'verbose'" in result.stderr
+
+
+def test_unknown_levels_fall_back_to_info(restore_logging):
+    with pytest.warns(UserWarning):
+        configure_logging(mode="sync", level="verbose", module_levels="us_visa.utils=loud,us_visa.components=ERROR")
+    root_logger = logging.getLogger()
+    assert root_logger.level == logging.INFO
+    module_filter = next(log_filter for handler in root_logger.handlers for log_filter in handler.filters
+                         if isinstance(log_filter, ModuleLevelFilter))
+    assert module_filter.module_levels == {"us_visa.utils": logging.INFO, "us_visa.components": logging.ERROR}
+
+
+def test_module_levels_use_the_longest_prefix():
+    module_filter = ModuleLevelFilter(logging.DEBUG, {"us_visa": logging.WARNING, "us_visa.utils": logging.ERROR})
+    assert module_filter.get_level("us_visa.utils.main_utils") == logging.ERROR
+    assert module_filter.get_level("us_visa.components.data_ingestion") == logging.WARNING
+    assert module_filter.get_level("us_visa_other") == logging.DEBUG
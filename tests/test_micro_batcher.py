@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from us_visa.exception import USvisaException
+from us_visa.utils.micro_batcher import MicroBatcher
+
+
+def test_results_are_routed_to_their_callers():
+    batch_sizes = []
+
+    def predict(records):
+        batch_sizes.append(len(records))
+        time.sleep(0.01)
+        return [record * 10 for record in records]
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(record) for record in range(50)))
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(main()) == [record * 10 for record in range(50)]
+    assert max(batch_sizes) == 8
+    assert sum(batch_sizes) == 50
+
+
+def test_failed_batch_fails_its_callers_only():
+    def predict(records):
+        if -1 in records:
+            raise ValueError("bad record")
+        return records
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=5)
+        await batcher.start()
+        try:
+            with pytest.raises(USvisaException):
+                await batcher.submit(-1)
+            return await batcher.submit(1)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(main()) == 1
+
+
+def test_short_results_fail_the_batch():
+    async def main():
+        batcher = MicroBatcher(lambda records: records[:-1], max_batch_size=4, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(record) for record in range(3)),
+                                                         return_exceptions=True), timeout=5)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, USvisaException) for result in results)
+
+
+def test_stop_fails_the_batch_in_flight_and_the_queued_requests():
+    release = threading.Event()
+
+    def predict(records):
+        release.wait(5)
+        return records
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=1)
+        await batcher.start()
+        requests = [asyncio.create_task(batcher.submit(record)) for record in range(5)]
+        await asyncio.sleep(0.1)
+        await batcher.stop()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), timeout=5)
+
+    results = asyncio.run(main())
+    assert len(results) == 5
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,70 @@
+import dill
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+from us_visa.utils.main_utils import load_object, save_object
+from us_visa.utils.model_artifact import dump_object, is_model_artifact, load_object_file, read_header
+
+
+def write_artifact(file_path, obj, **kwargs) -> dict:
+    with open(file_path, "wb") as file_obj:
+        return dump_object(obj, file_obj, **kwargs)
+
+
+@pytest.mark.parametrize("mmap_arrays", [True, False])
+def test_round_trip_pickle(tmp_path, mmap_arrays):
+    obj = {"a": np.arange(1000), "b": np.linspace(0, 1, 500, dtype=np.float32).reshape(50, 10),
+           "small": np.arange(3), "name": "model"}
+    header = write_artifact(tmp_path / "model.pkl", obj)
+
+    assert header["serializer"] == "pickle"
+    # Only the arrays above MIN_BUFFER_BYTES are stored out of band
+    assert len(header["buffers"]) == 2
+    assert all(start % 64 == 0 for start, _ in header["buffers"])
+
+    loaded = load_object_file(str(tmp_path / "model.pkl"), mmap_arrays=mmap_arrays)
+    for key in ("a", "b", "small"):
+        np.testing.assert_array_equal(loaded[key], obj[key])
+        assert loaded[key].dtype == obj[key].dtype
+    assert loaded["name"] == "model"
+    # Copy-on-write mapping: arrays stay writable without touching the file
+    loaded["a"][0] = -1
+    assert load_object_file(str(tmp_path / "model.pkl"))["a"][0] == 0
+
+
+@pytest.mark.parametrize("mmap_arrays", [True, False])
+def test_round_trip_dill_fallback(tmp_path, mmap_arrays):
+    # The lambda makes the standard pickler fail after it has handed over the buffer of "a"
+    obj = {"a": np.arange(1000), "f": lambda x: x + 1, "b": np.arange(1000, 2000)}
+    header = write_artifact(tmp_path / "model.pkl", obj)
+
+    assert header["serializer"] == "dill"
+    assert len(header["buffers"]) == 2
+
+    loaded = load_object_file(str(tmp_path / "model.pkl"), mmap_arrays=mmap_arrays)
+    np.testing.assert_array_equal(loaded["a"], obj["a"])
+    np.testing.assert_array_equal(loaded["b"], obj["b"])
+    assert loaded["f"](1) == 2
+
+
+def test_round_trip_pipeline_with_lambda(tmp_path):
+    x = np.random.default_rng(0).normal(size=(200, 4))
+    model = Pipeline([("log", FunctionTransformer(lambda values: values * 2)),
+                      ("scale", StandardScaler())]).fit(x)
+    file_path = str(tmp_path / "model.pkl")
+    save_object(file_path, model)
+
+    assert is_model_artifact(file_path)
+    assert read_header(file_path)["serializer"] == "dill"
+    np.testing.assert_allclose(load_object(file_path).transform(x), model.transform(x))
+
+
+def test_load_object_reads_legacy_dill_files(tmp_path):
+    file_path = str(tmp_path / "model.pkl")
+    with open(file_path, "wb") as file_obj:
+        dill.dump({"a": np.arange(10)}, file_obj)
+
+    assert not is_model_artifact(file_path)
+    np.testing.assert_array_equal(load_object(file_path)["a"], np.arange(10))
@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from us_visa.components.model_evaluation import ModelEvaluation
+from us_visa.entity.artifact_entity import ClassificationMetricArtifact, DataIngestionArtifact, ModelTrainerArtifact
+from us_visa.entity.config_entity import ModelEvaluationConfig
+from us_visa.utils.evaluation_utils import bootstrap_score_difference, get_outcome_cells, scores_from_cell_counts
+from us_visa.utils.main_utils import compute_file_hash, save_object, write_dataframe
+
+SAMPLE_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "notebook", "EasyVisa.csv")
+
+
+class WageModel:
+    """Predicts Denied (1) for wages under `threshold`, standing in for a trained `USvisaModel`."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def predict(self, dataframe):
+        return (dataframe["prevailing_wage"].to_numpy() < self.threshold).astype(np.int8)
+
+
+def test_multinomial_interval_matches_a_row_bootstrap():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 2000)
+    y_pred_a = np.where(rng.random(2000) < 0.8, y_true, 1 - y_true)
+    y_pred_b = np.where(rng.random(2000) < 0.75, y_true, 1 - y_true)
+    cells = get_outcome_cells(y_true, y_pred_a, y_pred_b)
+
+    result = bootstrap_score_difference(cells, n_bootstrap=4000, confidence_level=0.95, n_jobs=2, chunk_size=1000)
+
+    # Naive bootstrap: resample row indices and rescore both models
+    indices = rng.integers(0, len(cells), size=(4000, len(cells)))
+    counts = np.stack([np.bincount(cells[row], minlength=8) for row in indices])
+    scores = scores_from_cell_counts(counts)
+    differences = scores["a"]["f1_score"] - scores["b"]["f1_score"]
+
+    observed = scores_from_cell_counts(np.bincount(cells, minlength=8))
+    assert result["difference"] == pytest.approx(observed["a"]["f1_score"] - observed["b"]["f1_score"])
+    assert result["standard_error"] == pytest.approx(differences.std(ddof=1), rel=0.1)
+    lower, upper = np.quantile(differences, [0.025, 0.975])
+    assert result["ci_lower"] == pytest.approx(lower, abs=0.01)
+    assert result["ci_upper"] == pytest.approx(upper, abs=0.01)
+
+
+@pytest.fixture
+def test_data(tmp_path):
+    dataframe = pd.read_csv(SAMPLE_FILE_PATH, nrows=1000)
+    # Labels the trained model predicts perfectly
+    dataframe["case_status"] = np.where(dataframe["prevailing_wage"] < 50000, "Denied", "Certified")
+    test_file_path = str(tmp_path / "test.parquet")
+    write_dataframe(test_file_path, dataframe)
+    return test_file_path
+
+
+def make_evaluation(tmp_path, test_file_path, **config) -> ModelEvaluation:
+    trained_model_file_path = str(tmp_path / "trained" / "model.pkl")
+    save_object(trained_model_file_path, WageModel(50000))
+    model_eval_config = ModelEvaluationConfig(report_file_path=str(tmp_path / "evaluation" / "report.yaml"),
+                                              cache_dir=str(tmp_path / "evaluation_cache"), storage_backend="local",
+                                              local_storage_dir=str(tmp_path / "model_storage"),
+                                              n_bootstrap=2000, n_jobs=1, **config)
+    model_trainer_artifact = ModelTrainerArtifact(
+        trained_model_file_path=trained_model_file_path,
+        metric_artifact=ClassificationMetricArtifact(f1_score=1.0, precision_score=1.0, recall_score=1.0),
+        search_report_file_path=str(tmp_path / "trained" / "search_report.yaml"))
+    return ModelEvaluation(model_eval_config, DataIngestionArtifact(train_file_path=test_file_path,
+                                                                    test_file_path=test_file_path),
+                           model_trainer_artifact)
+
+
+def push_production_model(model_evaluation: ModelEvaluation, model_dir, threshold: float) -> str:
+    """Stores a production model and its manifest the way `ModelPusher` does, and returns its version."""
+    config = model_evaluation.model_eval_config
+    model_file_path = str(model_dir / "model.pkl")
+    save_object(model_file_path, WageModel(threshold))
+    checksum = compute_file_hash(model_file_path)
+    model_version = checksum[:12]
+    key = f"{config.s3_model_key_path}/{model_version}/model.pkl"
+    model_storage = model_evaluation.get_model_storage()
+    model_storage.upload_file(model_file_path, key, checksum)
+    model_storage.write_json(f"{config.s3_model_key_path}/{config.manifest_file_name}", {
+        "model_version": model_version, "files": {"model": {"key": key, "sha256": checksum}}})
+    return model_version
+
+
+def test_first_model_is_accepted(tmp_path, test_data):
+    report = make_evaluation(tmp_path, test_data).evaluate_model()
+    assert report["is_model_accepted"]
+    assert report["production_model"] is None
+
+
+@pytest.mark.parametrize("production_threshold, changed_threshold_score, require_significance, accepted", [
+    # Clearly better than production
+    (30000, 0.02, True, True),
+    # Better, but by less than the required gain
+    (30000, 0.99, False, False),
+    # Production misses three Denied rows: the gain clears a zero threshold, but is not significant
+    (49300, 0.0, False, True),
+    (49300, 0.0, True, False),
+])
+def test_acceptance_follows_the_threshold_and_significance(tmp_path, test_data, production_threshold,
+                                                           changed_threshold_score, require_significance, accepted):
+    model_evaluation = make_evaluation(tmp_path, test_data, changed_threshold_score=changed_threshold_score,
+                                       require_significance=require_significance)
+    push_production_model(model_evaluation, tmp_path / "production", production_threshold)
+
+    report = model_evaluation.evaluate_model()
+
+    assert report["is_model_accepted"] is accepted
+    assert 0 < report["changed_accuracy"] < 0.99
+    if require_significance:
+        assert (report["bootstrap"]["ci_lower"] > 0) is accepted
+
+
+def test_production_predictions_are_cached_by_version_and_test_data(tmp_path, test_data, monkeypatch):
+    model_evaluation = make_evaluation(tmp_path, test_data)
+    first_version = push_production_model(model_evaluation, tmp_path / "production_1", 30000)
+    first_report = model_evaluation.evaluate_model()
+    cache_dir = model_evaluation.model_eval_config.cache_dir
+    predictions_dir = os.path.join(cache_dir, "predictions")
+    assert os.listdir(predictions_dir) == [f"{first_version}_{compute_file_hash(test_data)[:16]}.npy"]
+
+    # Same version and test data: the production model is neither downloaded nor loaded again
+    os.remove(os.path.join(cache_dir, "models", first_version, "model.pkl"))
+    model_storage = model_evaluation.get_model_storage()
+
+    def fail_download(key, file_path):
+        raise AssertionError(f"{key} downloaded again")
+
+    monkeypatch.setattr(model_storage, "download_file", fail_download)
+    monkeypatch.setattr(model_evaluation, "get_model_storage", lambda: model_storage)
+    assert model_evaluation.evaluate_model()["production_model"] == first_report["production_model"]
+    monkeypatch.undo()
+
+    # A new version, then new test data, are scored again
+    second_version = push_production_model(model_evaluation, tmp_path / "production_2", 40000)
+    model_evaluation.evaluate_model()
+    write_dataframe(test_data, pd.read_parquet(test_data).iloc[:900])
+    model_evaluation.evaluate_model()
+    cache_file_names = os.listdir(predictions_dir)
+    assert len(cache_file_names) == 3
+    assert f"{second_version}_{compute_file_hash(test_data)[:16]}.npy" in cache_file_names
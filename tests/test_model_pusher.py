@@ -0,0 +1,106 @@
+import boto3
+import pytest
+from moto import mock_aws
+
+from us_visa.components.model_pusher import ModelPusher
+from us_visa.configuration.aws_connection import S3Client
+from us_visa.data_access.model_storage import get_model_storage
+from us_visa.entity.artifact_entity import (ClassificationMetricArtifact, DataTransformationArtifact,
+                                            ModelTrainerArtifact)
+from us_visa.entity.config_entity import ModelPusherConfig, ServingConfig
+from us_visa.pipline.prediction_pipeline import ModelCache
+from us_visa.utils.main_utils import load_object, save_object
+
+BUCKET_NAME = "usvisa-test-models"
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage_backend(request, monkeypatch):
+    if request.param == "local":
+        yield "local"
+        return
+    for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SECURITY_TOKEN", "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(variable, "testing")
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        monkeypatch.setattr(S3Client, "s3_client", s3_client)
+        yield "s3"
+
+
+@pytest.fixture
+def storage(storage_backend, tmp_path):
+    return {"storage_backend": storage_backend, "bucket_name": BUCKET_NAME,
+            "local_storage_dir": str(tmp_path / "model_storage")}
+
+
+def push(model_pusher_config: ModelPusherConfig, model_dir, model: dict):
+    model_file_path = str(model_dir / "model" / "model.pkl")
+    preprocessing_file_path = str(model_dir / "preprocessing" / "preprocessing.pkl")
+    save_object(model_file_path, model)
+    save_object(preprocessing_file_path, {"scaler": "standard"})
+    model_trainer_artifact = ModelTrainerArtifact(
+        trained_model_file_path=model_file_path,
+        metric_artifact=ClassificationMetricArtifact(f1_score=0.8, precision_score=0.8, recall_score=0.8),
+        search_report_file_path=str(model_dir / "search_report.yaml"))
+    data_transformation_artifact = DataTransformationArtifact(
+        transformed_object_file_path=preprocessing_file_path,
+        transformed_train_file_path=str(model_dir / "train.npy"),
+        transformed_test_file_path=str(model_dir / "test.npy"))
+    return ModelPusher(model_trainer_artifact, data_transformation_artifact, model_pusher_config).initiate_model_pusher()
+
+
+def test_versions_are_pushed_side_by_side(storage, tmp_path):
+    model_pusher_config = ModelPusherConfig(**storage)
+    first = push(model_pusher_config, tmp_path / "run_1", {"name": "first"})
+    second = push(model_pusher_config, tmp_path / "run_2", {"name": "second"})
+
+    assert first.model_version != second.model_version
+    assert len(second.uploaded_files) == 2 and not second.skipped_files
+    assert second.s3_model_path == f"{model_pusher_config.s3_model_key_path}/{second.model_version}/model.pkl"
+
+    # Pushing the same model again uploads nothing
+    again = push(model_pusher_config, tmp_path / "run_3", {"name": "second"})
+    assert again.model_version == second.model_version
+    assert not again.uploaded_files
+    assert sorted(again.skipped_files) == sorted(second.uploaded_files)
+
+    # The latest manifest points to the second version, the first version keeps its own files
+    model_storage = get_model_storage(**storage, multipart_threshold=model_pusher_config.multipart_threshold,
+                                      multipart_chunksize=model_pusher_config.multipart_chunksize,
+                                      max_concurrency=model_pusher_config.max_concurrency)
+    prefix = model_pusher_config.s3_model_key_path
+    assert model_storage.read_json(f"{prefix}/{model_pusher_config.manifest_file_name}")["model_version"] == \
+        second.model_version
+    first_manifest = model_storage.read_json(f"{prefix}/manifests/{first.model_version}.json")
+    model_file_path = str(tmp_path / "download" / "model.pkl")
+    model_storage.download_file(first_manifest["files"]["model"]["key"], model_file_path)
+    assert load_object(model_file_path) == {"name": "first"}
+
+
+
+def test_model_cache_swaps_in_new_versions_and_rolls_back_from_memory(storage, tmp_path):
+    model_pusher_config = ModelPusherConfig(**storage)
+    model_cache = ModelCache(ServingConfig(**storage, cache_dir=str(tmp_path / "serving_cache"), max_versions=2))
+    first = push(model_pusher_config, tmp_path / "run_1", {"name": "first"})
+    assert model_cache.refresh()
+    assert model_cache.get_model() == (first.model_version, {"name": "first"})
+    assert not model_cache.refresh()
+
+    second = push(model_pusher_config, tmp_path / "run_2", {"name": "second"})
+    assert model_cache.refresh()
+    assert model_cache.get_model() == (second.model_version, {"name": "second"})
+
+    # An older version still loads from its own manifest after a newer push
+    prefix = model_pusher_config.s3_model_key_path
+    first_manifest = model_cache.model_storage.read_json(f"{prefix}/manifests/{first.model_version}.json")
+    assert model_cache.load_version(first_manifest) == {"name": "first"}
+
+    # Rolling back to a resident version needs no download
+    def fail_download(key, file_path):
+        raise AssertionError(f"{key} downloaded again")
+
+    model_cache.model_storage.download_file = fail_download
+    model_cache.model_storage.write_json(f"{prefix}/{model_pusher_config.manifest_file_name}", first_manifest)
+    assert model_cache.refresh()
+    assert model_cache.get_model() == (first.model_version, {"name": "first"})
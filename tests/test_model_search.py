@@ -0,0 +1,50 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_validate
+
+from us_visa.utils.model_search import cross_validate_resampled
+from us_visa.utils.resampling import SMOTEENNResampler
+
+
+class RecordingResampler:
+    """Returns the training fold as is and records the rows it was given."""
+
+    def __init__(self):
+        self.calls = []
+
+    def fit_resample(self, features, target):
+        self.calls.append(features[:, 0].copy())
+        return features, target
+
+
+def make_data(n_rows: int = 300):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(n_rows, 3))
+    # Row ids in the first column, to trace which rows reach the resampler
+    features[:, 0] = np.arange(n_rows)
+    target = (features[:, 1] + 0.5 * rng.normal(size=n_rows) > 0.8).astype(np.float32)
+    return features, target
+
+
+def test_only_training_folds_are_resampled():
+    features, target = make_data()
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    resampler = RecordingResampler()
+    scores = cross_validate_resampled(LogisticRegression(), features, target, cv=cv, scoring="f1",
+                                      resampler=resampler)
+
+    for rows, (train_index, _) in zip(resampler.calls, cv.split(features, target)):
+        np.testing.assert_array_equal(rows, train_index)
+    # With nothing resampled, the scores are those of a plain cross-validation
+    expected = cross_validate(LogisticRegression(), features, target, cv=cv, scoring="f1")
+    np.testing.assert_allclose(scores["test_score"], expected["test_score"])
+
+
+def test_resampled_folds_score_on_real_rows():
+    features, target = make_data()
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    scores = cross_validate_resampled(LogisticRegression(), features, target, cv=cv, scoring="f1",
+                                      resampler=SMOTEENNResampler(n_jobs=1, random_state=42))
+
+    assert scores["test_score"].shape == (5,)
+    assert np.all((scores["test_score"] >= 0) & (scores["test_score"] <= 1))
@@ -0,0 +1,127 @@
+import os
+import random
+import time
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+
+from us_visa.configuration.mongo_db_connection import MongoDBClient
+from us_visa.data_access import usvisa_data
+from us_visa.entity.config_entity import MongoBatchPredictionConfig
+from us_visa.exception import USvisaException
+from us_visa.pipline.prediction_pipeline import MongoBatchPredictor
+from us_visa.utils.main_utils import read_yaml_file, save_object
+
+SAMPLE_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "notebook", "EasyVisa.csv")
+COLLECTION_NAME = "visa_data"
+PREDICTION_FIELD = "predicted_case_status"
+
+
+class WageModel:
+    """Predicts Denied (1) for wages under 50000, standing in for a trained `USvisaModel`."""
+
+    preprocessing_object = None
+
+    def predict(self, dataframe):
+        return (dataframe["prevailing_wage"].to_numpy() < 50000).astype(np.int8)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(MongoDBClient, "client", mongomock.MongoClient())
+    monkeypatch.setattr(usvisa_data, "DATABASE_NAME", "US")
+    collection = MongoDBClient.client["US"][COLLECTION_NAME]
+    records = pd.read_csv(SAMPLE_FILE_PATH, nrows=500).drop(columns=["case_status"]).to_dict("records")
+    collection.insert_many([dict(record, _id=i) for i, record in enumerate(records)])
+    return collection
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    model_file_path = str(tmp_path / "model" / "model.pkl")
+    save_object(model_file_path, WageModel())
+
+    def make_config(n_workers: int = 1) -> MongoBatchPredictionConfig:
+        return MongoBatchPredictionConfig(model_file_path=model_file_path, collection_name=COLLECTION_NAME,
+                                          page_size=40, n_workers=n_workers, max_pending_pages=2,
+                                          prediction_field=PREDICTION_FIELD,
+                                          checkpoint_file_path=str(tmp_path / "prediction" / "checkpoint.yaml"))
+    return make_config
+
+
+def expected_label(document: dict) -> str:
+    return "Denied" if document["prevailing_wage"] < 50000 else "Certified"
+
+
+def test_every_unscored_document_is_labelled_once(collection, make_config):
+    # Documents scored by an earlier job are left as they are
+    collection.update_many({"_id": {"$in": [3, 4]}}, {"$set": {PREDICTION_FIELD: "kept"}})
+
+    artifact = MongoBatchPredictor(make_config()).predict()
+
+    assert artifact.n_documents == 498
+    for document in collection.find():
+        if document["_id"] in (3, 4):
+            assert document[PREDICTION_FIELD] == "kept"
+        else:
+            assert document[PREDICTION_FIELD] == expected_label(document)
+    assert read_yaml_file(artifact.checkpoint_file_path)["last_id"] == 499
+
+    assert MongoBatchPredictor(make_config()).predict().n_documents == 0
+
+
+def test_an_interrupted_run_resumes_after_the_checkpoint(collection, make_config, monkeypatch):
+    score_page = MongoBatchPredictor.score_page
+
+    def failing_score_page(self, page):
+        if page["_id"].iloc[0] >= 200:
+            raise OSError("connection lost")
+        return score_page(self, page)
+
+    monkeypatch.setattr(MongoBatchPredictor, "score_page", failing_score_page)
+    with pytest.raises(USvisaException):
+        MongoBatchPredictor(make_config()).predict()
+    assert read_yaml_file(make_config().checkpoint_file_path)["last_id"] == 199
+    assert collection.count_documents({PREDICTION_FIELD: {"$exists": True}}) == 200
+    monkeypatch.setattr(MongoBatchPredictor, "score_page", score_page)
+
+    predictor = MongoBatchPredictor(make_config())
+    iter_pages = predictor.usvisa_data.iter_pages
+    start_after = []
+
+    def recording_iter_pages(**kwargs):
+        start_after.append(kwargs["start_after"])
+        return iter_pages(**kwargs)
+
+    predictor.usvisa_data.iter_pages = recording_iter_pages
+    assert predictor.predict().n_documents == 300
+    assert start_after == [199]
+    assert collection.count_documents({PREDICTION_FIELD: {"$exists": False}}) == 0
+
+
+def test_concurrent_pages_advance_the_checkpoint_in_order(collection, make_config, monkeypatch):
+    score_page = MongoBatchPredictor.score_page
+    rng = random.Random(0)
+
+    def slow_score_page(self, page):
+        # Pages finish out of order
+        time.sleep(rng.uniform(0, 0.02))
+        return score_page(self, page)
+
+    checkpoints = []
+    write_checkpoint = MongoBatchPredictor.write_checkpoint
+
+    def recording_write_checkpoint(self, last_id, n_documents):
+        checkpoints.append(last_id)
+        write_checkpoint(self, last_id, n_documents)
+
+    monkeypatch.setattr(MongoBatchPredictor, "score_page", slow_score_page)
+    monkeypatch.setattr(MongoBatchPredictor, "write_checkpoint", recording_write_checkpoint)
+    artifact = MongoBatchPredictor(make_config(n_workers=4)).predict()
+
+    assert artifact.n_documents == 500
+    assert checkpoints == sorted(checkpoints)
+    assert checkpoints[-1] == 499
+    assert all(document[PREDICTION_FIELD] == expected_label(document) for document in collection.find())
@@ -0,0 +1,81 @@
+import os
+import shutil
+
+import pytest
+
+from us_visa.constants import SCHEMA_FILE_PATH
+from us_visa.entity.artifact_entity import ClassificationMetricArtifact, ModelTrainerArtifact
+from us_visa.entity.config_entity import ModelTrainerConfig
+from us_visa.utils import stage_cache
+from us_visa.utils.stage_cache import StageCache
+
+STAGE_NAME = "model_trainer"
+
+
+@pytest.fixture
+def schema_file_path(tmp_path, monkeypatch):
+    schema_file_path = str(tmp_path / "schema.yaml")
+    shutil.copy(SCHEMA_FILE_PATH, schema_file_path)
+    monkeypatch.setattr(stage_cache, "SCHEMA_FILE_PATH", schema_file_path)
+    return schema_file_path
+
+
+def make_artifact(model_dir) -> ModelTrainerArtifact:
+    os.makedirs(model_dir, exist_ok=True)
+    for file_name in ("model.pkl", "search_report.yaml"):
+        with open(os.path.join(model_dir, file_name), "w") as file:
+            file.write(file_name)
+    return ModelTrainerArtifact(
+        trained_model_file_path=os.path.join(model_dir, "model.pkl"),
+        metric_artifact=ClassificationMetricArtifact(f1_score=0.8, precision_score=0.7, recall_score=0.9),
+        search_report_file_path=os.path.join(model_dir, "search_report.yaml"))
+
+
+def test_unchanged_inputs_reuse_the_artifact(tmp_path, schema_file_path):
+    cache = StageCache(str(tmp_path / "stage_cache"))
+    artifact = make_artifact(str(tmp_path / "run_1"))
+    key = cache.make_key(STAGE_NAME, {"rows": 100}, ModelTrainerConfig(), code_version="abc")
+    assert cache.load(STAGE_NAME, key, ModelTrainerArtifact) is None
+    cache.save(STAGE_NAME, key, artifact)
+
+    # A later run only differs in its timestamped directories
+    config = ModelTrainerConfig(model_trainer_dir=str(tmp_path / "run_2"),
+                                trained_model_file_path=str(tmp_path / "run_2" / "model.pkl"))
+    assert cache.make_key(STAGE_NAME, {"rows": 100}, config, code_version="abc") == key
+    assert cache.load(STAGE_NAME, key, ModelTrainerArtifact) == artifact
+
+
+def test_changed_inputs_miss_the_cache(tmp_path, schema_file_path):
+    cache = StageCache(str(tmp_path / "stage_cache"))
+    config = ModelTrainerConfig()
+    key = cache.make_key(STAGE_NAME, {"rows": 100}, config, code_version="abc")
+    cache.save(STAGE_NAME, key, make_artifact(str(tmp_path / "run_1")))
+
+    changed_keys = [
+        cache.make_key(STAGE_NAME, {"rows": 101}, config, code_version="abc"),
+        cache.make_key(STAGE_NAME, {"rows": 100}, config, code_version="abd"),
+        cache.make_key(STAGE_NAME, {"rows": 100}, ModelTrainerConfig(expected_accuracy=config.expected_accuracy + 0.1),
+                       code_version="abc"),
+    ]
+    with open(schema_file_path, "a") as file:
+        file.write("\n# changed\n")
+    changed_keys.append(cache.make_key(STAGE_NAME, {"rows": 100}, config, code_version="abc"))
+
+    assert key not in changed_keys and len(set(changed_keys)) == len(changed_keys)
+    for changed_key in changed_keys:
+        assert cache.load(STAGE_NAME, changed_key, ModelTrainerArtifact) is None
+
+
+def test_artifacts_with_deleted_files_are_not_reused(tmp_path, schema_file_path):
+    cache = StageCache(str(tmp_path / "stage_cache"))
+    artifact = make_artifact(str(tmp_path / "run_1"))
+    key = cache.make_key(STAGE_NAME, {"rows": 100}, ModelTrainerConfig(), code_version="abc")
+    cache.save(STAGE_NAME, key, artifact)
+
+    os.remove(artifact.trained_model_file_path)
+    assert cache.load(STAGE_NAME, key, ModelTrainerArtifact) is None
+
+    # The next successful run records its own artifact under the same key
+    rerun = make_artifact(str(tmp_path / "run_2"))
+    cache.save(STAGE_NAME, key, rerun)
+    assert cache.load(STAGE_NAME, key, ModelTrainerArtifact) == rerun
@@ -0,0 +1,74 @@
+import numpy as np
+
+from us_visa.data_access.trial_store import TrialStore
+from us_visa.utils.main_utils import write_yaml_file
+from us_visa.utils.model_search import ParallelModelSearch
+
+MODEL = "sklearn.linear_model.LogisticRegression"
+
+
+def trial(params: dict, n_samples: int, score: float) -> dict:
+    return {"model": MODEL, "params": params, "n_samples": n_samples, "score": score, "score_std": 0.0,
+            "fit_time": 0.1, "score_time": 0.01, "wall_time": 0.2}
+
+
+def add_trials(trial_store: TrialStore, data_hash: str, trials: list):
+    trial_store.add_trials(data_hash=data_hash, preprocessing_hash="", cv=3, scoring="f1", random_state=42,
+                           trials=trials)
+
+
+def test_best_configurations_rank_by_depth_then_score(tmp_path):
+    trial_store = TrialStore(str(tmp_path / "trial_store.sqlite"))
+    # Successive halving on 900 rows of data "a": C=1 and C=2 reach the last rung, C=3 is dropped
+    add_trials(trial_store, "a", [trial({"C": 1}, 300, 0.60), trial({"C": 2}, 300, 0.70), trial({"C": 3}, 300, 0.65),
+                                  trial({"C": 1}, 900, 0.75), trial({"C": 2}, 900, 0.72)])
+    # On 3000 rows of data "b" only C=3 and C=4 are searched, C=4 reaching the last rung
+    add_trials(trial_store, "b", [trial({"C": 3}, 1000, 0.90), trial({"C": 4}, 1000, 0.80),
+                                  trial({"C": 4}, 3000, 0.70)])
+
+    keys = [(MODEL, TrialStore.params_key({"C": c})) for c in (1, 2, 3, 4)]
+    # Full depth on their data first (C=1 before C=2 on score, C=4 lowest), then C=3 at a third of the rows
+    assert trial_store.get_best_configurations(top_k=4) == [keys[0], keys[1], keys[3], keys[2]]
+    assert trial_store.get_best_configurations(top_k=1) == [keys[0]]
+    assert trial_store.get_evaluated_configurations() == set(keys)
+
+    # Scores are only reused under the same data and evaluation settings
+    trials = trial_store.get_trials(data_hash="a", preprocessing_hash="", n_samples=900, cv=3, scoring="f1",
+                                    random_state=42)
+    assert {key: result["score"] for key, result in trials.items()} == {keys[0]: 0.75, keys[1]: 0.72}
+    assert not trial_store.get_trials(data_hash="a", preprocessing_hash="", n_samples=900, cv=5, scoring="f1",
+                                      random_state=42)
+
+
+def make_search(tmp_path, c_values: list) -> ParallelModelSearch:
+    model_config_path = str(tmp_path / "model.yaml")
+    write_yaml_file(model_config_path, {
+        "grid_search": {"params": {"cv": 3, "scoring": "f1"}},
+        "model_selection": {"module_0": {"class": "LogisticRegression", "module": "sklearn.linear_model",
+                                         "params": {"max_iter": 200},
+                                         "search_param_grid": {"C": c_values}}}}, replace=True)
+    return ParallelModelSearch(model_config_path, n_jobs=1, successive_halving=False, shared_data_dir=str(tmp_path),
+                               trial_store=TrialStore(str(tmp_path / "trial_store.sqlite")), warm_start_top_k=1)
+
+
+def make_data(seed: int, n_rows: int = 300):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(n_rows, 3))
+    target = (features[:, 0] + rng.normal(size=n_rows) > 0.5).astype(np.float32)
+    return features, target
+
+
+def test_warm_start_does_not_evaluate_scored_trials_again(tmp_path):
+    first = make_search(tmp_path, [0.001, 0.1, 1.0, 10.0]).fit(*make_data(0))
+    assert len(first.results) == 4 and not first.results["cached"].any()
+
+    # The same data: every trial comes from the store
+    again = make_search(tmp_path, [0.001, 0.1, 1.0, 10.0]).fit(*make_data(0))
+    assert again.results["cached"].all()
+    assert again.best_params == first.best_params
+
+    # New data and a new grid value: only the earlier best and the untried configuration are scored
+    best_c = first.best_params["C"]
+    retrain = make_search(tmp_path, [0.001, 0.1, 1.0, 10.0, 100.0]).fit(*make_data(1))
+    assert sorted(params["C"] for params in retrain.results["params"]) == sorted([best_c, 100.0])
+    assert not retrain.results["cached"].any()
@@ -0,0 +1,52 @@
+import os
+
+import mongomock
+import pandas as pd
+import pytest
+
+from us_visa.configuration.mongo_db_connection import MongoDBClient
+from us_visa.data_access import usvisa_data
+from us_visa.data_access.usvisa_data import USvisaData
+
+SAMPLE_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "notebook", "EasyVisa.csv")
+COLLECTION_NAME = "visa_data"
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(MongoDBClient, "client", mongomock.MongoClient())
+    monkeypatch.setattr(usvisa_data, "DATABASE_NAME", "US")
+    collection = MongoDBClient.client["US"][COLLECTION_NAME]
+    records = pd.read_csv(SAMPLE_FILE_PATH, nrows=500).to_dict("records")
+    # `bucket` repeats, so partition boundaries can fall on duplicate keys
+    collection.insert_many([dict(record, _id=i, bucket=i % 7) for i, record in enumerate(records)])
+    return collection
+
+
+@pytest.mark.parametrize("partition_key", ["_id", "bucket"])
+@pytest.mark.parametrize("n_partitions", [1, 4, 1000])
+@pytest.mark.parametrize("query", [None, {"_id": {"$gte": 100}}])
+def test_partitions_cover_every_document_once(collection, partition_key, n_partitions, query):
+    partition_queries = USvisaData().get_partition_queries(collection_name=COLLECTION_NAME,
+                                                           partition_key=partition_key,
+                                                           n_partitions=n_partitions, query=query,
+                                                           samples_per_partition=10)
+    assert 1 <= len(partition_queries) <= n_partitions
+
+    ids = [document["_id"] for partition_query in partition_queries
+           for document in collection.find(partition_query, {"_id": 1})]
+    assert sorted(ids) == sorted(document["_id"] for document in collection.find(query or {}, {"_id": 1}))
+
+
+def test_partitions_are_balanced(collection):
+    partition_queries = USvisaData().get_partition_queries(collection_name=COLLECTION_NAME, partition_key="_id",
+                                                           n_partitions=4, samples_per_partition=500)
+    sizes = [collection.count_documents(partition_query) for partition_query in partition_queries]
+    assert sizes == [125, 125, 125, 125]
+
+
+def test_partitioned_export_matches_single_export(collection):
+    data = USvisaData()
+    single = data.export_collection_as_dataframe(collection_name=COLLECTION_NAME, sort_key="_id")
+    partitioned = data.export_collection_partitioned(collection_name=COLLECTION_NAME, n_partitions=4, max_workers=4)
+    pd.testing.assert_frame_equal(partitioned.astype(str), single.astype(str))
@@ -1,5 +1,9 @@
 import os
+import shutil
 import sys
+from datetime import datetime
+from typing import Optional
+
 from pandas import DataFrame
 from sklearn.model_selection import train_test_split
 
@@ -8,6 +12,43 @@ from us_visa.entity.artifact_entity import DataIngestionArtifact
 from us_visa.exception import USvisaException
 from us_visa.logger import logging
 from us_visa.data_access.usvisa_data import USvisaData
+from us_visa.utils.instrumentation import measure
+from us_visa.utils.main_utils import append_dataframe, read_yaml_file, write_dataframe, write_yaml_file
+
+
+def _replace_yaml_file(file_path: str, content: dict):
+    """Writes a YAML file next to `file_path` and renames it over `file_path`, so readers never see a partial file."""
+    temp_file_path = f"{file_path}.tmp"
+    write_yaml_file(file_path=temp_file_path, content=content, replace=True)
+    os.replace(temp_file_path, file_path)
+
+
+def _get_append_state(file_path: str) -> Optional[dict]:
+    """
+    Returns what `_restore_append_state` needs to undo appends to `file_path`: the size of a CSV
+    file, the part files of a directory, or None if the path does not exist yet.
+    """
+    if os.path.isdir(file_path):
+        return {"parts": sorted(os.listdir(file_path))}
+    if os.path.exists(file_path):
+        return {"size": os.path.getsize(file_path)}
+    return None
+
+
+def _restore_append_state(file_path: str, state: Optional[dict]):
+    """Undoes the appends made to `file_path` since `_get_append_state` returned `state`."""
+    if state is None:
+        if os.path.isdir(file_path):
+            shutil.rmtree(file_path)
+        elif os.path.exists(file_path):
+            os.remove(file_path)
+    elif "parts" in state:
+        if os.path.isdir(file_path):
+            for name in set(os.listdir(file_path)) - set(state["parts"]):
+                os.remove(os.path.join(file_path, name))
+    elif os.path.exists(file_path):
+        with open(file_path, "r+b") as file_obj:
+            file_obj.truncate(state["size"])
 
 
 class DataIngestion:
@@ -30,9 +71,41 @@ class DataIngestion:
         except Exception as e:
             raise USvisaException(e, sys)
 
+    def _export_collection(self, usvisa_data: USvisaData, query: Optional[dict] = None) -> DataFrame:
+        """
+        Exports the configured collection, reading key ranges in parallel when configured. Either
+        way the rows come in `partition_key` order, so the seeded train/test split of the same
+        documents holds out the same rows in every run.
+
+        Args:
+            usvisa_data (USvisaData): Data access object connected to MongoDB.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
+
+        Returns:
+            DataFrame: The exported documents.
+        """
+        with measure("data_ingestion.export_collection") as step:
+            if self.data_ingestion_config.export_partitions > 1:
+                dataframe = usvisa_data.export_collection_partitioned(
+                    collection_name=self.data_ingestion_config.collection_name,
+                    n_partitions=self.data_ingestion_config.export_partitions,
+                    max_workers=self.data_ingestion_config.export_workers,
+                    partition_key=self.data_ingestion_config.partition_key,
+                    batch_size=self.data_ingestion_config.export_batch_size,
+                    query=query)
+            else:
+                dataframe = usvisa_data.export_collection_as_dataframe(
+                    collection_name=self.data_ingestion_config.collection_name,
+                    batch_size=self.data_ingestion_config.export_batch_size,
+                    query=query,
+                    sort_key=self.data_ingestion_config.partition_key)
+            step["rows"] = len(dataframe)
+            return dataframe
+
     def export_data_into_feature_store(self) -> DataFrame:
         """
-        Exports data from MongoDB into a pandas DataFrame and saves it to a feature store (CSV file).
+        Exports data from MongoDB into a pandas DataFrame and saves it to a feature store
+        (Parquet, Feather or CSV file, depending on the extension of the configured path).
 
         Returns:
             DataFrame: The DataFrame containing the exported data.
@@ -45,8 +118,7 @@ class DataIngestion:
             usvisa_data = USvisaData()
 
             # Export data from MongoDB to DataFrame
-            dataframe = usvisa_data.export_collection_as_dataframe(
-                collection_name=self.data_ingestion_config.collection_name)
+            dataframe = self._export_collection(usvisa_data)
             logging.info(f"Data exported from MongoDB with shape: {dataframe.shape}")
 
             # Ensure feature store directory exists
@@ -55,14 +127,146 @@ class DataIngestion:
             os.makedirs(dir_path, exist_ok=True)
             logging.info(f"Directory for feature store created at: {dir_path}")
 
-            # Save the DataFrame to a CSV file
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
+            # Save the DataFrame to the feature store file
+            with measure("data_ingestion.write_feature_store", rows=len(dataframe)):
+                write_dataframe(file_path=feature_store_file_path, dataframe=dataframe)
             logging.info(f"Data saved to feature store at: {feature_store_file_path}")
             return dataframe
 
         except Exception as e:
             raise USvisaException(e, sys)
 
+    def read_watermark(self):
+        """
+        Reads the high-water mark of the last incremental ingestion.
+
+        Returns:
+            The last ingested value of the watermark field, or None if nothing was ingested yet
+            or the watermark was recorded for a different field.
+
+        Raises:
+            USvisaException: If the watermark file cannot be read.
+        """
+        try:
+            from bson import ObjectId
+
+            watermark_file_path = self.data_ingestion_config.watermark_file_path
+            if not os.path.exists(watermark_file_path):
+                return None
+            watermark = read_yaml_file(file_path=watermark_file_path)
+            if watermark["field"] != self.data_ingestion_config.watermark_field:
+                logging.info(f"Watermark was recorded for field {watermark['field']}, ignoring it.")
+                return None
+            if watermark["type"] == "ObjectId":
+                return ObjectId(watermark["value"])
+            return watermark["value"]
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def encode_watermark(self, value) -> dict:
+        """Returns the YAML representation of a watermark value, as stored in the watermark file."""
+        from bson import ObjectId
+
+        return {
+            "field": self.data_ingestion_config.watermark_field,
+            "type": "ObjectId" if isinstance(value, ObjectId) else "raw",
+            "value": str(value) if isinstance(value, ObjectId) else value,
+        }
+
+    def write_watermark(self, value, rows: int):
+        """
+        Persists the high-water mark reached by an incremental ingestion. The file is replaced
+        atomically, so a failed write leaves the previous watermark in place.
+
+        Args:
+            value: The largest value of the watermark field that was ingested.
+            rows (int): Number of documents ingested by the run, kept for reference.
+
+        Raises:
+            USvisaException: If the watermark file cannot be written.
+        """
+        try:
+            _replace_yaml_file(file_path=self.data_ingestion_config.watermark_file_path,
+                               content=dict(self.encode_watermark(value), rows=rows,
+                                            updated_at=datetime.now().isoformat()))
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def get_append_paths(self) -> list:
+        """Returns the incremental feature store and train/test paths that new rows are appended to."""
+        return [self.data_ingestion_config.incremental_feature_store_file_path,
+                self.data_ingestion_config.incremental_training_file_path,
+                self.data_ingestion_config.incremental_testing_file_path]
+
+    def rollback_uncommitted_append(self):
+        """
+        Restores the incremental store to its state before an append whose run failed before
+        committing the watermark, so the retry does not ingest the same documents twice.
+
+        An append is committed once the watermark file holds the watermark recorded in the
+        journal; the journal of a committed append is only removed.
+
+        Raises:
+            USvisaException: If the store cannot be restored.
+        """
+        try:
+            journal_file_path = self.data_ingestion_config.append_journal_file_path
+            if not os.path.exists(journal_file_path):
+                return
+            journal = read_yaml_file(file_path=journal_file_path)
+            watermark_file_path = self.data_ingestion_config.watermark_file_path
+            watermark = read_yaml_file(file_path=watermark_file_path) if os.path.exists(watermark_file_path) else {}
+            committed = all(watermark.get(key) == journal["watermark"][key] for key in ("field", "type", "value"))
+            if not committed:
+                logging.info(f"Rolling back the append of a failed run up to watermark {journal['watermark']['value']}")
+                for file_path, state in journal["files"].items():
+                    _restore_append_state(file_path=file_path, state=state)
+            os.remove(journal_file_path)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def export_new_data(self) -> tuple:
+        """
+        Exports only the documents newer than the persisted watermark. With `full_refresh` the
+        incremental store and watermark are discarded first, so the whole collection is ingested again.
+
+        The upper bound of the delta is read before the export, so documents inserted while the
+        export runs are picked up by the next run instead of being skipped.
+
+        Returns:
+            tuple: The newly ingested documents (empty when there is nothing new) and the watermark
+            to commit once they have been appended to the incremental store.
+
+        Raises:
+            USvisaException: If there is an error during data export.
+        """
+        try:
+            if self.data_ingestion_config.full_refresh and os.path.exists(self.data_ingestion_config.incremental_store_dir):
+                shutil.rmtree(self.data_ingestion_config.incremental_store_dir)
+                logging.info(f"Full refresh requested, removed {self.data_ingestion_config.incremental_store_dir}")
+            self.rollback_uncommitted_append()
+
+            usvisa_data = USvisaData()
+            watermark_field = self.data_ingestion_config.watermark_field
+            last_watermark = self.read_watermark()
+            new_watermark = usvisa_data.get_max_value(collection_name=self.data_ingestion_config.collection_name,
+                                                      field=watermark_field)
+            logging.info(f"Incremental ingestion on {watermark_field}: ({last_watermark}, {new_watermark}]")
+
+            if new_watermark is None or new_watermark == last_watermark:
+                logging.info("No new documents to ingest.")
+                return DataFrame(), None
+
+            key_range = {"$lte": new_watermark}
+            if last_watermark is not None:
+                key_range["$gt"] = last_watermark
+            dataframe = self._export_collection(usvisa_data, query={watermark_field: key_range})
+            logging.info(f"New data exported from MongoDB with shape: {dataframe.shape}")
+            return dataframe, new_watermark
+
+        except Exception as e:
+            raise USvisaException(e, sys)
+
     def split_data_as_train_test(self, dataframe: DataFrame):
         """
         Splits the input DataFrame into training and testing sets and saves them to disk.
@@ -75,9 +279,11 @@ class DataIngestion:
         """
         try:
             logging.info("Performing train-test split on the dataframe.")
-            train_set, test_set = train_test_split(
-                dataframe,
-                test_size=self.data_ingestion_config.train_test_split_ratio)
+            with measure("data_ingestion.split", rows=len(dataframe)):
+                train_set, test_set = train_test_split(
+                    dataframe,
+                    test_size=self.data_ingestion_config.train_test_split_ratio,
+                    random_state=self.data_ingestion_config.random_state)
 
             logging.info(
                 f"Train-test split completed with train shape: {train_set.shape}, test shape: {test_set.shape}")
@@ -87,15 +293,91 @@ class DataIngestion:
             os.makedirs(name=dir_path, exist_ok=True)
             logging.info(f"Directory for train/test files created at: {dir_path}")
 
-            # Save train and test datasets to CSV
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index=False, header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path, index=False, header=True)
+            # Save train and test datasets in the feature store format
+            with measure("data_ingestion.write_train_test", rows=len(train_set) + len(test_set)) as step:
+                write_dataframe(file_path=self.data_ingestion_config.training_file_path, dataframe=train_set)
+                write_dataframe(file_path=self.data_ingestion_config.testing_file_path, dataframe=test_set)
+                step.update(train_rows=len(train_set), test_rows=len(test_set))
             logging.info(f"Train data saved to: {self.data_ingestion_config.training_file_path}")
             logging.info(f"Test data saved to: {self.data_ingestion_config.testing_file_path}")
 
         except Exception as e:
             raise USvisaException(e, sys) from e
 
+    def append_new_data(self, dataframe: DataFrame, new_watermark):
+        """
+        Appends newly ingested rows to the incremental feature store, splits them into training and
+        testing rows appended to the incremental train/test datasets, and commits the watermark.
+
+        The state of every appended path is journaled first and the watermark is written last, so
+        a run failing in between is rolled back by the next one (see `rollback_uncommitted_append`)
+        instead of leaving rows that the retry would append again.
+
+        Args:
+            dataframe (DataFrame): The newly ingested rows.
+            new_watermark: The watermark reached by the rows.
+
+        Raises:
+            USvisaException: If there is an error during the split or file saving process.
+        """
+        try:
+            if len(dataframe) < 2:
+                # Too few rows to split, keep them for training
+                train_set, test_set = dataframe, dataframe.iloc[0:0]
+            else:
+                train_set, test_set = train_test_split(
+                    dataframe,
+                    test_size=self.data_ingestion_config.train_test_split_ratio,
+                    random_state=self.data_ingestion_config.random_state)
+
+            _replace_yaml_file(file_path=self.data_ingestion_config.append_journal_file_path, content={
+                "watermark": self.encode_watermark(new_watermark),
+                "files": {file_path: _get_append_state(file_path) for file_path in self.get_append_paths()},
+            })
+            feature_store_file_path, training_file_path, testing_file_path = self.get_append_paths()
+            append_dataframe(file_path=feature_store_file_path, dataframe=dataframe)
+            append_dataframe(file_path=training_file_path, dataframe=train_set)
+            append_dataframe(file_path=testing_file_path, dataframe=test_set)
+            logging.info(f"Appended {len(dataframe)} rows to {feature_store_file_path}: {len(train_set)} train rows "
+                         f"and {len(test_set)} test rows to the incremental splits.")
+
+            self.write_watermark(value=new_watermark, rows=len(dataframe))
+            os.remove(self.data_ingestion_config.append_journal_file_path)
+
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def initiate_incremental_data_ingestion(self) -> DataIngestionArtifact:
+        """
+        Ingests only the documents added since the last run and merges them into the incremental
+        feature store and train/test splits, so the cost grows with the delta instead of the collection.
+
+        Returns:
+            DataIngestionArtifact: An artifact containing paths to the incremental train and test datasets.
+
+        Raises:
+            USvisaException: If there is an error during the data ingestion process.
+        """
+        try:
+            logging.info("Initiating incremental data ingestion process.")
+            # Step 1: Export the documents newer than the watermark
+            dataframe, new_watermark = self.export_new_data()
+
+            # Step 2: Append them to the feature store and splits, and advance the watermark
+            if len(dataframe) > 0:
+                self.append_new_data(dataframe=dataframe, new_watermark=new_watermark)
+
+            data_ingestion_artifact = DataIngestionArtifact(
+                train_file_path=self.data_ingestion_config.incremental_training_file_path,
+                test_file_path=self.data_ingestion_config.incremental_testing_file_path
+            )
+
+            logging.info(f"Incremental data ingestion completed successfully. Artifact created: {data_ingestion_artifact}")
+            return data_ingestion_artifact
+
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         """
         Orchestrates the data ingestion process by exporting the data and splitting it into train and test sets.
@@ -107,6 +389,9 @@ class DataIngestion:
             USvisaException: If there is an error during the data ingestion process.
         """
         try:
+            if self.data_ingestion_config.incremental:
+                return self.initiate_incremental_data_ingestion()
+
             logging.info("Initiating data ingestion process.")
 
             # Step 1: Export data to feature store
@@ -0,0 +1,241 @@
+import sys
+
+import numpy as np
+from pandas import DataFrame
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, PowerTransformer, StandardScaler
+
+from us_visa.constants import CURRENT_YEAR, SCHEMA_FILE_PATH, TARGET_COLUMN
+from us_visa.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact
+from us_visa.entity.config_entity import DataTransformationConfig
+from us_visa.entity.estimator import TargetValueMapping
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.instrumentation import measure
+from us_visa.utils.main_utils import read_typed_dataframe, read_yaml_file, save_numpy_array_data, save_object
+from us_visa.utils.resampling import SMOTEENNResampler
+
+
+def add_company_age(dataframe: DataFrame, drop_cols=()) -> DataFrame:
+    """
+    Derives `company_age` from `yr_of_estab` and drops the columns not used as features. Used as the
+    first step of the preprocessing pipeline, so the persisted object can transform raw records.
+
+    Args:
+        dataframe (DataFrame): Raw input records.
+        drop_cols (list): Columns removed after the derivation (e.g. `case_id` and `yr_of_estab`).
+
+    Returns:
+        DataFrame: The records with `company_age` and without `drop_cols`.
+    """
+    dataframe = dataframe.assign(company_age=CURRENT_YEAR - dataframe["yr_of_estab"])
+    return dataframe.drop(columns=[column for column in drop_cols if column in dataframe.columns])
+
+
+class DataTransformation:
+    """
+    A class to turn the validated train and test datasets into model-ready feature arrays.
+
+    The preprocessing pipeline is built from schema.yaml (`drop_columns`, `oh_columns`, `or_columns`,
+    `transform_columns` and `num_features`), fitted once on the training data and persisted. Both
+    datasets are written as contiguous float32 arrays with the encoded target as the last column,
+    or as float32 CSR matrices when the one-hot encoded features are sparse enough to pay off.
+
+    When the training data is resampled, the training array before resampling is saved as well:
+    the model search cross-validates on it and resamples only the training folds, so synthetic
+    samples never reach a validation fold.
+
+    Attributes:
+        data_ingestion_artifact (DataIngestionArtifact): Contains paths to the train and test datasets.
+        data_transformation_config (DataTransformationConfig): Output paths and transformation options.
+        data_validation_artifact (DataValidationArtifact): Result of the data validation stage.
+        _schema_config (dict): Schema configuration loaded from a YAML file.
+    """
+
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact,
+                 data_transformation_config: DataTransformationConfig,
+                 data_validation_artifact: DataValidationArtifact):
+        """
+        Args:
+            data_ingestion_artifact (DataIngestionArtifact): Contains paths to ingested datasets.
+            data_transformation_config (DataTransformationConfig): Contains the transformation configuration.
+            data_validation_artifact (DataValidationArtifact): Contains the validation status.
+
+        Raises:
+            USvisaException: If any error occurs during initialization.
+        """
+        try:
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_transformation_config = data_transformation_config
+            self.data_validation_artifact = data_validation_artifact
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    @staticmethod
+    def read_data(file_path) -> DataFrame:
+        """
+        Reads a dataset file into a pandas DataFrame typed from the schema.
+
+        Args:
+            file_path (str): Path to the file or directory of part files.
+
+        Returns:
+            DataFrame: Loaded dataframe from the file.
+
+        Raises:
+            USvisaException: If any error occurs during file reading.
+        """
+        try:
+            return read_typed_dataframe(file_path=file_path, report_memory=False)
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    def get_data_transformer_object(self) -> Pipeline:
+        """
+        Builds the preprocessing pipeline from the schema: derive `company_age` and drop the unused
+        columns, then one-hot encode `oh_columns`, ordinal encode `or_columns`, Yeo-Johnson transform
+        `transform_columns` and standard scale `num_features`, as in the training notebook.
+
+        Returns:
+            Pipeline: The unfitted preprocessing pipeline.
+
+        Raises:
+            USvisaException: If the pipeline cannot be built.
+        """
+        logging.info("Entered get_data_transformer_object method of DataTransformation class")
+        try:
+            # Encoders emit float32 directly, so the sparse one-hot block is never widened to float64
+            preprocessor = ColumnTransformer(
+                transformers=[
+                    ("OneHotEncoder", OneHotEncoder(handle_unknown="ignore", dtype=np.float32),
+                     self._schema_config["oh_columns"]),
+                    ("Ordinal_Encoder", OrdinalEncoder(dtype=np.float32), self._schema_config["or_columns"]),
+                    ("Transformer", Pipeline(steps=[("transformer", PowerTransformer(method="yeo-johnson"))]),
+                     self._schema_config["transform_columns"]),
+                    ("StandardScaler", StandardScaler(), self._schema_config["num_features"]),
+                ],
+                sparse_threshold=self.data_transformation_config.sparse_threshold,
+            )
+            pipeline = Pipeline(steps=[
+                ("company_age", FunctionTransformer(add_company_age,
+                                                    kw_args={"drop_cols": self._schema_config["drop_columns"]})),
+                ("preprocessor", preprocessor),
+            ])
+
+            logging.info("Exited get_data_transformer_object method of DataTransformation class")
+            return pipeline
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    @staticmethod
+    def to_compact_array(features, target: np.ndarray):
+        """
+        Stacks the features and target into one float32 array, target as the last column. Dense
+        features are written straight into a preallocated C-contiguous array; sparse features
+        stay a CSR matrix.
+
+        Args:
+            features: Transformed features, a NumPy array or SciPy sparse matrix.
+            target (np.ndarray): Encoded target values.
+
+        Returns:
+            The float32 array or CSR matrix.
+        """
+        if sparse.issparse(features):
+            return sparse.hstack([features, sparse.csr_matrix(target.reshape(-1, 1))],
+                                 format="csr", dtype=np.float32)
+        array = np.empty((features.shape[0], features.shape[1] + 1), dtype=np.float32)
+        array[:, :-1] = features
+        array[:, -1] = target
+        return array
+
+    def resample(self, features, target: np.ndarray):
+        """
+        Balances the classes of the training data with SMOTEENN, as in the training notebook. The
+        resampler draws the same samples as imblearn's SMOTEENN, with chunked parallel neighbour queries.
+
+        Args:
+            features: Transformed training features.
+            target (np.ndarray): Encoded training target.
+
+        Returns:
+            tuple: The resampled features and target.
+
+        Raises:
+            USvisaException: If resampling fails.
+        """
+        try:
+            logging.info("Applying SMOTEENN on training dataset")
+            smt = SMOTEENNResampler(sampling_strategy="minority",
+                                    n_jobs=self.data_transformation_config.resampler_n_jobs,
+                                    chunk_size=self.data_transformation_config.resampler_chunk_size,
+                                    random_state=42)
+            return smt.fit_resample(features, target)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        """
+        Fits the preprocessing pipeline on the training data, transforms both datasets and saves
+        the arrays and the fitted preprocessor.
+
+        Returns:
+            DataTransformationArtifact: Paths to the fitted preprocessor and transformed arrays.
+
+        Raises:
+            USvisaException: If validation failed or any error occurs during the transformation.
+        """
+        try:
+            if not self.data_validation_artifact.validation_status:
+                raise Exception(self.data_validation_artifact.message)
+
+            logging.info("Starting data transformation")
+            preprocessor = self.get_data_transformer_object()
+            target_mapping = TargetValueMapping()._asdict()
+
+            train_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.train_file_path)
+            test_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.test_file_path)
+
+            # Split features and encoded target
+            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN])
+            target_feature_train = train_df[TARGET_COLUMN].astype("object").map(target_mapping).to_numpy(np.float32)
+            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN])
+            target_feature_test = test_df[TARGET_COLUMN].astype("object").map(target_mapping).to_numpy(np.float32)
+
+            # Fit once on the training data, reuse the fitted object for the test data and at prediction time
+            with measure("data_transformation.fit_transform", rows=len(train_df) + len(test_df)):
+                input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
+                input_feature_test_arr = preprocessor.transform(input_feature_test_df)
+            logging.info(f"Transformed features are {'sparse' if sparse.issparse(input_feature_train_arr) else 'dense'}")
+
+            unresampled_train_file_path = None
+            if self.data_transformation_config.resample:
+                unresampled_train_file_path = self.data_transformation_config.transformed_unresampled_train_file_path
+                save_numpy_array_data(unresampled_train_file_path, array=DataTransformation.to_compact_array(
+                    input_feature_train_arr, target_feature_train))
+                with measure("data_transformation.resample", rows=input_feature_train_arr.shape[0]) as step:
+                    input_feature_train_arr, target_feature_train = self.resample(input_feature_train_arr,
+                                                                                  target_feature_train)
+                    step["output_rows"] = input_feature_train_arr.shape[0]
+
+            train_arr = DataTransformation.to_compact_array(input_feature_train_arr, target_feature_train)
+            test_arr = DataTransformation.to_compact_array(input_feature_test_arr, target_feature_test)
+
+            save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
+            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
+            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+            logging.info(f"Saved train array {train_arr.shape} and test array {test_arr.shape} as float32")
+
+            data_transformation_artifact = DataTransformationArtifact(
+                transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
+                transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_unresampled_train_file_path=unresampled_train_file_path
+            )
+            logging.info(f"Data transformation artifact: {data_transformation_artifact}")
+            return data_transformation_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e
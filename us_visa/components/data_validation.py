@@ -1,15 +1,18 @@
 import json
+import os
+import shutil
 import sys
-import pandas as pd
 from pandas import DataFrame
-from evidently.model_profile import Profile
-from evidently.model_profile.sections import DataDriftProfileSection
 
 from us_visa.constants import SCHEMA_FILE_PATH
 from us_visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from us_visa.entity.config_entity import DataValidationConfig
 from us_visa.exception import USvisaException
-from us_visa.utils.main_utils import read_yaml_file, write_yaml_file
+from us_visa.utils.dag_executor import DAGExecutor
+from us_visa.utils.drift_utils import build_reference_profile, calculate_data_drift, calculate_data_drift_from_profile
+from us_visa.utils.main_utils import (cast_dataframe_to_schema, concat_typed_chunks, get_schema_column_types,
+                                     iter_dataframe_chunks, log_memory_report, read_yaml_file, write_yaml_file)
+from us_visa.utils.schema_validator import SchemaValidator
 from us_visa.logger import logging
 
 
@@ -43,92 +46,143 @@ class DataValidation:
         except Exception as e:
             raise USvisaException(e, sys)
 
-    def validate_number_of_columns(self, dataframe: DataFrame):
+    def read_and_validate_data(self, file_path: str) -> tuple:
         """
-        Validates if the number of columns in the dataframe matches the schema.
+        Reads a dataset file once, chunk by chunk: every chunk is validated against the schema
+        (column presence, types, allowed categorical values, null rates and numeric ranges) and
+        then typed from the schema, and the typed chunks are joined into the dataframe used for drift.
 
         Args:
-            dataframe (DataFrame): The dataframe to be validated.
+            file_path (str): Path to the Parquet/Feather/CSV file or directory of part files.
 
         Returns:
-            bool: True if column count matches the schema, False otherwise.
+            tuple: The typed dataframe and the per-column validation report, see `SchemaValidator.report`.
 
         Raises:
-            USvisaException: If any error occurs during validation.
+            USvisaException: If the file cannot be read or validated.
         """
         try:
-            # Check if the number of columns in the dataframe matches the schema configuration
-            status = len(dataframe.columns) == len(self._schema_config["columns"])
-            logging.info(f"Is required Column present: [{status}]")
-            return status
+            # One validator per file, so the train and test files can be read concurrently
+            validator = SchemaValidator(self._schema_config)
+            column_types = get_schema_column_types(self._schema_config)
+            chunks = []
+            for chunk in iter_dataframe_chunks(file_path, chunk_size=self.data_validation_config.chunk_size):
+                validator.update(chunk)
+                chunks.append(cast_dataframe_to_schema(chunk, column_types))
+            report = validator.report()
+            logging.info(f"Schema validation of {file_path}: {report['n_rows']} rows, valid: {report['valid']}")
+
+            dataframe = concat_typed_chunks(chunks)
+            log_memory_report(dataframe, file_path)
+            return dataframe, report
         except Exception as e:
             raise USvisaException(e, sys)
 
-    def is_column_exist(self, df: DataFrame):
+    def calculate_drift_metrics_with_evidently(self, reference_df: DataFrame, current_df: DataFrame) -> dict:
         """
-        Checks if all required numerical and categorical columns exist in the dataframe.
+        Computes the drift metrics with Evidently's DataDriftProfile. Evidently is an optional
+        dependency (evidently==0.2.8) and is only imported when this backend is selected.
 
         Args:
-            df (DataFrame): The dataframe to check.
+            reference_df (DataFrame): The reference dataframe (usually training data).
+            current_df (DataFrame): The current dataframe (usually test data).
 
         Returns:
-            bool: True if all required columns exist, False otherwise.
+            dict: The `data_drift.data.metrics` section of the Evidently profile.
+        """
+        from evidently.model_profile import Profile
+        from evidently.model_profile.sections import DataDriftProfileSection
+
+        # Create a data drift profile using Evidently
+        data_drift_profile = Profile(sections=[DataDriftProfileSection()])
+        data_drift_profile.calculate(reference_data=reference_df, current_data=current_df)
+
+        # Convert the drift profile to JSON format
+        return json.loads(data_drift_profile.json())["data_drift"]["data"]["metrics"]
+
+    def detect_dataset_drift(self, reference_df: DataFrame, current_df: DataFrame):
+        """
+        Detects data drift between the reference and current datasets.
+
+        The default "native" backend runs vectorized Kolmogorov-Smirnov (numerical columns),
+        chi-square (categorical columns) and PSI computations over the schema columns, on uniform
+        samples of frames larger than `drift_sample_size`. The "evidently" backend uses Evidently's
+        DataDriftProfile instead. Both write the same `data_drift.data.metrics` report layout.
+
+        Args:
+            reference_df (DataFrame): The reference dataframe (usually training data).
+            current_df (DataFrame): The current dataframe (usually test data).
+
+        Returns:
+            bool: True if dataset drift is detected, False otherwise.
 
         Raises:
-            USvisaException: If any error occurs during column existence check.
+            USvisaException: If any error occurs during drift detection.
         """
         try:
-            dataframe_columns = df.columns  # List of dataframe columns
-            missing_numerical_columns = []
-            missing_categorical_columns = []
-
-            # Check for missing numerical columns
-            for column in self._schema_config["numerical_columns"]:
-                if column not in dataframe_columns:
-                    missing_numerical_columns.append(column)
-            if len(missing_numerical_columns) > 0:
-                logging.info(f"Missing numerical column: {missing_numerical_columns}")
-
-            # Check for missing categorical columns
-            for column in self._schema_config["categorical_columns"]:
-                if column not in dataframe_columns:
-                    missing_categorical_columns.append(column)
-            if len(missing_categorical_columns) > 0:
-                logging.info(f"Missing categorical column: {missing_categorical_columns}")
-
-            # Return False if any required column is missing
-            return False if len(missing_numerical_columns) > 0 or len(missing_categorical_columns) > 0 else True
+            if self.data_validation_config.drift_backend == "evidently":
+                metrics = self.calculate_drift_metrics_with_evidently(reference_df, current_df)
+            else:
+                metrics = calculate_data_drift(reference_df=reference_df, current_df=current_df,
+                                               numerical_columns=self._schema_config["numerical_columns"],
+                                               categorical_columns=self._schema_config["categorical_columns"],
+                                               threshold=self.data_validation_config.drift_threshold,
+                                               drift_share=self.data_validation_config.drift_share,
+                                               sample_size=self.data_validation_config.drift_sample_size)
 
+            # Write the drift report to a YAML file
+            write_yaml_file(file_path=self.data_validation_config.drift_report_file_path,
+                            content={"data_drift": {"data": {"metrics": metrics}}})
+
+            # Extract drift metrics from the report
+            n_features = metrics["n_features"]
+            n_drifted_features = metrics["n_drifted_features"]
+
+            logging.info(f"{n_drifted_features} / {n_features} drift detected !!")
+
+            # Return drift status (True/False)
+            drift_status = metrics["dataset_drift"]
+
+            return drift_status
         except Exception as e:
             raise USvisaException(e, sys)
 
-    @staticmethod
-    def read_data(file_path) -> DataFrame:
+    def save_reference_profile(self, reference_df: DataFrame) -> str:
         """
-        Reads a CSV file into a pandas DataFrame.
+        Saves a compact profile of the reference data (quantile-bin histograms of the numerical
+        columns and frequency tables of the categorical columns) next to the drift report.
 
         Args:
-            file_path (str): Path to the CSV file.
+            reference_df (DataFrame): The reference dataframe (usually training data).
 
         Returns:
-            DataFrame: Loaded dataframe from CSV file.
+            str: Path to the saved profile.
 
         Raises:
-            USvisaException: If any error occurs during file reading.
+            USvisaException: If the profile cannot be built or saved.
         """
         try:
-            # Read CSV file using pandas
-            return pd.read_csv(file_path)
+            reference_profile = build_reference_profile(reference_df=reference_df,
+                                                        numerical_columns=self._schema_config["numerical_columns"],
+                                                        categorical_columns=self._schema_config["categorical_columns"],
+                                                        n_bins=self.data_validation_config.reference_profile_bins)
+            write_yaml_file(file_path=self.data_validation_config.reference_profile_file_path,
+                            content=reference_profile, replace=True)
+            logging.info(f"Reference profile saved to {self.data_validation_config.reference_profile_file_path}")
+            return self.data_validation_config.reference_profile_file_path
         except Exception as e:
             raise USvisaException(e, sys)
 
-    def detect_dataset_drift(self, reference_df: DataFrame, current_df: DataFrame):
+    def detect_dataset_drift_from_profile(self, current_df: DataFrame, reference_profile_file_path: str,
+                                          drift_report_file_path: str) -> bool:
         """
-        Detects data drift between the reference and current datasets using Evidently's DataDriftProfile.
+        Detects drift of a new batch against a saved reference profile. The training data is not
+        loaded, so time and memory depend only on the size of the batch.
 
         Args:
-            reference_df (DataFrame): The reference dataframe (usually training data).
-            current_df (DataFrame): The current dataframe (usually test data).
+            current_df (DataFrame): The new batch.
+            reference_profile_file_path (str): Profile saved by a training run's data validation.
+            drift_report_file_path (str): Where to write the drift report of the batch.
 
         Returns:
             bool: True if dataset drift is detected, False otherwise.
@@ -137,34 +191,113 @@ class DataValidation:
             USvisaException: If any error occurs during drift detection.
         """
         try:
-            # Create a data drift profile using Evidently
-            data_drift_profile = Profile(sections=[DataDriftProfileSection()])
-            data_drift_profile.calculate(reference_data=reference_df, current_data=current_df)
+            metrics = calculate_data_drift_from_profile(reference_profile=read_yaml_file(reference_profile_file_path),
+                                                        current_df=current_df,
+                                                        threshold=self.data_validation_config.drift_threshold,
+                                                        drift_share=self.data_validation_config.drift_share)
+            write_yaml_file(file_path=drift_report_file_path, content={"data_drift": {"data": {"metrics": metrics}}})
+            logging.info(f"{metrics['n_drifted_features']} / {metrics['n_features']} drift detected against profile !!")
+            return metrics["dataset_drift"]
+        except Exception as e:
+            raise USvisaException(e, sys)
 
-            # Convert the drift profile to JSON format
-            report = data_drift_profile.json()
-            json_report = json.loads(report)
+    def try_detect_baseline_drift(self, current_df: DataFrame) -> tuple:
+        """
+        Checks the training data against the baseline profile, the reference profile of the last
+        training data that passed validation without drifting from it, without loading that data. Errors are returned instead
+        of raised, since they only matter if the column checks pass.
 
-            # Write the drift report to a YAML file
-            write_yaml_file(file_path=self.data_validation_config.drift_report_file_path, content=json_report)
+        Args:
+            current_df (DataFrame): The training dataframe of this run.
 
-            # Extract drift metrics from the report
-            n_features = json_report["data_drift"]["data"]["metrics"]["n_features"]
-            n_drifted_features = json_report["data_drift"]["data"]["metrics"]["n_drifted_features"]
+        Returns:
+            tuple: The drift status (None when there is no baseline yet) and the error raised by drift detection (or None).
+        """
+        try:
+            if not os.path.exists(self.data_validation_config.baseline_profile_file_path):
+                logging.info("No baseline profile yet, skipping the drift check against it")
+                return None, None
+            return self.detect_dataset_drift_from_profile(
+                current_df=current_df,
+                reference_profile_file_path=self.data_validation_config.baseline_profile_file_path,
+                drift_report_file_path=self.data_validation_config.baseline_drift_report_file_path), None
+        except Exception as e:
+            return None, e
 
-            logging.info(f"{n_drifted_features} / {n_features} drift detected !!")
+    def update_baseline_profile(self, reference_profile_file_path: str):
+        """
+        Makes the reference profile of this run the baseline of the next one. The file is copied
+        next to the baseline and renamed over it, so a crash never leaves a partial baseline.
 
-            # Return drift status (True/False)
-            drift_status = json_report["data_drift"]["data"]["metrics"]["dataset_drift"]
+        Args:
+            reference_profile_file_path (str): The reference profile saved by this run.
 
-            return drift_status
+        Raises:
+            USvisaException: If the baseline cannot be replaced.
+        """
+        try:
+            baseline_profile_file_path = self.data_validation_config.baseline_profile_file_path
+            os.makedirs(os.path.dirname(baseline_profile_file_path), exist_ok=True)
+            shutil.copyfile(reference_profile_file_path, baseline_profile_file_path + ".tmp")
+            os.replace(baseline_profile_file_path + ".tmp", baseline_profile_file_path)
+            logging.info(f"Baseline profile updated from {reference_profile_file_path}")
         except Exception as e:
             raise USvisaException(e, sys)
 
+    def get_column_errors(self, report: dict, name: str) -> tuple:
+        """
+        Turns the schema validation report of one dataset into error messages.
+
+        Args:
+            report (dict): The report returned by `read_and_validate_data`.
+            name (str): Name of the dataframe used in the messages (e.g. "training").
+
+        Returns:
+            tuple: The error message of the column count check, of the column existence check and
+            of the type, domain, null rate and range checks, each an empty string if the check passed.
+        """
+        status = report["n_columns"] == len(self._schema_config["columns"])
+        logging.info(f"All required columns present in {name} dataframe: {status}")
+        count_error = "" if status else f"Columns are missing in {name} dataframe."
+        if report["missing_columns"]:
+            logging.info(f"Missing columns in {name} dataframe: {report['missing_columns']}")
+        exist_error = "" if not report["missing_columns"] else f"Columns are missing in {name} dataframe."
+        invalid_columns = [column for column, entry in report["columns"].items()
+                           if entry["present"] and entry["errors"]]
+        for column in invalid_columns:
+            logging.info(f"Column {column} of {name} dataframe failed checks: {report['columns'][column]['errors']}")
+        value_error = f"Invalid values in columns {invalid_columns} of {name} dataframe." if invalid_columns else ""
+        return count_error, exist_error, value_error
+
+    def try_detect_dataset_drift(self, reference_df: DataFrame, current_df: DataFrame):
+        """
+        Runs drift detection before the column check results are evaluated. Errors are returned instead
+        of raised, since they only matter if the column checks pass.
+
+        Args:
+            reference_df (DataFrame): The reference dataframe (usually training data).
+            current_df (DataFrame): The current dataframe (usually test data).
+
+        Returns:
+            tuple: The drift status (or None) and the error raised by drift detection (or None).
+        """
+        try:
+            return self.detect_dataset_drift(reference_df, current_df), None
+        except Exception as e:
+            return None, e
+
     def initialize_data_validation(self) -> DataValidationArtifact:
         """
         Performs data validation, including column checks and data drift detection.
 
+        The work runs as a small dependency graph: train and test files are read in parallel, each
+        in a single chunked pass that also runs the schema checks, and drift detection and the
+        reference profile start once the data is loaded. The training data is also compared with the
+        baseline profile, the reference profile of the last run that passed validation without drifting
+        from it, which this run's profile then replaces (also after drift with `advance_baseline_on_drift`).
+        The drift results are only used if the checks pass. The per-column
+        schema report is written to `schema_report_file_path` and the timing trace to `trace_file_path`.
+
         Returns:
             DataValidationArtifact: The result of the validation process, including status and message.
 
@@ -172,42 +305,59 @@ class DataValidation:
             USvisaException: If any error occurs during data validation initialization.
         """
         try:
-            validation_error_msg = ""
             logging.info("Starting data validation")
 
-            # Read train and test data
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.train_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path))
-
-            # Validate number of columns in train and test datasets
-            status = self.validate_number_of_columns(dataframe=train_df)
-            logging.info(f"All required columns present in training dataframe: {status}")
-            if not status:
-                validation_error_msg += f"Columns are missing in training dataframe."
-
-            status = self.validate_number_of_columns(dataframe=test_df)
-            logging.info(f"All required columns present in testing dataframe: {status}")
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe."
-
-            # Check if all required columns exist in train and test datasets
-            status = self.is_column_exist(df=train_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in training dataframe."
-
-            status = self.is_column_exist(df=test_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe."
-
-            # If no validation errors, perform drift detection
+            dag = DAGExecutor(name="data_validation", max_workers=self.data_validation_config.max_workers)
+            # Read train and test data once, validating them against the schema chunk by chunk
+            dag.add_node("train", lambda: self.read_and_validate_data(self.data_ingestion_artifact.train_file_path))
+            dag.add_node("test", lambda: self.read_and_validate_data(self.data_ingestion_artifact.test_file_path))
+            # Profile the training data for drift checks on later batches
+            dag.add_node("reference_profile", lambda train: self.save_reference_profile(train[0]),
+                         depends_on=("train",))
+            # Drift detection runs whatever the check results, which are only evaluated afterwards
+            dag.add_node("drift", lambda train, test: self.try_detect_dataset_drift(train[0], test[0]),
+                         depends_on=("train", "test"))
+            # Compare the training data with the baseline profile of the previous valid run
+            dag.add_node("baseline_drift", lambda train: self.try_detect_baseline_drift(train[0]),
+                         depends_on=("train",))
+            results = dag.run()
+            dag.write_trace(file_path=self.data_validation_config.trace_file_path)
+            train_report, test_report = results["train"][1], results["test"][1]
+
+            write_yaml_file(file_path=self.data_validation_config.schema_report_file_path,
+                            content={"train": train_report, "test": test_report},
+                            replace=True)
+
+            # Same message order as the checks ran sequentially: column counts, existence, then values
+            train_errors = self.get_column_errors(train_report, "training")
+            test_errors = self.get_column_errors(test_report, "test")
+            validation_error_msg = "".join(train_error + test_error
+                                           for train_error, test_error in zip(train_errors, test_errors))
+
+            # If no validation errors, use the drift results
             validation_status = len(validation_error_msg) == 0
+            baseline_drift_status = None
             if validation_status:
-                drift_status = self.detect_dataset_drift(train_df, test_df)
+                drift_status, drift_error = results["drift"]
+                if drift_error is not None:
+                    raise drift_error
+                baseline_drift_status, baseline_drift_error = results["baseline_drift"]
+                if baseline_drift_error is not None:
+                    raise baseline_drift_error
                 if drift_status:
                     logging.info(f"Drift detected.")
                     validation_error_msg = "Drift detected"
                 else:
                     validation_error_msg = "Drift not detected"
+                if baseline_drift_status is not None:
+                    validation_error_msg += (". Drift detected against the baseline profile" if baseline_drift_status
+                                             else ". Drift not detected against the baseline profile")
+                # A drifted run keeps the baseline, so slow drift accumulates against it instead of being
+                # measured one run at a time
+                if not baseline_drift_status or self.data_validation_config.advance_baseline_on_drift:
+                    self.update_baseline_profile(results["reference_profile"])
+                else:
+                    logging.info("Drift detected against the baseline profile, keeping the baseline.")
             else:
                 logging.info(f"Validation_error: {validation_error_msg}")
 
@@ -215,7 +365,10 @@ class DataValidation:
             data_validation_artifact = DataValidationArtifact(
                 validation_status=validation_status,
                 message=validation_error_msg,
-                drift_report_file_path=self.data_validation_config.drift_report_file_path
+                drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                reference_profile_file_path=results["reference_profile"],
+                schema_report_file_path=self.data_validation_config.schema_report_file_path,
+                baseline_drift_status=baseline_drift_status
             )
 
             logging.info(f"Data validation artifact: {data_validation_artifact}")
@@ -0,0 +1,188 @@
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+
+from us_visa.constants import (MODEL_PUSHER_MAX_CONCURRENCY, MODEL_PUSHER_MULTIPART_CHUNKSIZE,
+                               MODEL_PUSHER_MULTIPART_THRESHOLD, TARGET_COLUMN)
+from us_visa.data_access.model_storage import get_model_storage
+from us_visa.entity.artifact_entity import DataIngestionArtifact, ModelEvaluationArtifact, ModelTrainerArtifact
+from us_visa.entity.config_entity import ModelEvaluationConfig
+from us_visa.entity.estimator import TargetValueMapping
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.evaluation_utils import bootstrap_score_difference, get_outcome_cells, scores_from_cell_counts
+from us_visa.utils.main_utils import compute_file_hash, load_object, read_typed_dataframe, write_yaml_file
+
+
+class ModelEvaluation:
+    """
+    Decides whether the trained model replaces the production model, by scoring both on the test split.
+
+    The production model is the one described by the manifest the `ModelPusher` keeps in the model
+    storage. Its test set predictions are cached by model version and test data hash, so the
+    production model is only downloaded and run when either changed. F1, precision and recall of
+    both models and a bootstrap confidence interval of the F1 gain are computed from the joint
+    outcome counts of the test rows, thousands of resamples taking milliseconds (see
+    `us_visa.utils.evaluation_utils`).
+
+    Attributes:
+        model_eval_config (ModelEvaluationConfig): Acceptance thresholds, bootstrap and cache settings.
+        data_ingestion_artifact (DataIngestionArtifact): Path to the test split.
+        model_trainer_artifact (ModelTrainerArtifact): Path to the trained model.
+    """
+
+    def __init__(self, model_eval_config: ModelEvaluationConfig, data_ingestion_artifact: DataIngestionArtifact,
+                 model_trainer_artifact: ModelTrainerArtifact):
+        """
+        Args:
+            model_eval_config (ModelEvaluationConfig): Configuration for model evaluation.
+            data_ingestion_artifact (DataIngestionArtifact): Output reference of the data ingestion stage.
+            model_trainer_artifact (ModelTrainerArtifact): Output reference of the model trainer stage.
+        """
+        self.model_eval_config = model_eval_config
+        self.data_ingestion_artifact = data_ingestion_artifact
+        self.model_trainer_artifact = model_trainer_artifact
+
+    def get_model_storage(self):
+        """Returns the storage holding the production model."""
+        return get_model_storage(storage_backend=self.model_eval_config.storage_backend,
+                                 bucket_name=self.model_eval_config.bucket_name,
+                                 local_storage_dir=self.model_eval_config.local_storage_dir,
+                                 multipart_threshold=MODEL_PUSHER_MULTIPART_THRESHOLD,
+                                 multipart_chunksize=MODEL_PUSHER_MULTIPART_CHUNKSIZE,
+                                 max_concurrency=MODEL_PUSHER_MAX_CONCURRENCY)
+
+    def get_production_manifest(self, model_storage) -> Optional[dict]:
+        """
+        Returns the manifest of the production model.
+
+        Returns:
+            Optional[dict]: The manifest, or None if no model was pushed yet.
+        """
+        try:
+            return model_storage.read_json(
+                f"{self.model_eval_config.s3_model_key_path}/{self.model_eval_config.manifest_file_name}")
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def get_production_predictions(self, model_storage, manifest: dict, test_df, test_data_hash: str) -> np.ndarray:
+        """
+        Returns the production model's predictions on the test split, from the cache when the same
+        model version already scored the same test data.
+
+        Args:
+            model_storage: Storage holding the production model.
+            manifest (dict): Manifest of the production model.
+            test_df (DataFrame): The test split.
+            test_data_hash (str): SHA-256 of the test split file.
+
+        Returns:
+            np.ndarray: Predicted target codes.
+
+        Raises:
+            USvisaException: If the model cannot be downloaded, verified or run.
+        """
+        try:
+            model_version = manifest["model_version"]
+            cache_file_path = os.path.join(self.model_eval_config.cache_dir, "predictions",
+                                           f"{model_version}_{test_data_hash[:16]}.npy")
+            if os.path.exists(cache_file_path):
+                logging.info(f"Using cached predictions of production model {model_version}: {cache_file_path}")
+                return np.load(cache_file_path)
+
+            model_entry = manifest["files"]["model"]
+            model_file_path = os.path.join(self.model_eval_config.cache_dir, "models", model_version,
+                                           os.path.basename(model_entry["key"]))
+            if not os.path.exists(model_file_path) or compute_file_hash(model_file_path) != model_entry["sha256"]:
+                logging.info(f"Downloading production model {model_version} from {model_storage.get_uri(model_entry['key'])}")
+                model_storage.download_file(model_entry["key"], model_file_path)
+                if compute_file_hash(model_file_path) != model_entry["sha256"]:
+                    raise Exception(f"Checksum of {model_file_path} does not match the manifest")
+
+            predictions = np.asarray(load_object(file_path=model_file_path).predict(test_df)).astype(np.int8)
+            os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+            np.save(cache_file_path, predictions)
+            return predictions
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def evaluate_model(self) -> dict:
+        """
+        Scores the trained and production models on the test split and bootstraps the F1 gain.
+
+        Returns:
+            dict: Scores of both models, the bootstrap interval of the gain and the decision.
+
+        Raises:
+            USvisaException: If a model cannot be scored.
+        """
+        try:
+            config = self.model_eval_config
+            test_file_path = self.data_ingestion_artifact.test_file_path
+            test_df = read_typed_dataframe(file_path=test_file_path, report_memory=False)
+            y_true = test_df[TARGET_COLUMN].astype("object").map(TargetValueMapping()._asdict()).to_numpy(np.int8)
+            features = test_df.drop(columns=[TARGET_COLUMN])
+
+            trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
+            trained_predictions = np.asarray(trained_model.predict(features)).astype(np.int8)
+
+            model_storage = self.get_model_storage()
+            manifest = self.get_production_manifest(model_storage)
+            if manifest is None:
+                logging.info("No production model found, accepting the trained model")
+                # Only the first model's scores are used
+                cells = get_outcome_cells(y_true, trained_predictions, trained_predictions)
+                scores = scores_from_cell_counts(np.bincount(cells, minlength=8))
+                return {"trained_model": scores["a"], "production_model": None, "production_model_path": None,
+                        "changed_accuracy": scores["a"]["f1_score"], "bootstrap": None, "is_model_accepted": True}
+
+            production_predictions = self.get_production_predictions(model_storage, manifest, features,
+                                                                     compute_file_hash(test_file_path))
+            cells = get_outcome_cells(y_true, trained_predictions, production_predictions)
+            scores = scores_from_cell_counts(np.bincount(cells, minlength=8))
+            bootstrap = bootstrap_score_difference(cells, n_bootstrap=config.n_bootstrap,
+                                                   confidence_level=config.confidence_level, n_jobs=config.n_jobs)
+
+            changed_accuracy = bootstrap["difference"]
+            is_model_accepted = changed_accuracy >= config.changed_threshold_score
+            if config.require_significance:
+                is_model_accepted = is_model_accepted and bootstrap["ci_lower"] > 0
+            logging.info(f"Trained F1 {scores['a']['f1_score']:.4f} vs production {manifest['model_version']} "
+                         f"F1 {scores['b']['f1_score']:.4f}: gain {changed_accuracy:.4f}, "
+                         f"{config.confidence_level:.0%} CI [{bootstrap['ci_lower']:.4f}, {bootstrap['ci_upper']:.4f}]")
+            return {"trained_model": scores["a"], "production_model": dict(scores["b"], **{
+                        "model_version": manifest["model_version"]}),
+                    "production_model_path": manifest["files"]["model"]["key"],
+                    "changed_accuracy": changed_accuracy, "bootstrap": bootstrap,
+                    "is_model_accepted": bool(is_model_accepted)}
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
+        """
+        Evaluates the trained model against production and writes the evaluation report.
+
+        Returns:
+            ModelEvaluationArtifact: The decision, F1 gain and report path.
+
+        Raises:
+            USvisaException: If the evaluation fails.
+        """
+        logging.info("Entered initiate_model_evaluation method of ModelEvaluation class")
+        try:
+            report = self.evaluate_model()
+            write_yaml_file(file_path=self.model_eval_config.report_file_path, content=report)
+
+            model_evaluation_artifact = ModelEvaluationArtifact(
+                is_model_accepted=report["is_model_accepted"],
+                changed_accuracy=float(report["changed_accuracy"]),
+                s3_model_path=report["production_model_path"],
+                trained_model_path=self.model_trainer_artifact.trained_model_file_path,
+                report_file_path=self.model_eval_config.report_file_path,
+            )
+            logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
+            return model_evaluation_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e
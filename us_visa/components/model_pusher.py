@@ -0,0 +1,135 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+from typing import Optional
+
+from us_visa.data_access.model_storage import get_model_storage
+from us_visa.entity.artifact_entity import DataTransformationArtifact, ModelPusherArtifact, ModelTrainerArtifact
+from us_visa.entity.config_entity import ModelPusherConfig
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.main_utils import compute_file_hash
+
+
+class ModelPusher:
+    """
+    Pushes the trained model and its preprocessing object to the model storage (S3, or a local
+    directory standing in for it) and records the pushed version in a manifest.
+
+    The version is derived from the model checksum and every file is stored under
+    `<prefix>/<version>/`, so a push never overwrites the files of another version: every manifest
+    keeps pointing to the bytes it describes, and the latest manifest stays valid while the next
+    version uploads. The SHA-256 of every file is compared with the checksum stored with the remote
+    object first; files whose bytes are already stored under their key are not uploaded again.
+    Others are uploaded with parallel multipart transfers. The manifest lists the version, the
+    key, checksum and size of every file and the model's test metrics; the latest is kept at
+    `<prefix>/manifest.json` and every version under `<prefix>/manifests/`.
+
+    Attributes:
+        model_trainer_artifact (ModelTrainerArtifact): Path to the trained model and its metrics.
+        data_transformation_artifact (DataTransformationArtifact): Path to the preprocessing object.
+        model_pusher_config (ModelPusherConfig): Storage backend, bucket and transfer settings.
+    """
+
+    def __init__(self, model_trainer_artifact: ModelTrainerArtifact,
+                 data_transformation_artifact: DataTransformationArtifact,
+                 model_pusher_config: ModelPusherConfig = ModelPusherConfig()):
+        """
+        Args:
+            model_trainer_artifact (ModelTrainerArtifact): Output reference of the model trainer stage.
+            data_transformation_artifact (DataTransformationArtifact): Output reference of the data transformation stage.
+            model_pusher_config (ModelPusherConfig): Configuration for model pushing.
+
+        Raises:
+            USvisaException: If the model storage cannot be reached.
+        """
+        try:
+            self.model_trainer_artifact = model_trainer_artifact
+            self.data_transformation_artifact = data_transformation_artifact
+            self.model_pusher_config = model_pusher_config
+            self.model_storage = get_model_storage(storage_backend=model_pusher_config.storage_backend,
+                                                   bucket_name=model_pusher_config.bucket_name,
+                                                   local_storage_dir=model_pusher_config.local_storage_dir,
+                                                   multipart_threshold=model_pusher_config.multipart_threshold,
+                                                   multipart_chunksize=model_pusher_config.multipart_chunksize,
+                                                   max_concurrency=model_pusher_config.max_concurrency)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def push_file(self, file_path: str, key: str, checksum: Optional[str] = None) -> dict:
+        """
+        Uploads a file unless the storage already holds the same bytes under `key`.
+
+        Args:
+            file_path (str): The local file.
+            key (str): The object key.
+            checksum (Optional[str]): SHA-256 of the file, if already computed.
+
+        Returns:
+            dict: The key, checksum and size of the file, and whether it was uploaded.
+        """
+        checksum = checksum or compute_file_hash(file_path)
+        uploaded = self.model_storage.get_checksum(key) != checksum
+        if uploaded:
+            logging.info(f"Uploading {file_path} to {self.model_storage.get_uri(key)}")
+            self.model_storage.upload_file(file_path, key, checksum)
+        else:
+            logging.info(f"{self.model_storage.get_uri(key)} already holds {file_path} (sha256 {checksum[:12]}), "
+                         "skipping the upload")
+        return {"key": key, "sha256": checksum, "size": os.path.getsize(file_path), "uploaded": uploaded}
+
+    def initiate_model_pusher(self) -> ModelPusherArtifact:
+        """
+        Pushes the model and preprocessing object and writes the manifest of the pushed version.
+
+        Returns:
+            ModelPusherArtifact: Location of the pushed model and manifest, and which files were uploaded.
+
+        Raises:
+            USvisaException: If a checksum, upload or manifest write fails.
+        """
+        logging.info("Entered initiate_model_pusher method of ModelPusher class")
+        try:
+            prefix = self.model_pusher_config.s3_model_key_path
+            files = {
+                "model": self.model_trainer_artifact.trained_model_file_path,
+                "preprocessing": self.data_transformation_artifact.transformed_object_file_path,
+            }
+            model_checksum = compute_file_hash(files["model"])
+            model_version = model_checksum[:12]
+            checksums = {"model": model_checksum}
+
+            # Files are uploaded concurrently, each upload itself split into parallel parts
+            with ThreadPoolExecutor(max_workers=len(files)) as executor:
+                futures = {name: executor.submit(self.push_file, file_path,
+                                                 f"{prefix}/{model_version}/{os.path.basename(file_path)}",
+                                                 checksums.get(name))
+                           for name, file_path in files.items()}
+                pushed = {name: future.result() for name, future in futures.items()}
+
+            manifest = {
+                "model_version": model_version,
+                "pushed_at": datetime.now().isoformat(timespec="seconds"),
+                "files": {name: {k: v for k, v in entry.items() if k != "uploaded"} for name, entry in pushed.items()},
+                "metrics": asdict(self.model_trainer_artifact.metric_artifact),
+            }
+            manifest_key = f"{prefix}/{self.model_pusher_config.manifest_file_name}"
+            self.model_storage.write_json(f"{prefix}/manifests/{model_version}.json", manifest)
+            # The latest manifest is written last, so it never points to files not yet uploaded
+            self.model_storage.write_json(manifest_key, manifest)
+
+            model_pusher_artifact = ModelPusherArtifact(
+                bucket_name=self.model_pusher_config.bucket_name if self.model_pusher_config.storage_backend == "s3"
+                else self.model_pusher_config.local_storage_dir,
+                s3_model_path=pushed["model"]["key"],
+                manifest_path=manifest_key,
+                model_version=model_version,
+                uploaded_files=[entry["key"] for entry in pushed.values() if entry["uploaded"]],
+                skipped_files=[entry["key"] for entry in pushed.values() if not entry["uploaded"]],
+            )
+            logging.info(f"Model pusher artifact: {model_pusher_artifact}")
+            return model_pusher_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e
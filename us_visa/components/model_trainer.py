@@ -0,0 +1,188 @@
+import os
+import sys
+
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+from us_visa.data_access.trial_store import TrialStore
+from us_visa.entity.artifact_entity import (ClassificationMetricArtifact, DataTransformationArtifact,
+                                            ModelTrainerArtifact)
+from us_visa.entity.config_entity import ModelTrainerConfig
+from us_visa.entity.estimator import USvisaModel
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.instrumentation import measure
+from us_visa.utils.main_utils import compute_file_hash, load_numpy_array_data, load_object, save_object
+from us_visa.utils.model_search import ParallelModelSearch, SearchResult
+from us_visa.utils.resampling import SMOTEENNResampler
+
+
+class ModelTrainer:
+    """
+    A class to select and train the model from the candidates listed in the model config.
+
+    Every candidate model and parameter grid of `model_config_file_path` is evaluated concurrently
+    on a process pool, with successive halving dropping weak configurations on subsamples. When the
+    data transformation resampled the training data, configurations are cross-validated on the
+    training data before resampling with only the training folds resampled, and the best one is
+    refitted on the resampled data, so selection is not driven by scores on synthetic rows. Scores are
+    recorded in a SQLite trial store, so unchanged configurations are not re-evaluated on unchanged
+    data and searches on new data start from the best earlier configurations. The best
+    configuration is refitted on the full training data, checked against the test data and saved
+    together with the preprocessing object.
+
+    Attributes:
+        data_transformation_artifact (DataTransformationArtifact): Paths to the transformed arrays and preprocessor.
+        model_trainer_config (ModelTrainerConfig): Configuration of the model search and output paths.
+    """
+
+    def __init__(self, data_transformation_artifact: DataTransformationArtifact,
+                 model_trainer_config: ModelTrainerConfig):
+        """
+        Args:
+            data_transformation_artifact (DataTransformationArtifact): Output reference of the data transformation stage.
+            model_trainer_config (ModelTrainerConfig): Configuration for model training.
+        """
+        self.data_transformation_artifact = data_transformation_artifact
+        self.model_trainer_config = model_trainer_config
+
+    @staticmethod
+    def split_features_target(array):
+        """
+        Splits a transformed array into features and target, the target being the last column.
+
+        Args:
+            array: Dense array or sparse matrix written by the data transformation stage.
+
+        Returns:
+            tuple: The features and the target as a 1-d NumPy array.
+        """
+        target = array[:, -1]
+        if hasattr(target, "toarray"):
+            target = target.toarray()
+        return array[:, :-1], target.ravel()
+
+    def get_trial_store(self):
+        """
+        Opens the trial store shared by all runs.
+
+        Returns:
+            Optional[TrialStore]: The store, or None if `use_trial_store` is disabled.
+        """
+        if not self.model_trainer_config.use_trial_store:
+            return None
+        return TrialStore(db_file_path=self.model_trainer_config.trial_store_file_path)
+
+    @staticmethod
+    def get_fold_resampler() -> SMOTEENNResampler:
+        """
+        Returns the resampler of `DataTransformation.resample`, applied to the training folds of the
+        search. Single threaded, as every search worker already runs on its own core.
+        """
+        return SMOTEENNResampler(sampling_strategy="minority", n_jobs=1, random_state=42)
+
+    def get_model_object_and_report(self, train, test, unresampled_train=None):
+        """
+        Searches the candidate models on the training data and scores the best one on the test data.
+
+        Args:
+            train: Transformed training array, target as last column.
+            test: Transformed testing array, target as last column.
+            unresampled_train: Transformed training array before resampling, if `train` was resampled.
+                The search cross-validates on it and refits the best configuration on `train`.
+
+        Returns:
+            tuple: The `SearchResult` of the search, the test set `ClassificationMetricArtifact` and the test accuracy.
+
+        Raises:
+            USvisaException: If the search fails.
+        """
+        try:
+            logging.info("Searching the best model from the model config")
+            x_train, y_train = ModelTrainer.split_features_target(train)
+            x_test, y_test = ModelTrainer.split_features_target(test)
+            search_train_file_path = self.data_transformation_artifact.transformed_train_file_path
+            resampler = None
+            if unresampled_train is not None:
+                x_search, y_search = ModelTrainer.split_features_target(unresampled_train)
+                search_train_file_path = self.data_transformation_artifact.transformed_unresampled_train_file_path
+                resampler = ModelTrainer.get_fold_resampler()
+            else:
+                x_search, y_search = x_train, y_train
+
+            model_search = ParallelModelSearch(model_config_path=self.model_trainer_config.model_config_file_path,
+                                               n_jobs=self.model_trainer_config.n_jobs,
+                                               successive_halving=self.model_trainer_config.successive_halving,
+                                               halving_factor=self.model_trainer_config.halving_factor,
+                                               min_resources=self.model_trainer_config.min_resources,
+                                               trial_store=self.get_trial_store(),
+                                               warm_start_top_k=self.model_trainer_config.warm_start_top_k,
+                                               shared_data_dir=self.model_trainer_config.shared_data_dir,
+                                               resampler=resampler)
+            # Trials are keyed by the transformed training data and the preprocessor that produced it
+            with measure("model_trainer.search", rows=x_search.shape[0]):
+                search_result: SearchResult = model_search.fit(
+                    x_search, y_search,
+                    data_hash=compute_file_hash(search_train_file_path),
+                    preprocessing_hash=compute_file_hash(self.data_transformation_artifact.transformed_object_file_path),
+                    refit_features=x_train, refit_target=y_train)
+
+            y_pred = search_result.best_model.predict(x_test)
+            accuracy = accuracy_score(y_test, y_pred)
+            metric_artifact = ClassificationMetricArtifact(f1_score=float(f1_score(y_test, y_pred)),
+                                                           precision_score=float(precision_score(y_test, y_pred)),
+                                                           recall_score=float(recall_score(y_test, y_pred)))
+            logging.info(f"Best model test accuracy: {accuracy:.4f}, {metric_artifact}")
+            return search_result, metric_artifact, float(accuracy)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+        """
+        Runs the model search, saves the search report and the best model bundled with the preprocessor.
+
+        Returns:
+            ModelTrainerArtifact: Paths to the trained model and search report, and the test metrics.
+
+        Raises:
+            USvisaException: If no model reaches the expected accuracy or training fails.
+        """
+        logging.info("Entered initiate_model_trainer method of ModelTrainer class")
+        try:
+            # Memory mapped, so the search publishes the workers' copy straight from the file
+            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path,
+                                              mmap_mode="r")
+            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path,
+                                             mmap_mode="r")
+
+            unresampled_train_arr = None
+            if self.data_transformation_artifact.transformed_unresampled_train_file_path is not None:
+                unresampled_train_arr = load_numpy_array_data(
+                    file_path=self.data_transformation_artifact.transformed_unresampled_train_file_path, mmap_mode="r")
+
+            search_result, metric_artifact, accuracy = self.get_model_object_and_report(
+                train=train_arr, test=test_arr, unresampled_train=unresampled_train_arr)
+
+            # Table of scores and timings of every evaluated configuration and rung
+            os.makedirs(os.path.dirname(self.model_trainer_config.search_report_file_path), exist_ok=True)
+            search_result.results.sort_values(["rung", "score"], ascending=[False, False]).to_csv(
+                self.model_trainer_config.search_report_file_path, index=False)
+
+            if accuracy < self.model_trainer_config.expected_accuracy:
+                logging.info("No best model found with score more than base score")
+                raise Exception("No best model found with score more than base score")
+
+            preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            usvisa_model = USvisaModel(preprocessing_object=preprocessing_obj,
+                                       trained_model_object=search_result.best_model)
+            logging.info("Created usvisa model object with preprocessor and model")
+            save_object(self.model_trainer_config.trained_model_file_path, usvisa_model)
+
+            model_trainer_artifact = ModelTrainerArtifact(
+                trained_model_file_path=self.model_trainer_config.trained_model_file_path,
+                metric_artifact=metric_artifact,
+                search_report_file_path=self.model_trainer_config.search_report_file_path,
+            )
+            logging.info(f"Model trainer artifact: {model_trainer_artifact}")
+            return model_trainer_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e
@@ -0,0 +1,48 @@
+import sys
+
+import boto3
+
+from us_visa.constants import AWS_ACCESS_KEY_ID_ENV_KEY, AWS_SECRET_ACCESS_KEY_ENV_KEY, REGION_NAME, S3_ENDPOINT_URL
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+
+
+class S3Client:
+    """
+    An S3 client class sharing one boto3 client per process.
+
+    Credentials are read from the AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY environment variables
+    when set, otherwise from boto3's default chain (profile, instance role, ...). `S3_ENDPOINT_URL`
+    points the client to an S3 compatible stand-in such as a moto server or MinIO.
+
+    Attributes:
+        s3_client: A shared boto3 S3 client, safe to use from several threads.
+
+    Example:
+        s3_client = S3Client().s3_client
+        s3_client.head_object(Bucket=bucket_name, Key=key)
+    """
+
+    s3_client = None
+
+    def __init__(self, region_name: str = REGION_NAME):
+        """
+        Args:
+            region_name (str): AWS region of the bucket.
+
+        Raises:
+            USvisaException: If the client cannot be created.
+        """
+        try:
+            if S3Client.s3_client is None:
+                credentials = {}
+                if AWS_ACCESS_KEY_ID_ENV_KEY and AWS_SECRET_ACCESS_KEY_ENV_KEY:
+                    credentials = {"aws_access_key_id": AWS_ACCESS_KEY_ID_ENV_KEY,
+                                   "aws_secret_access_key": AWS_SECRET_ACCESS_KEY_ENV_KEY}
+                S3Client.s3_client = boto3.client("s3", region_name=region_name, endpoint_url=S3_ENDPOINT_URL,
+                                                  **credentials)
+                logging.info(f"S3 client created for region {region_name}"
+                             + (f" at {S3_ENDPOINT_URL}" if S3_ENDPOINT_URL else ""))
+            self.s3_client = S3Client.s3_client
+        except Exception as e:
+            raise USvisaException(e, sys) from e
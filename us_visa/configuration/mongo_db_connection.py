@@ -1,14 +1,10 @@
 import logging
 import os
-import pymongo
 import sys
-import certifi
 
 from us_visa.constants import DATABASE_NAME, MONGODB_URL_KEY
 from us_visa.exception import USvisaException
 
-ca = certifi.where()
-
 
 class MongoDBClient:
     """
@@ -56,8 +52,12 @@ class MongoDBClient:
                 if mongo_db_url is None:
                     raise Exception(f"Environment key: {MONGODB_URL_KEY} is not set in the environment variables")
 
+                # pymongo and certifi are imported with the first connection, not with this module
+                import certifi
+                import pymongo
+
                 # Initialize the MongoDB client with TLS CA file for secure connection
-                MongoDBClient.client = pymongo.MongoClient(host=mongo_db_url, tlsCAFile=ca)
+                MongoDBClient.client = pymongo.MongoClient(host=mongo_db_url, tlsCAFile=certifi.where())
 
             # Assign the shared client instance and connect to the database
             self.client = MongoDBClient.client
@@ -1,27 +1,75 @@
 from datetime import date
-from dotenv import load_dotenv
 import os
 
-# Load environment variables from the .env file
-load_dotenv()
+# Constants read from the environment are resolved on first use by `__getattr__`, after loading the
+# .env file, so importing the constants neither imports python-dotenv nor reads .env.
+# name -> (environment variable, default)
+_ENV_CONSTANTS = {}
+# name -> function computing the value from other constants
+_DERIVED_CONSTANTS = {}
+_environment_loaded = False
+
+
+def _env(name: str, variable: str, default=None):
+    _ENV_CONSTANTS[name] = (variable, default)
+
+
+def _load_environment():
+    """Loads the environment variables of the .env file, once."""
+    global _environment_loaded
+    if not _environment_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _environment_loaded = True
+
+
+def __getattr__(name: str):
+    if name in _ENV_CONSTANTS:
+        _load_environment()
+        variable, default = _ENV_CONSTANTS[name]
+        value = os.getenv(variable, default)
+    elif name in _DERIVED_CONSTANTS:
+        value = _DERIVED_CONSTANTS[name]()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Later lookups find the value without calling __getattr__
+    globals()[name] = value
+    return value
+
+
 # Connection URL for the DB
 
-DATABASE_NAME = os.getenv("DATABASE_NAME")
+_env("DATABASE_NAME", "DATABASE_NAME")
 
-COLLECTION_NAME=os.getenv("COLLECTION_NAME")
+_env("COLLECTION_NAME", "COLLECTION_NAME")
 
 # Get the MongoDB URI from the environment variable
-MONGODB_URL_KEY=os.getenv("CONNECTION_URL") # connection string
+_env("MONGODB_URL_KEY", "CONNECTION_URL") # connection string
+
+# AWS credentials, optional: boto3's default credential chain is used when they are not set
+_env("AWS_ACCESS_KEY_ID_ENV_KEY", "AWS_ACCESS_KEY_ID")
+_env("AWS_SECRET_ACCESS_KEY_ENV_KEY", "AWS_SECRET_ACCESS_KEY")
+_env("REGION_NAME", "AWS_DEFAULT_REGION", "us-east-1")
+_env("S3_ENDPOINT_URL", "S3_ENDPOINT_URL") # S3 compatible stand-in (moto server, MinIO), None for AWS
 
 
 PIPELINE_NAME= "usvisa"
 ARTIFACT_DIR= "artifact"
+STAGE_CACHE_DIR_NAME= "stage_cache" # content-hashed stage artifacts shared by all runs, under ARTIFACT_DIR
+PIPELINE_TRACE_FILE_NAME= "pipeline_trace.yaml" # stage timings and critical path of a run
+PIPELINE_METRICS_FILE_NAME= "metrics.json" # wall/CPU time, memory and row counts of every stage and sub-step
+PIPELINE_PROFILE_DIR_NAME= "profile" # cProfile output of every stage, with --profile
+PIPELINE_TRACE_MEMORY= False # also record peak Python allocations with tracemalloc (slows allocations)
+
 
+# Format of the feature store and train/test artifacts: "parquet", "feather" (Arrow IPC) or "csv"
+_env("FEATURE_STORE_FILE_FORMAT", "FEATURE_STORE_FILE_FORMAT", "parquet")
 
-TRAIN_FILE_NAME="train.csv"
-TEST_FILE_NAME="test.csv"
+_DERIVED_CONSTANTS["TRAIN_FILE_NAME"] = lambda: f"train.{__getattr__('FEATURE_STORE_FILE_FORMAT')}"
+_DERIVED_CONSTANTS["TEST_FILE_NAME"] = lambda: f"test.{__getattr__('FEATURE_STORE_FILE_FORMAT')}"
 
-FILE_NAME="usvisa.csv"
+_DERIVED_CONSTANTS["FILE_NAME"] = lambda: f"usvisa.{__getattr__('FEATURE_STORE_FILE_FORMAT')}"
 MODEL_FILE_NAME="model.pkl"
 
 
@@ -38,8 +86,106 @@ DATA_INGESTION_DIR_NAME="data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR= "feature_store"
 DATA_INGESTION_INGESTED_DIR="ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO:float=0.2 # 80% training and 20% validation
+DATA_INGESTION_RANDOM_STATE:int=42 # seed of the train/test split, so every run holds out the same rows
+DATA_INGESTION_EXPORT_BATCH_SIZE:int=10000 # documents pulled from the MongoDB cursor per chunk
+DATA_INGESTION_EXPORT_PARTITIONS:int=1 # key ranges read concurrently; 1 keeps the single cursor export
+DATA_INGESTION_EXPORT_WORKERS:int=4 # threads reading partitions, sharing the MongoDB connection pool
+DATA_INGESTION_PARTITION_KEY:str="_id" # field the collection is range-partitioned on
+DATA_INGESTION_PARTITION_SAMPLES:int=100 # partition keys sampled per partition to place the range boundaries
+DATA_INGESTION_INCREMENTAL:bool=False # pull only documents newer than the persisted watermark
+DATA_INGESTION_WATERMARK_FIELD:str="_id" # monotonically increasing field (ObjectId or ingestion timestamp)
+DATA_INGESTION_INCREMENTAL_STORE_DIR:str="incremental_store" # feature store kept across runs, under ARTIFACT_DIR
+DATA_INGESTION_WATERMARK_FILE_NAME:str="watermark.yaml"
+DATA_INGESTION_APPEND_JOURNAL_FILE_NAME:str="append_journal.yaml" # state of the store before an uncommitted append
 
 # data validation related constants
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_DRIFT_REPORT_DIR: str = "drift_report"
-DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
\ No newline at end of file
+DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+DATA_VALIDATION_TRACE_FILE_NAME: str = "trace.yaml" # timing trace of the concurrent validation tasks
+DATA_VALIDATION_MAX_WORKERS: int = 4
+DATA_VALIDATION_DRIFT_BACKEND: str = "native" # "native" (built-in KS/chi-square/PSI) or "evidently"
+DATA_VALIDATION_DRIFT_THRESHOLD: float = 0.05 # p-value under which a feature is considered drifted
+DATA_VALIDATION_DRIFT_SHARE: float = 0.5 # share of drifted features from which the dataset drifts
+DATA_VALIDATION_DRIFT_SAMPLE_SIZE: int = 200000 # larger frames are sampled down to this many rows
+DATA_VALIDATION_REFERENCE_PROFILE_FILE_NAME: str = "reference_profile.yaml" # training data sketch for later drift checks
+DATA_VALIDATION_REFERENCE_PROFILE_BINS: int = 100 # quantile bins per numerical column in the reference profile
+DATA_VALIDATION_BASELINE_DIR: str = "drift_baseline" # reference profile of the last valid, undrifted training data, kept across runs
+DATA_VALIDATION_BASELINE_DRIFT_REPORT_FILE_NAME: str = "baseline_report.yaml" # drift of the training data against the baseline
+DATA_VALIDATION_ADVANCE_BASELINE_ON_DRIFT: bool = False # replace the baseline even when the run drifted from it
+DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME: str = "schema_report.yaml" # per-column schema check results
+DATA_VALIDATION_CHUNK_SIZE: int = 100000 # rows per chunk read by the schema validator
+
+# Data Transformation related constants start with DATA_TRANSFORMATION VAR NAME
+DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
+DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
+DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"
+DATA_TRANSFORMATION_TRANSFORMED_TRAIN_FILE_NAME: str = "train.npy" # float32 array (or CSR matrix), target as last column
+DATA_TRANSFORMATION_TRANSFORMED_TEST_FILE_NAME: str = "test.npy"
+DATA_TRANSFORMATION_UNRESAMPLED_TRAIN_FILE_NAME: str = "train_unresampled.npy" # training array before SMOTEENN, cross-validated by the model search
+DATA_TRANSFORMATION_SPARSE_THRESHOLD: float = 0.3 # feature matrices denser than this are stored dense
+DATA_TRANSFORMATION_RESAMPLE: bool = True # balance case_status in the training data with SMOTEENN
+DATA_TRANSFORMATION_RESAMPLER_N_JOBS: int = -1 # threads running the SMOTEENN neighbour queries
+DATA_TRANSFORMATION_RESAMPLER_CHUNK_SIZE: int = 50000 # query rows per task, bounds the neighbour table memory
+
+# MODEL TRAINER related constant start with MODEL_TRAINER var name
+MODEL_TRAINER_DIR_NAME: str = "model_trainer"
+MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
+MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
+MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
+MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model", "yaml")
+MODEL_TRAINER_SEARCH_REPORT_FILE_NAME: str = "search_report.csv" # score and timings of every evaluated configuration
+MODEL_TRAINER_N_JOBS: int = -1 # worker processes of the model search, -1 uses all cores
+MODEL_TRAINER_SUCCESSIVE_HALVING: bool = True # drop weak configurations on subsamples first
+MODEL_TRAINER_HALVING_FACTOR: int = 3 # each rung keeps 1/factor of the configurations on factor x more rows
+MODEL_TRAINER_MIN_RESOURCES: int = 1000 # rows used by the first rung
+MODEL_TRAINER_TRIAL_STORE_FILE_NAME: str = "trial_store.sqlite" # scored configurations shared by all runs, under ARTIFACT_DIR
+MODEL_TRAINER_USE_TRIAL_STORE: bool = True # reuse configurations already scored on the same data
+MODEL_TRAINER_WARM_START_TOP_K: int = 10 # earlier best configurations re-searched besides untried ones, 0 searches all
+_env("MODEL_TRAINER_SHARED_DATA_DIR", "MODEL_TRAINER_SHARED_DATA_DIR") # training data shared with the search workers; default /dev/shm
+
+# MODEL EVALUATION related constant start with MODEL_EVALUATION var name
+MODEL_EVALUATION_DIR_NAME: str = "model_evaluation"
+MODEL_EVALUATION_REPORT_FILE_NAME: str = "report.yaml" # scores, bootstrap interval and decision
+MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02 # F1 gain the trained model needs over production
+MODEL_EVALUATION_REQUIRE_SIGNIFICANCE: bool = True # also require the interval of the F1 gain above zero
+MODEL_EVALUATION_N_BOOTSTRAP: int = 10000 # bootstrap resamples of the test set
+MODEL_EVALUATION_CONFIDENCE_LEVEL: float = 0.95
+MODEL_EVALUATION_N_JOBS: int = -1 # threads drawing bootstrap resamples
+MODEL_EVALUATION_CACHE_DIR_NAME: str = "model_evaluation_cache" # production models and predictions, under ARTIFACT_DIR
+
+# MODEL PUSHER related constant start with MODEL_PUSHER var name
+_env("MODEL_BUCKET_NAME", "MODEL_BUCKET_NAME", "usvisa-model2024")
+MODEL_PUSHER_S3_KEY = "model-registry" # key prefix of the pushed model, preprocessor and manifests
+_env("MODEL_PUSHER_STORAGE_BACKEND", "MODEL_STORAGE_BACKEND", "s3") # "s3" or "local"
+_env("MODEL_PUSHER_LOCAL_STORAGE_DIR", "MODEL_STORAGE_DIR", "model_storage") # bucket stand-in of the "local" backend
+MODEL_PUSHER_MULTIPART_THRESHOLD: int = 64 * 1024 * 1024 # larger files are uploaded in parts
+MODEL_PUSHER_MULTIPART_CHUNKSIZE: int = 16 * 1024 * 1024 # bytes per part
+MODEL_PUSHER_MAX_CONCURRENCY: int = 10 # parts uploaded concurrently
+MODEL_PUSHER_MANIFEST_FILE_NAME: str = "manifest.json" # latest pushed version, its files and checksums
+
+# Batch prediction related constants start with PREDICTION var name
+_env("PREDICTION_MODEL_FILE_PATH", "PREDICTION_MODEL_FILE_PATH", MODEL_FILE_NAME) # USvisaModel used for scoring
+PREDICTION_CHUNK_SIZE: int = 100000 # rows read, scored and written at a time
+PREDICTION_N_JOBS: int = -1 # worker processes scoring chunks, -1 uses all cores
+PREDICTION_MAX_PENDING_CHUNKS: int = 2 # chunks queued per worker; bounds memory with the chunk size
+PREDICTION_OUTPUT_COLUMN: str = "predicted_case_status" # column holding the predicted label
+PREDICTION_DIR_NAME: str = "prediction" # state of the prediction jobs shared by all runs, under ARTIFACT_DIR
+PREDICTION_MONGO_PAGE_SIZE: int = 10000 # documents read, scored and written back per page
+PREDICTION_MONGO_WORKERS: int = 4 # threads scoring pages and writing them back concurrently
+PREDICTION_MONGO_CHECKPOINT_FILE_NAME: str = "mongo_checkpoint.yaml" # last _id of the contiguous scored pages
+
+# Serving related constants
+APP_HOST = "0.0.0.0"
+APP_PORT = 8080
+SERVING_MAX_BATCH_SIZE: int = 64 # requests scored by one vectorized predict
+SERVING_MAX_WAIT_MS: float = 5.0 # longest wait of a request for others to join its batch
+SERVING_LATENCY_WINDOW: int = 10000 # recent requests the latency percentiles are computed over
+_env("SERVING_MODEL_SOURCE", "SERVING_MODEL_SOURCE", "file") # "file" or "storage" (latest pushed version, hot-swapped)
+SERVING_MODEL_POLL_INTERVAL_SECONDS: float = 30.0 # how often the manifest is checked for a new version
+SERVING_MODEL_MAX_VERSIONS: int = 2 # loaded versions kept in memory, least recently served evicted first
+SERVING_MODEL_CACHE_DIR_NAME: str = "serving_model_cache" # downloaded versions, under ARTIFACT_DIR
+
+# Public names for `from us_visa.constants import *`. The lazily resolved ones are left out, since
+# star-importing them would read .env; import them by name where they are needed.
+__all__ = [name for name in list(globals()) if name.isupper()]
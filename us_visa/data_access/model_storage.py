@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Optional
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+
+# Object metadata key / sidecar file suffix holding the SHA-256 of the stored bytes
+CHECKSUM_METADATA_KEY = "sha256"
+
+
+class S3ModelStorage:
+    """
+    Model artifacts stored in an S3 bucket (or an S3 compatible stand-in, see `S3Client`).
+
+    Files are uploaded with boto3's managed transfer: above `multipart_threshold` bytes they are
+    split into `multipart_chunksize` parts uploaded concurrently on `max_concurrency` threads.
+    The SHA-256 of every uploaded file is stored as object metadata, so an unchanged file is
+    recognised with a HEAD request instead of being uploaded again.
+
+    Attributes:
+        bucket_name (str): The bucket holding the artifacts.
+        transfer_config (TransferConfig): Multipart settings of the uploads.
+    """
+
+    def __init__(self, bucket_name: str, multipart_threshold: int, multipart_chunksize: int, max_concurrency: int):
+        """
+        Args:
+            bucket_name (str): The bucket holding the artifacts.
+            multipart_threshold (int): Files larger than this many bytes are uploaded in parts.
+            multipart_chunksize (int): Size in bytes of each part.
+            max_concurrency (int): Parts uploaded concurrently.
+
+        Raises:
+            USvisaException: If the S3 client cannot be created.
+        """
+        try:
+            from boto3.s3.transfer import TransferConfig
+
+            from us_visa.configuration.aws_connection import S3Client
+
+            self.s3_client = S3Client().s3_client
+            self.bucket_name = bucket_name
+            self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold,
+                                                  multipart_chunksize=multipart_chunksize,
+                                                  max_concurrency=max_concurrency,
+                                                  use_threads=True)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def get_uri(self, key: str) -> str:
+        return f"s3://{self.bucket_name}/{key}"
+
+    def get_checksum(self, key: str) -> Optional[str]:
+        """
+        Returns the SHA-256 recorded for an object, or None if the object does not exist or was not
+        uploaded by `upload_file`.
+        """
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            return response.get("Metadata", {}).get(CHECKSUM_METADATA_KEY)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise USvisaException(e, sys) from e
+
+    def upload_file(self, file_path: str, key: str, checksum: str):
+        """
+        Uploads a file with a parallel multipart transfer, recording its checksum.
+
+        Args:
+            file_path (str): The local file to upload.
+            key (str): The object key.
+            checksum (str): SHA-256 of the file.
+
+        Raises:
+            USvisaException: If the upload fails.
+        """
+        try:
+            self.s3_client.upload_file(file_path, self.bucket_name, key,
+                                       ExtraArgs={"Metadata": {CHECKSUM_METADATA_KEY: checksum}},
+                                       Config=self.transfer_config)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def download_file(self, key: str, file_path: str):
+        """
+        Downloads an object with a parallel multipart transfer.
+
+        Args:
+            key (str): The object key.
+            file_path (str): The local file to write.
+
+        Raises:
+            USvisaException: If the download fails.
+        """
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            self.s3_client.download_file(self.bucket_name, key, file_path, Config=self.transfer_config)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def write_json(self, key: str, content: dict):
+        """Writes a small JSON document."""
+        try:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=json.dumps(content, indent=2).encode(),
+                                      ContentType="application/json")
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def read_json(self, key: str) -> Optional[dict]:
+        """Reads a JSON document written by `write_json`, or returns None if it does not exist."""
+        from botocore.exceptions import ClientError
+
+        try:
+            return json.loads(self.s3_client.get_object(Bucket=self.bucket_name, Key=key)["Body"].read())
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise USvisaException(e, sys) from e
+
+
+class LocalModelStorage:
+    """
+    Model artifacts stored below a local (or network mounted) directory, with the same interface
+    as `S3ModelStorage`, for development and for tests without S3.
+
+    Every file is written to a temporary file and renamed into place, so readers never see a
+    partial artifact. Checksums are kept in `<file>.sha256` sidecar files.
+
+    Attributes:
+        root_dir (str): The directory standing in for the bucket.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Args:
+            root_dir (str): The directory standing in for the bucket.
+        """
+        self.root_dir = root_dir
+
+    def get_uri(self, key: str) -> str:
+        return os.path.join(self.root_dir, key)
+
+    def _write_atomic(self, path: str, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_obj:
+                write(file_obj)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def get_checksum(self, key: str) -> Optional[str]:
+        """Returns the SHA-256 recorded for a file, or None if the file does not exist."""
+        path = self.get_uri(key)
+        if not os.path.exists(path) or not os.path.exists(f"{path}.{CHECKSUM_METADATA_KEY}"):
+            return None
+        with open(f"{path}.{CHECKSUM_METADATA_KEY}") as file_obj:
+            return file_obj.read().strip()
+
+    def upload_file(self, file_path: str, key: str, checksum: str):
+        """Copies a file into the storage directory, recording its checksum."""
+        try:
+            path = self.get_uri(key)
+            with open(file_path, "rb") as source:
+                self._write_atomic(path, lambda file_obj: shutil.copyfileobj(source, file_obj, 16 << 20))
+            self._write_atomic(f"{path}.{CHECKSUM_METADATA_KEY}", lambda file_obj: file_obj.write(checksum.encode()))
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def download_file(self, key: str, file_path: str):
+        """Copies a stored file to `file_path`."""
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            shutil.copyfile(self.get_uri(key), file_path)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def write_json(self, key: str, content: dict):
+        """Writes a small JSON document."""
+        try:
+            self._write_atomic(self.get_uri(key), lambda file_obj: file_obj.write(json.dumps(content, indent=2).encode()))
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def read_json(self, key: str) -> Optional[dict]:
+        """Reads a JSON document written by `write_json`, or returns None if it does not exist."""
+        path = self.get_uri(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as file_obj:
+            return json.load(file_obj)
+
+
+def get_model_storage(storage_backend: str, bucket_name: str, local_storage_dir: str, multipart_threshold: int,
+                      multipart_chunksize: int, max_concurrency: int):
+    """
+    Returns the model storage of the configured backend.
+
+    Args:
+        storage_backend (str): "s3" or "local".
+        bucket_name (str): Bucket of the "s3" backend.
+        local_storage_dir (str): Directory of the "local" backend.
+        multipart_threshold (int): Files larger than this many bytes are uploaded to S3 in parts.
+        multipart_chunksize (int): Size in bytes of each part.
+        max_concurrency (int): Parts transferred concurrently.
+
+    Returns:
+        S3ModelStorage or LocalModelStorage.
+    """
+    if storage_backend == "s3":
+        return S3ModelStorage(bucket_name=bucket_name, multipart_threshold=multipart_threshold,
+                              multipart_chunksize=multipart_chunksize, max_concurrency=max_concurrency)
+    if storage_backend == "local":
+        logging.info(f"Using local model storage at {local_storage_dir}")
+        return LocalModelStorage(root_dir=local_storage_dir)
+    raise ValueError(f"Unsupported model storage backend: {storage_backend}")
@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+
+# Columns identifying a trial; a configuration scored under the same values is never evaluated twice
+TRIAL_KEY_COLUMNS = ("data_hash", "preprocessing_hash", "model", "params", "n_samples", "cv", "scoring",
+                     "random_state")
+TRIAL_RESULT_COLUMNS = ("score", "score_std", "fit_time", "score_time", "wall_time")
+
+
+class TrialStore:
+    """
+    A SQLite store of scored model search configurations, shared by all training runs.
+
+    Every trial is keyed by the hash of the training data, the hash of the preprocessing object,
+    the model and its parameters and the evaluation settings (rows, folds, scoring and seed), so
+    a search over unchanged inputs reuses its earlier scores instead of recomputing them. The
+    best configurations over all earlier runs are used to warm-start searches on new data.
+
+    Attributes:
+        db_file_path (str): Path to the SQLite database file.
+    """
+
+    def __init__(self, db_file_path: str):
+        """
+        Opens the store, creating the database and its table if needed.
+
+        Args:
+            db_file_path (str): Path to the SQLite database file.
+
+        Raises:
+            USvisaException: If the database cannot be created.
+        """
+        try:
+            self.db_file_path = db_file_path
+            os.makedirs(os.path.dirname(db_file_path) or ".", exist_ok=True)
+            with self._connect() as connection:
+                connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS trials (
+                        data_hash TEXT, preprocessing_hash TEXT, model TEXT, params TEXT,
+                        n_samples INTEGER, cv INTEGER, scoring TEXT, random_state INTEGER,
+                        score REAL, score_std REAL, fit_time REAL, score_time REAL, wall_time REAL,
+                        created_at TEXT,
+                        PRIMARY KEY ({", ".join(TRIAL_KEY_COLUMNS)})
+                    )""")
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    @contextmanager
+    def _connect(self):
+        """Yields a connection that commits on success and is always closed."""
+        connection = sqlite3.connect(self.db_file_path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def params_key(params: dict) -> str:
+        """Canonical JSON of a parameter set, used as the `params` column."""
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def get_trials(self, data_hash: str, preprocessing_hash: str, n_samples: int, cv: int, scoring: str,
+                   random_state: int) -> dict:
+        """
+        Returns the trials already scored under the given data, preprocessing and evaluation settings.
+
+        Args:
+            data_hash (str): Hash of the training data.
+            preprocessing_hash (str): Hash of the preprocessing object.
+            n_samples (int): Rows the configurations were scored on.
+            cv (int): Number of cross-validation folds.
+            scoring (str): Scoring metric.
+            random_state (int): Seed of the row shuffle and folds.
+
+        Returns:
+            dict: `(model, params_key)` to the trial's result columns.
+
+        Raises:
+            USvisaException: If the store cannot be read.
+        """
+        try:
+            with self._connect() as connection:
+                rows = connection.execute(
+                    f"SELECT model, params, {', '.join(TRIAL_RESULT_COLUMNS)} FROM trials "
+                    "WHERE data_hash = ? AND preprocessing_hash = ? AND n_samples = ? AND cv = ? AND scoring = ? "
+                    "AND random_state = ?",
+                    (data_hash, preprocessing_hash, n_samples, cv, scoring, random_state)).fetchall()
+            return {(row[0], row[1]): dict(zip(TRIAL_RESULT_COLUMNS, row[2:])) for row in rows}
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def add_trials(self, data_hash: str, preprocessing_hash: str, cv: int, scoring: str, random_state: int,
+                   trials: list):
+        """
+        Records scored configurations.
+
+        Args:
+            data_hash (str): Hash of the training data.
+            preprocessing_hash (str): Hash of the preprocessing object.
+            cv (int): Number of cross-validation folds.
+            scoring (str): Scoring metric.
+            random_state (int): Seed of the row shuffle and folds.
+            trials (list): Dicts with `model`, `params`, `n_samples` and the result columns.
+
+        Raises:
+            USvisaException: If the trials cannot be written.
+        """
+        try:
+            created_at = datetime.now().isoformat(timespec="seconds")
+            rows = [(data_hash, preprocessing_hash, trial["model"], self.params_key(trial["params"]),
+                     trial["n_samples"], cv, scoring, random_state,
+                     *(trial[column] for column in TRIAL_RESULT_COLUMNS), created_at)
+                    for trial in trials]
+            placeholders = ", ".join("?" * len(rows[0])) if rows else ""
+            with self._connect() as connection:
+                connection.executemany(f"INSERT OR REPLACE INTO trials VALUES ({placeholders})", rows)
+            logging.info(f"Recorded {len(rows)} trials in {self.db_file_path}")
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def get_evaluated_configurations(self) -> set:
+        """
+        Returns every configuration scored by any earlier search.
+
+        Returns:
+            set: `(model, params_key)` pairs.
+        """
+        try:
+            with self._connect() as connection:
+                return set(connection.execute("SELECT DISTINCT model, params FROM trials").fetchall())
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def get_best_configurations(self, top_k: int) -> list:
+        """
+        Returns the most promising configurations of earlier searches: those that advanced furthest
+        through the successive halving rungs (as a share of the rows of their training data), then
+        those with the best score on the last rung they reached, averaged over all training data.
+
+        Args:
+            top_k (int): Number of configurations to return.
+
+        Returns:
+            list: `(model, params_key)` pairs, best first.
+        """
+        try:
+            with self._connect() as connection:
+                return [tuple(row[:2]) for row in connection.execute("""
+                    SELECT trial.model, trial.params,
+                           AVG(CAST(trial.n_samples AS REAL) / data.n_samples) AS depth, AVG(trial.score) AS score
+                    FROM trials AS trial
+                    JOIN (SELECT model, params, data_hash, MAX(n_samples) AS n_samples FROM trials
+                          GROUP BY model, params, data_hash) AS reached
+                      ON trial.model = reached.model AND trial.params = reached.params
+                     AND trial.data_hash = reached.data_hash AND trial.n_samples = reached.n_samples
+                    JOIN (SELECT data_hash, MAX(n_samples) AS n_samples FROM trials GROUP BY data_hash) AS data
+                      ON trial.data_hash = data.data_hash
+                    GROUP BY trial.model, trial.params
+                    ORDER BY depth DESC, score DESC
+                    LIMIT ?""", (top_k,)).fetchall()]
+        except Exception as e:
+            raise USvisaException(e, sys) from e
@@ -1,11 +1,15 @@
 import sys
 import pandas as pd
-import numpy as np
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, Optional
 
 from us_visa.configuration.mongo_db_connection import MongoDBClient
-from us_visa.constants import DATABASE_NAME
+from us_visa.constants import (DATABASE_NAME, DATA_INGESTION_EXPORT_BATCH_SIZE, DATA_INGESTION_PARTITION_SAMPLES,
+                               SCHEMA_FILE_PATH)
+from us_visa.logger import logging
 from us_visa.exception import USvisaException
+from us_visa.utils.main_utils import read_yaml_file, get_schema_column_types, cast_to_schema_type, concat_typed_chunks
 
 
 class USvisaData:
@@ -21,17 +25,96 @@ class USvisaData:
         try:
             # Initialize MongoDB client with the specified database
             self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            # Column types declared in schema.yaml, used to type the exported chunks
+            self._column_types = get_schema_column_types(read_yaml_file(file_path=SCHEMA_FILE_PATH))
         except Exception as e:
             # Raise a custom exception if the connection fails
             raise USvisaException(e, sys)
 
+    def get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        """
+        Returns a handle to a MongoDB collection.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+
+        Returns:
+            pymongo.collection.Collection: The collection handle.
+        """
+        # If no database name is provided, use the default database
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    def _to_typed_chunk(self, documents: list) -> pd.DataFrame:
+        """
+        Converts a batch of documents into a DataFrame typed according to the schema.
+
+        Args:
+            documents (list): Documents fetched from the cursor.
+
+        Returns:
+            pd.DataFrame: The typed chunk.
+        """
+        chunk = pd.DataFrame.from_records(documents)
+        for column in chunk.columns:
+            chunk[column] = cast_to_schema_type(chunk[column], self._column_types.get(column))
+        return chunk
+
+    def export_collection_in_chunks(self, collection_name: str,
+                                    database_name: Optional[str] = None,
+                                    batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                    query: Optional[dict] = None,
+                                    sort_key: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a MongoDB collection as a sequence of typed DataFrame chunks.
+
+        The `_id` field is excluded by the server and only `batch_size` documents are held
+        as Python objects at any time, so memory is bounded by the chunk size.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection to export.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+            batch_size (int): Number of documents fetched per cursor batch and per yielded chunk.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
+            sort_key (Optional[str]): Field to sort the documents by. Defaults to natural order.
+
+        Yields:
+            pd.DataFrame: Chunks of at most `batch_size` rows, typed from schema.yaml.
+
+        Raises:
+            USvisaException: If there is an error in retrieving data from the collection or during processing.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            cursor = collection.find(query or {}, {"_id": 0}, batch_size=batch_size)
+            if sort_key is not None:
+                cursor = cursor.sort(sort_key, 1)
+            while True:
+                documents = list(islice(cursor, batch_size))
+                if not documents:
+                    break
+                yield self._to_typed_chunk(documents)
+        except Exception as e:
+            raise USvisaException(e, sys)
+
     def export_collection_as_dataframe(self, collection_name: str,
-                                       database_name: Optional[str] = None) -> pd.DataFrame:
+                                       database_name: Optional[str] = None,
+                                       batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                       query: Optional[dict] = None,
+                                       sort_key: Optional[str] = None) -> pd.DataFrame:
         """Exports a MongoDB collection as a pandas DataFrame.
 
+        The collection is streamed chunk by chunk and every column is appended to a typed
+        buffer, so the full result set never exists as a list of Python dictionaries.
+
         Args:
             collection_name (str): The name of the MongoDB collection to export.
             database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+            batch_size (int): Number of documents fetched per cursor batch.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
+            sort_key (Optional[str]): Field to sort the documents by. Defaults to natural order.
 
         Returns:
             pd.DataFrame: A pandas DataFrame containing the data from the MongoDB collection.
@@ -40,26 +123,257 @@ class USvisaData:
             USvisaException: If there is an error in retrieving data from the collection or during processing.
         """
         try:
-            # If no database name is provided, use the default database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            chunks = self.export_collection_in_chunks(collection_name=collection_name,
+                                                      database_name=database_name,
+                                                      batch_size=batch_size,
+                                                      query=query,
+                                                      sort_key=sort_key)
+            return concat_typed_chunks(chunks)
 
-            # Convert the MongoDB collection to a pandas DataFrame
-            df = pd.DataFrame(list(collection.find()))
-            # collection.find({}, {"_id": 0})  # This excludes '_id' at the database level
+        except Exception as e:
+            # Raise a custom exception in case of any failure during the export process
+            raise USvisaException(e, sys)
 
-            # Drop the '_id' column if it exists, as it's not required
-            if "_id" in df.columns.to_list():
-                df = df.drop(columns=['_id'], axis=1)
-                collection.find({}, {"_id": 0})  # This excludes '_id' at the database level
+    def get_max_value(self, collection_name: str, field: str,
+                      database_name: Optional[str] = None, query: Optional[dict] = None):
+        """
+        Returns the largest value of `field` in a collection, read through a sorted single document query.
 
-            # Replace 'na' strings with np.nan to handle missing values
-            df.replace({"na": np.nan}, inplace=True)
+        Args:
+            collection_name (str): The name of the MongoDB collection.
+            field (str): The field to read the maximum of (should be indexed, e.g. `_id`).
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
 
-            return df
+        Returns:
+            The maximum value of `field`, or None if no document matches.
 
+        Raises:
+            USvisaException: If there is an error in querying the collection.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            cursor = collection.find(query or {}, {field: 1}).sort(field, -1).limit(1)
+            document = next(iter(cursor), None)
+            return None if document is None else document.get(field)
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    def get_collection_fingerprint(self, collection_name: str, database_name: Optional[str] = None) -> dict:
+        """
+        Returns a cheap fingerprint of a collection's contents: its document count (from the
+        collection metadata) and its largest `_id`. Inserts and deletes change the fingerprint;
+        in-place updates of existing documents do not.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+
+        Returns:
+            dict: The fingerprint, made of plain strings and integers.
+
+        Raises:
+            USvisaException: If there is an error in querying the collection.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            return {
+                "collection": collection_name,
+                "count": collection.estimated_document_count(),
+                "max_id": str(self.get_max_value(collection_name, "_id", database_name)),
+            }
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    def get_partition_queries(self, collection_name: str, partition_key: str, n_partitions: int,
+                              database_name: Optional[str] = None,
+                              query: Optional[dict] = None,
+                              samples_per_partition: int = DATA_INGESTION_PARTITION_SAMPLES) -> list:
+        """
+        Splits a collection into contiguous ranges of `partition_key` holding roughly the same
+        number of documents.
+
+        The range boundaries are the quantiles of a `$sample` of `n_partitions * samples_per_partition`
+        partition keys, drawn with a single aggregation (without a filter, MongoDB reads it with a
+        random cursor instead of scanning the collection), so computing them costs the same however
+        large the collection is. The ranges always cover every document; only their sizes are
+        approximate.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection to split.
+            partition_key (str): Field used to range-partition the collection, e.g. `_id` or `case_id`.
+            n_partitions (int): Requested number of partitions.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
+            samples_per_partition (int): Keys sampled per partition; more samples give more even partitions.
+
+        Returns:
+            list: One query per partition, ordered by `partition_key`.
+
+        Raises:
+            USvisaException: If the partition boundaries cannot be computed.
+        """
+        try:
+            query = query or {}
+            collection = self.get_collection(collection_name, database_name)
+            n_partitions = max(1, n_partitions)
+            pipeline = ([{"$match": query}] if query else []) + [
+                {"$sample": {"size": n_partitions * samples_per_partition}},
+                {"$project": {partition_key: 1}},
+            ]
+            keys = sorted(document[partition_key] for document in collection.aggregate(pipeline, allowDiskUse=True)
+                          if partition_key in document)
+
+            bounds = []
+            for partition in range(1, n_partitions):
+                bound = keys[len(keys) * partition // n_partitions] if keys else None
+                if bound is not None and (not bounds or bound != bounds[-1]):
+                    bounds.append(bound)
+
+            # Half-open ranges: (-inf, b1), [b1, b2), ..., [bn, +inf)
+            lower_bounds = [None] + bounds
+            upper_bounds = bounds + [None]
+            partition_queries = []
+            for lower, upper in zip(lower_bounds, upper_bounds):
+                key_range = {}
+                if lower is not None:
+                    key_range["$gte"] = lower
+                if upper is not None:
+                    key_range["$lt"] = upper
+                partition_query = {partition_key: key_range} if key_range else {}
+                partition_queries.append({"$and": [query, partition_query]} if query else partition_query)
+            return partition_queries
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    def export_collection_partitioned(self, collection_name: str,
+                                      n_partitions: int,
+                                      max_workers: int,
+                                      partition_key: str = "_id",
+                                      database_name: Optional[str] = None,
+                                      batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                      query: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Exports a MongoDB collection by reading `partition_key` ranges concurrently.
+
+        The partitions are read on a thread pool. All threads share the connection pool of the
+        process wide `MongoDBClient.client`, and the partitions are merged in key order, so the
+        result does not depend on which thread finishes first.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection to export.
+            n_partitions (int): Number of key ranges the collection is split into.
+            max_workers (int): Number of threads reading partitions concurrently.
+            partition_key (str): Field used to range-partition the collection, e.g. `_id` or `case_id`.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+            batch_size (int): Number of documents fetched per cursor batch.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
+
+        Returns:
+            pd.DataFrame: A pandas DataFrame containing the data from the MongoDB collection.
+
+        Raises:
+            USvisaException: If there is an error while reading any of the partitions.
+        """
+        try:
+            partition_queries = self.get_partition_queries(collection_name=collection_name,
+                                                           partition_key=partition_key,
+                                                           n_partitions=n_partitions,
+                                                           database_name=database_name,
+                                                           query=query)
+            logging.info(f"Reading {len(partition_queries)} partitions of {collection_name} "
+                         f"on {max_workers} threads, partitioned by {partition_key}")
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # executor.map returns the frames in partition order regardless of completion order
+                partitions = list(executor.map(
+                    lambda partition_query: self.export_collection_as_dataframe(
+                        collection_name=collection_name,
+                        database_name=database_name,
+                        batch_size=batch_size,
+                        query=partition_query,
+                        sort_key=partition_key),
+                    partition_queries))
+
+            return concat_typed_chunks(partition for partition in partitions if len(partition.columns) > 0)
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    def iter_pages(self, collection_name: str,
+                   page_size: int,
+                   query: Optional[dict] = None,
+                   start_after=None,
+                   columns: Optional[list] = None,
+                   database_name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Pages through a collection in `_id` order with range queries on `_id` (keyset pagination),
+        so every page is an indexed lookup however deep into the collection it is, unlike `skip`.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection to read.
+            page_size (int): Number of documents per page.
+            query (Optional[dict]): Filter applied to the collection. Defaults to all documents.
+            start_after: Only documents with a larger `_id` are read. Defaults to the start of the collection.
+            columns (Optional[list]): Fields to fetch besides `_id`. Defaults to all fields.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+
+        Yields:
+            pd.DataFrame: Pages of at most `page_size` rows, typed from schema.yaml, with their `_id` column.
+
+        Raises:
+            USvisaException: If there is an error in querying the collection.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            projection = None if columns is None else {column: 1 for column in columns}
+            last_id = start_after
+            while True:
+                page_query = query or {}
+                if last_id is not None:
+                    page_query = {"$and": [page_query, {"_id": {"$gt": last_id}}]}
+                documents = list(collection.find(page_query, projection).sort("_id", 1).limit(page_size))
+                if not documents:
+                    break
+                last_id = documents[-1]["_id"]
+                yield self._to_typed_chunk(documents)
+        except Exception as e:
+            raise USvisaException(e, sys)
+
+    def bulk_set_fields(self, collection_name: str, ids, fields: dict,
+                        database_name: Optional[str] = None) -> int:
+        """
+        Sets fields of many documents in a single unordered `bulk_write`, letting the server apply
+        the updates in any order and in parallel. Documents receiving the same values are updated
+        by one `UpdateMany` on their `_id`s, so a page of predicted labels is a couple of operations
+        rather than one per document.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection to update.
+            ids: The `_id` of every document to update.
+            fields (dict): Field name to the sequence of values, one per document of `ids`.
+            database_name (Optional[str]): The name of the MongoDB database. If not provided, the default database is used.
+
+        Returns:
+            int: Number of documents modified.
+
+        Raises:
+            USvisaException: If the bulk write fails.
+        """
+        try:
+            from pymongo import UpdateMany
+
+            collection = self.get_collection(collection_name, database_name)
+            updates = pd.DataFrame({name: pd.Series(column).to_numpy() for name, column in fields.items()})
+            updates["_id"] = list(ids)
+            if updates.empty:
+                return 0
+            names = list(fields)
+            operations = []
+            for values, group in updates.groupby(names, sort=False, dropna=False):
+                # Plain Python values, NumPy scalars are not BSON encodable
+                values = pd.Series(values if isinstance(values, tuple) else (values,)).tolist()
+                operations.append(UpdateMany({"_id": {"$in": group["_id"].tolist()}},
+                                             {"$set": dict(zip(names, values))}))
+            return collection.bulk_write(operations, ordered=False).modified_count
         except Exception as e:
-            # Raise a custom exception in case of any failure during the export process
             raise USvisaException(e, sys)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class DataIngestionArtifact:
@@ -10,4 +11,66 @@ class DataIngestionArtifact:
 class DataValidationArtifact:
     validation_status:bool
     message: str
-    drift_report_file_path: str
\ No newline at end of file
+    drift_report_file_path: str
+    reference_profile_file_path: str  # Sketch of the training data for drift checks on new batches
+    schema_report_file_path: str  # Per-column results of the schema checks
+    baseline_drift_status: Optional[bool] = None  # Drift against the previous baseline profile, None without one
+
+
+@dataclass
+class DataTransformationArtifact:
+    transformed_object_file_path: str  # Path to the fitted preprocessing object
+    transformed_train_file_path: str  # Path to the transformed training array
+    transformed_test_file_path: str  # Path to the transformed testing array
+    # Training array before resampling, cross-validated by the model search; None if it was not resampled
+    transformed_unresampled_train_file_path: Optional[str] = None
+
+
+@dataclass
+class ClassificationMetricArtifact:
+    f1_score: float
+    precision_score: float
+    recall_score: float
+
+
+@dataclass
+class ModelTrainerArtifact:
+    trained_model_file_path: str  # Path to the trained model bundled with its preprocessing object
+    metric_artifact: ClassificationMetricArtifact  # Test set metrics of the trained model
+    search_report_file_path: str  # Scores and timings of every evaluated configuration
+
+
+@dataclass
+class ModelEvaluationArtifact:
+    is_model_accepted: bool  # Whether the trained model replaces the production model
+    changed_accuracy: float  # F1 gain of the trained model over the production model
+    s3_model_path: str  # Key of the production model, None if there is none yet
+    trained_model_path: str  # Path to the evaluated trained model
+    report_file_path: str  # Scores of both models and the bootstrap interval of the gain
+
+
+@dataclass
+class ModelPusherArtifact:
+    bucket_name: str  # Bucket (or local storage directory) holding the pushed model
+    s3_model_path: str  # Key of the pushed model
+    manifest_path: str  # Key of the manifest of the pushed version
+    model_version: str  # Version recorded in the manifest
+    uploaded_files: list  # Files whose bytes were uploaded
+    skipped_files: list  # Files already stored with the same checksum
+
+
+@dataclass
+class BatchPredictionArtifact:
+    output_file_path: str  # Input rows with the predicted label appended
+    n_rows: int  # Rows scored
+    elapsed_seconds: float  # Wall time of reading, scoring and writing
+    rows_per_second: float  # Scoring throughput
+
+
+@dataclass
+class MongoBatchPredictionArtifact:
+    collection_name: str  # Collection scored in place
+    n_documents: int  # Documents scored and written back by this run
+    elapsed_seconds: float  # Wall time of reading, scoring and writing back
+    documents_per_second: float  # Scoring throughput
+    checkpoint_file_path: str  # Checkpoint to resume an interrupted job from
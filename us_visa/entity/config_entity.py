@@ -1,8 +1,21 @@
 
+import os
+
+from us_visa import constants
 from us_visa.constants import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
+def _env_default(name: str, *directories: str):
+    """
+    Default of a config field from a constant read from the environment, joined below `directories`
+    if given. It is resolved when the config is created, so importing the configs does not load .env.
+    """
+    def get_default():
+        value = getattr(constants, name)
+        return os.path.join(*directories, value) if directories else value
+    return field(default_factory=get_default)
+
 # Current timestamp for unique artifact directory naming
 TIMESTAMP= datetime.now().strftime("%Y%m%d-%H%M%S")
 
@@ -14,10 +27,24 @@ class TrainingPipelineConfig:
         pipline_name (str): The name of the pipeline.
         artifact_dir (str): Directory where pipeline artifacts are stored, timestamped for uniqueness.
         timestamp (str): Current timestamp for artifact versioning.
+        use_stage_cache (bool): Reuse the artifacts of earlier runs for stages whose inputs did not change.
+        stage_cache_dir (str): Directory, shared by all runs, holding the stage cache manifests.
+        trace_file_path (str): Path to the timing trace of the run's stages.
+        metrics_file_path (str): Path to the wall time, CPU time, memory and row counts of every stage and sub-step.
+        profile (bool): Profile every stage with cProfile.
+        profile_dir (str): Directory of the per-stage profiles.
+        trace_memory (bool): Also record the peak Python allocations of every step with tracemalloc.
     """
     pipline_name:str= PIPELINE_NAME  # Name of the training pipeline
     artifact_dir:str= os.path.join(ARTIFACT_DIR, TIMESTAMP)  # Directory for saving artifacts
     timestamp:str= datetime.now().strftime("%Y%m%d-%H%M%S")  # Timestamp to differentiate artifacts
+    use_stage_cache:bool= True  # Skip stages whose cache key matches an earlier successful run
+    stage_cache_dir:str= os.path.join(ARTIFACT_DIR, STAGE_CACHE_DIR_NAME)  # Directory for stage cache manifests
+    trace_file_path:str= os.path.join(artifact_dir, PIPELINE_TRACE_FILE_NAME)  # Stage timings of the run
+    metrics_file_path:str= os.path.join(artifact_dir, PIPELINE_METRICS_FILE_NAME)  # Stage and sub-step metrics
+    profile:bool= False  # Write a cProfile of every stage
+    profile_dir:str= os.path.join(artifact_dir, PIPELINE_PROFILE_DIR_NAME)  # Directory for the stage profiles
+    trace_memory:bool= PIPELINE_TRACE_MEMORY  # Record peak Python allocations per step
 
 # Initialize the training pipeline configuration
 training_pipeline_config= TrainingPipelineConfig()
@@ -28,18 +55,51 @@ class DataIngestionConfig:
 
     Attributes:
         data_ingestion_dir (str): Directory where the data ingestion artifacts will be stored.
-        feature_store_file_path (str): Path to the feature store file within the ingestion directory.
+        feature_store_file_path (str): Path to the feature store file within the ingestion directory. The
+            extension of this and the other data paths selects the format (parquet, feather or csv).
         training_file_path (str): Path to the ingested training dataset.
         testing_file_path (str): Path to the ingested testing dataset.
         train_test_split_ratio (float): The ratio used to split the dataset into training and testing sets.
+        random_state (int): Seed of the train/test split. A fixed seed holds out the same rows in every run, so
+            the production model is never evaluated against rows it was trained on.
         collection_name (str): Name of the collection where data is stored (e.g., MongoDB collection).
+        export_batch_size (int): Number of documents read from the MongoDB cursor per chunk.
+        export_partitions (int): Number of key ranges the collection is split into for a parallel export.
+        export_workers (int): Number of threads reading the partitions concurrently.
+        partition_key (str): Field used to range-partition the collection (e.g. `_id` or `case_id`).
+        incremental (bool): If True, only documents newer than the persisted watermark are ingested and
+            appended to the incremental store instead of re-exporting the whole collection.
+        full_refresh (bool): If True, an incremental run discards the store and watermark and rebuilds them.
+        watermark_field (str): Monotonically increasing field used as the high-water mark.
+        incremental_store_dir (str): Directory, shared by all runs, holding the incremental feature store and splits.
+            With a columnar format the incremental paths below are directories of part files.
+        incremental_feature_store_file_path (str): Path to the feature store that new documents are appended to.
+        incremental_training_file_path (str): Path to the training dataset that new training rows are appended to.
+        incremental_testing_file_path (str): Path to the testing dataset that new testing rows are appended to.
+        watermark_file_path (str): Path to the file persisting the last ingested watermark.
+        append_journal_file_path (str): Path to the journal of an append not yet committed by a watermark update,
+            used to roll the append back when the run failed.
     """
     data_ingestion_dir:str= os.path.join(training_pipeline_config.artifact_dir, DATA_INGESTION_DIR_NAME)  
-    feature_store_file_path:str= os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, FILE_NAME)  
-    training_file_path:str= os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_FILE_NAME)  
-    testing_file_path:str= os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)  
+    feature_store_file_path:str= _env_default("FILE_NAME", data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR)  
+    training_file_path:str= _env_default("TRAIN_FILE_NAME", data_ingestion_dir, DATA_INGESTION_INGESTED_DIR)  
+    testing_file_path:str= _env_default("TEST_FILE_NAME", data_ingestion_dir, DATA_INGESTION_INGESTED_DIR)  
     train_test_split_ratio: float= DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO  # Ratio for train-test split
+    random_state: int= DATA_INGESTION_RANDOM_STATE  # Seed of the train-test split
     collection_name:str= DATA_INGESTION_COLLECTION_NAME  # Name of the data collection (e.g., in MongoDB)
+    export_batch_size:int= DATA_INGESTION_EXPORT_BATCH_SIZE  # Cursor batch size for the streaming export
+    export_partitions:int= DATA_INGESTION_EXPORT_PARTITIONS  # Number of key ranges read concurrently
+    export_workers:int= DATA_INGESTION_EXPORT_WORKERS  # Threads used for the partitioned export
+    partition_key:str= DATA_INGESTION_PARTITION_KEY  # Field the collection is range-partitioned on
+    incremental:bool= DATA_INGESTION_INCREMENTAL  # Ingest only documents newer than the watermark
+    full_refresh:bool= False  # Rebuild the incremental store from scratch
+    watermark_field:str= DATA_INGESTION_WATERMARK_FIELD  # Field used as the high-water mark
+    incremental_store_dir:str= os.path.join(ARTIFACT_DIR, DATA_INGESTION_INCREMENTAL_STORE_DIR)
+    incremental_feature_store_file_path:str= _env_default("FILE_NAME", incremental_store_dir, DATA_INGESTION_FEATURE_STORE_DIR)
+    incremental_training_file_path:str= _env_default("TRAIN_FILE_NAME", incremental_store_dir, DATA_INGESTION_INGESTED_DIR)
+    incremental_testing_file_path:str= _env_default("TEST_FILE_NAME", incremental_store_dir, DATA_INGESTION_INGESTED_DIR)
+    watermark_file_path:str= os.path.join(incremental_store_dir, DATA_INGESTION_WATERMARK_FILE_NAME)
+    append_journal_file_path:str= os.path.join(incremental_store_dir, DATA_INGESTION_APPEND_JOURNAL_FILE_NAME)
 
 
 @dataclass
@@ -47,4 +107,227 @@ class DataValidationConfig:
     data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_VALIDATION_DIR_NAME)
     drift_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_DRIFT_REPORT_DIR,
                                                DATA_VALIDATION_DRIFT_REPORT_FILE_NAME)
+    reference_profile_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_DRIFT_REPORT_DIR,
+                                                    DATA_VALIDATION_REFERENCE_PROFILE_FILE_NAME)
+    trace_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_TRACE_FILE_NAME)
+    schema_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME)
+    max_workers: int = DATA_VALIDATION_MAX_WORKERS  # Threads running the independent validation tasks
+    drift_backend: str = DATA_VALIDATION_DRIFT_BACKEND  # "native" or "evidently" (optional dependency)
+    drift_threshold: float = DATA_VALIDATION_DRIFT_THRESHOLD  # Per-feature p-value threshold
+    drift_share: float = DATA_VALIDATION_DRIFT_SHARE  # Share of drifted features flagging dataset drift
+    drift_sample_size: int = DATA_VALIDATION_DRIFT_SAMPLE_SIZE  # Reservoir sample size for large frames
+    reference_profile_bins: int = DATA_VALIDATION_REFERENCE_PROFILE_BINS  # Histogram bins per numerical column
+    baseline_profile_file_path: str = os.path.join(ARTIFACT_DIR, DATA_VALIDATION_BASELINE_DIR,
+                                                   DATA_VALIDATION_REFERENCE_PROFILE_FILE_NAME)
+    baseline_drift_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_DRIFT_REPORT_DIR,
+                                                        DATA_VALIDATION_BASELINE_DRIFT_REPORT_FILE_NAME)
+    advance_baseline_on_drift: bool = DATA_VALIDATION_ADVANCE_BASELINE_ON_DRIFT  # Also replace the baseline after drift
+    chunk_size: int = DATA_VALIDATION_CHUNK_SIZE  # Rows held in memory by the schema validator
+
+
+@dataclass
+class DataTransformationConfig:
+    """Configuration class for data transformation process.
+
+    Attributes:
+        data_transformation_dir (str): Directory where the data transformation artifacts will be stored.
+        transformed_train_file_path (str): Path to the transformed training array (features plus target as last column).
+        transformed_test_file_path (str): Path to the transformed testing array (features plus target as last column).
+        transformed_unresampled_train_file_path (str): Path to the transformed training array before resampling, which
+            the model search cross-validates on.
+        transformed_object_file_path (str): Path to the fitted preprocessing object.
+        sparse_threshold (float): Feature matrices whose share of non-zero values is below this are kept sparse.
+        resample (bool): If True, the training data is balanced with SMOTEENN after the transformation.
+        resampler_n_jobs (int): Threads running the neighbour queries of the resampler; -1 uses all cores.
+        resampler_chunk_size (int): Query rows per resampler task, bounding the memory of its neighbour tables.
+    """
+    data_transformation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
+    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                    DATA_TRANSFORMATION_TRANSFORMED_TRAIN_FILE_NAME)
+    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                   DATA_TRANSFORMATION_TRANSFORMED_TEST_FILE_NAME)
+    transformed_unresampled_train_file_path: str = os.path.join(data_transformation_dir,
+                                                                DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                                DATA_TRANSFORMATION_UNRESAMPLED_TRAIN_FILE_NAME)
+    transformed_object_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
+                                                     PREPROCESSING_OBJECT_FILE_NAME)
+    sparse_threshold: float = DATA_TRANSFORMATION_SPARSE_THRESHOLD  # Density under which the output stays sparse
+    resample: bool = DATA_TRANSFORMATION_RESAMPLE  # Balance the training data with SMOTEENN
+    resampler_n_jobs: int = DATA_TRANSFORMATION_RESAMPLER_N_JOBS
+    resampler_chunk_size: int = DATA_TRANSFORMATION_RESAMPLER_CHUNK_SIZE
+
+
+@dataclass
+class ModelTrainerConfig:
+    """Configuration class for model training process.
+
+    Attributes:
+        model_trainer_dir (str): Directory where the model trainer artifacts will be stored.
+        trained_model_file_path (str): Path to the trained model, bundled with its preprocessing object.
+        search_report_file_path (str): Path to the table of scores and timings of the model search.
+        expected_accuracy (float): Minimum test accuracy the best model must reach to be accepted.
+        model_config_file_path (str): Path to the model config listing the candidate models and parameter grids.
+        n_jobs (int): Worker processes used to evaluate configurations; -1 uses all cores.
+        successive_halving (bool): If True, weak configurations are dropped after scoring them on subsamples.
+        halving_factor (int): Each successive halving rung keeps 1/halving_factor of the configurations.
+        min_resources (int): Number of training rows used by the first successive halving rung.
+        use_trial_store (bool): If True, scored configurations are recorded and reused across runs.
+        trial_store_file_path (str): Path to the SQLite trial store, shared by all runs.
+        warm_start_top_k (int): Configurations tried by earlier runs are only searched again if they are among
+            the `warm_start_top_k` best; untried configurations are always searched. 0 searches everything.
+        shared_data_dir (str): Directory where the training data is published as memory-mapped files for the
+            search workers. None uses /dev/shm when available, else the system temporary directory.
+    """
+    model_trainer_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_DIR_NAME)
+    trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR,
+                                                MODEL_TRAINER_TRAINED_MODEL_NAME)
+    search_report_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_SEARCH_REPORT_FILE_NAME)
+    expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
+    model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
+    n_jobs: int = MODEL_TRAINER_N_JOBS  # Worker processes of the model search
+    successive_halving: bool = MODEL_TRAINER_SUCCESSIVE_HALVING  # Drop weak configurations early
+    halving_factor: int = MODEL_TRAINER_HALVING_FACTOR  # Reduction factor between rungs
+    min_resources: int = MODEL_TRAINER_MIN_RESOURCES  # Rows of the first rung
+    use_trial_store: bool = MODEL_TRAINER_USE_TRIAL_STORE  # Reuse scores across runs
+    trial_store_file_path: str = os.path.join(ARTIFACT_DIR, MODEL_TRAINER_TRIAL_STORE_FILE_NAME)
+    warm_start_top_k: int = MODEL_TRAINER_WARM_START_TOP_K  # Earlier best configurations searched again
+    shared_data_dir: str = _env_default("MODEL_TRAINER_SHARED_DATA_DIR")
+
+
+@dataclass
+class ModelEvaluationConfig:
+    """Configuration class for comparing the trained model with the production model.
+
+    Attributes:
+        model_evaluation_dir (str): Directory where the model evaluation artifacts will be stored.
+        report_file_path (str): Path to the report of both models' scores and the bootstrap interval.
+        changed_threshold_score (float): F1 gain over the production model the trained model needs to be accepted.
+        require_significance (bool): If True, the lower bound of the F1 gain's bootstrap interval must also be
+            above zero.
+        n_bootstrap (int): Number of bootstrap resamples of the test set.
+        confidence_level (float): Coverage of the bootstrap interval.
+        n_jobs (int): Threads drawing bootstrap resamples; -1 uses all cores.
+        cache_dir (str): Directory, shared by all runs, caching production models and their test predictions
+            by model version and test data hash.
+        storage_backend (str): Backend the production model is read from, see `ModelPusherConfig`.
+        bucket_name (str): Bucket of the production model.
+        s3_model_key_path (str): Key prefix of the production model and its manifest.
+        local_storage_dir (str): Directory standing in for the bucket with the "local" backend.
+        manifest_file_name (str): Name of the manifest of the production model.
+    """
+    model_evaluation_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_EVALUATION_DIR_NAME)
+    report_file_path: str = os.path.join(model_evaluation_dir, MODEL_EVALUATION_REPORT_FILE_NAME)
+    changed_threshold_score: float = MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
+    require_significance: bool = MODEL_EVALUATION_REQUIRE_SIGNIFICANCE
+    n_bootstrap: int = MODEL_EVALUATION_N_BOOTSTRAP  # Bootstrap resamples
+    confidence_level: float = MODEL_EVALUATION_CONFIDENCE_LEVEL
+    n_jobs: int = MODEL_EVALUATION_N_JOBS  # Bootstrap threads
+    cache_dir: str = os.path.join(ARTIFACT_DIR, MODEL_EVALUATION_CACHE_DIR_NAME)
+    storage_backend: str = _env_default("MODEL_PUSHER_STORAGE_BACKEND")
+    bucket_name: str = _env_default("MODEL_BUCKET_NAME")
+    s3_model_key_path: str = MODEL_PUSHER_S3_KEY
+    local_storage_dir: str = _env_default("MODEL_PUSHER_LOCAL_STORAGE_DIR")
+    manifest_file_name: str = MODEL_PUSHER_MANIFEST_FILE_NAME
+
 
+@dataclass
+class ModelPusherConfig:
+    """Configuration class for pushing the trained model to the model storage.
+
+    Attributes:
+        storage_backend (str): "s3" to push to `bucket_name`, "local" to push below `local_storage_dir`.
+        bucket_name (str): Bucket receiving the model artifacts.
+        s3_model_key_path (str): Key prefix of the model, preprocessing object and manifests.
+        local_storage_dir (str): Directory standing in for the bucket with the "local" backend.
+        multipart_threshold (int): Files larger than this many bytes are uploaded in parts.
+        multipart_chunksize (int): Size in bytes of each uploaded part.
+        max_concurrency (int): Parts uploaded concurrently.
+        manifest_file_name (str): Name of the manifest describing the latest pushed version.
+    """
+    storage_backend: str = _env_default("MODEL_PUSHER_STORAGE_BACKEND")
+    bucket_name: str = _env_default("MODEL_BUCKET_NAME")
+    s3_model_key_path: str = MODEL_PUSHER_S3_KEY
+    local_storage_dir: str = _env_default("MODEL_PUSHER_LOCAL_STORAGE_DIR")
+    multipart_threshold: int = MODEL_PUSHER_MULTIPART_THRESHOLD  # Multipart above this size
+    multipart_chunksize: int = MODEL_PUSHER_MULTIPART_CHUNKSIZE  # Part size
+    max_concurrency: int = MODEL_PUSHER_MAX_CONCURRENCY  # Parallel parts
+    manifest_file_name: str = MODEL_PUSHER_MANIFEST_FILE_NAME
+
+
+@dataclass
+class BatchPredictionConfig:
+    """Configuration class for batch scoring of visa cases.
+
+    Attributes:
+        model_file_path (str): Path to the saved `USvisaModel` (preprocessing object and model).
+        chunk_size (int): Number of rows read, scored and written at a time.
+        n_jobs (int): Worker processes scoring chunks; -1 uses all cores, 1 scores in the calling process.
+        max_pending_chunks (int): Chunks queued per worker. Memory use is bounded by
+            `chunk_size * n_jobs * max_pending_chunks` rows, whatever the size of the input.
+        output_column (str): Name of the column holding the predicted `case_status` label.
+    """
+    model_file_path: str = _env_default("PREDICTION_MODEL_FILE_PATH")
+    chunk_size: int = PREDICTION_CHUNK_SIZE  # Rows per chunk
+    n_jobs: int = PREDICTION_N_JOBS  # Worker processes
+    max_pending_chunks: int = PREDICTION_MAX_PENDING_CHUNKS  # Chunks in flight per worker
+    output_column: str = PREDICTION_OUTPUT_COLUMN  # Predicted label column
+
+
+@dataclass
+class MongoBatchPredictionConfig:
+    """Configuration class for in-place scoring of the documents of a MongoDB collection.
+
+    Attributes:
+        model_file_path (str): Path to the saved `USvisaModel` (preprocessing object and model).
+        collection_name (str): Collection whose unscored documents are scored.
+        page_size (int): Documents read, scored and written back with one `bulk_write` per page.
+        n_workers (int): Threads scoring pages and writing them back concurrently.
+        max_pending_pages (int): Pages queued per worker, bounding memory to
+            `page_size * n_workers * max_pending_pages` documents.
+        prediction_field (str): Document field receiving the predicted `case_status` label; documents
+            that already have it are skipped.
+        checkpoint_file_path (str): Path to the checkpoint recording the `_id` up to which every page was
+            written back, shared by all runs so an interrupted job resumes from there.
+    """
+    model_file_path: str = _env_default("PREDICTION_MODEL_FILE_PATH")
+    collection_name: str = DATA_INGESTION_COLLECTION_NAME  # Collection to score in place
+    page_size: int = PREDICTION_MONGO_PAGE_SIZE  # Documents per page
+    n_workers: int = PREDICTION_MONGO_WORKERS  # Concurrent pages
+    max_pending_pages: int = PREDICTION_MAX_PENDING_CHUNKS  # Pages in flight per worker
+    prediction_field: str = PREDICTION_OUTPUT_COLUMN  # Field the predicted label is written to
+    checkpoint_file_path: str = os.path.join(ARTIFACT_DIR, PREDICTION_DIR_NAME, PREDICTION_MONGO_CHECKPOINT_FILE_NAME)
+
+
+@dataclass
+class ServingConfig:
+    """Configuration class for the online prediction service.
+
+    Attributes:
+        model_file_path (str): Path to the saved `USvisaModel` served by the app.
+        max_batch_size (int): Largest number of concurrent requests scored by one vectorized predict.
+        max_wait_ms (float): Longest time a request waits for others to join its micro-batch.
+        latency_window (int): Number of recent requests the latency percentiles are computed over.
+        model_source (str): "file" serves `model_file_path`; "storage" serves the latest version pushed to the
+            model storage and swaps in newer versions while serving.
+        poll_interval_seconds (float): Seconds between checks of the manifest for a new version.
+        max_versions (int): Loaded versions kept in memory; the least recently served is evicted first.
+        cache_dir (str): Directory the served versions are downloaded to.
+        storage_backend (str): Backend the served model is read from, see `ModelPusherConfig`.
+        bucket_name (str): Bucket of the served model.
+        s3_model_key_path (str): Key prefix of the served model and its manifest.
+        local_storage_dir (str): Directory standing in for the bucket with the "local" backend.
+        manifest_file_name (str): Name of the manifest of the latest pushed version.
+    """
+    model_file_path: str = _env_default("PREDICTION_MODEL_FILE_PATH")
+    max_batch_size: int = SERVING_MAX_BATCH_SIZE  # Requests per micro-batch
+    max_wait_ms: float = SERVING_MAX_WAIT_MS  # Micro-batch collection window
+    latency_window: int = SERVING_LATENCY_WINDOW  # Requests in the latency percentiles
+    model_source: str = _env_default("SERVING_MODEL_SOURCE")
+    poll_interval_seconds: float = SERVING_MODEL_POLL_INTERVAL_SECONDS  # Manifest polling period
+    max_versions: int = SERVING_MODEL_MAX_VERSIONS  # Resident model versions
+    cache_dir: str = os.path.join(ARTIFACT_DIR, SERVING_MODEL_CACHE_DIR_NAME)
+    storage_backend: str = _env_default("MODEL_PUSHER_STORAGE_BACKEND")
+    bucket_name: str = _env_default("MODEL_BUCKET_NAME")
+    s3_model_key_path: str = MODEL_PUSHER_S3_KEY
+    local_storage_dir: str = _env_default("MODEL_PUSHER_LOCAL_STORAGE_DIR")
+    manifest_file_name: str = MODEL_PUSHER_MANIFEST_FILE_NAME
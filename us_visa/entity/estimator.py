@@ -0,0 +1,72 @@
+import sys
+
+from pandas import DataFrame
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+
+
+class TargetValueMapping:
+    """
+    Encodes the `case_status` target the same way the training notebook's LabelEncoder does:
+    Certified as 0 and Denied as 1.
+    """
+
+    def __init__(self):
+        self.Certified: int = 0
+        self.Denied: int = 1
+
+    def _asdict(self) -> dict:
+        """Returns the label to code mapping."""
+        return self.__dict__
+
+    def reverse_mapping(self) -> dict:
+        """Returns the code to label mapping."""
+        mapping_response = self._asdict()
+        return dict(zip(mapping_response.values(), mapping_response.keys()))
+
+
+class USvisaModel:
+    """
+    Bundles the fitted preprocessing pipeline with the trained model, so raw records can be
+    scored with a single object.
+
+    Attributes:
+        preprocessing_object: The fitted preprocessing pipeline.
+        trained_model_object: The trained model.
+    """
+
+    def __init__(self, preprocessing_object, trained_model_object):
+        """
+        Args:
+            preprocessing_object: The fitted preprocessing pipeline.
+            trained_model_object: The trained model.
+        """
+        self.preprocessing_object = preprocessing_object
+        self.trained_model_object = trained_model_object
+
+    def predict(self, dataframe: DataFrame):
+        """
+        Transforms raw records with the preprocessing pipeline and predicts with the trained model.
+
+        Args:
+            dataframe (DataFrame): Raw input records.
+
+        Returns:
+            The predicted target codes, see `TargetValueMapping`.
+
+        Raises:
+            USvisaException: If the prediction fails.
+        """
+        logging.info("Entered predict method of USvisaModel class")
+        try:
+            transformed_feature = self.preprocessing_object.transform(dataframe)
+            return self.trained_model_object.predict(transformed_feature)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def __repr__(self):
+        return f"{type(self.trained_model_object).__name__}()"
+
+    def __str__(self):
+        return f"{type(self.trained_model_object).__name__}()"
@@ -2,6 +2,19 @@
 Follow from:
 *_  https://docs.python.org/3/library/logging.html
 *_  https://docs.python.org/3/howto/logging.html
+*_  https://docs.python.org/3/howto/logging-cookbook.html#dealing-with-handlers-that-block
+
+Configured from environment variables, read once at import:
+    LOG_MODE: "queue" (default) writes the log file on a background thread, the logging call only
+        enqueues the record; "sync" writes it in the calling thread.
+    LOG_LEVEL: Level of modules without their own level (default DEBUG). Unknown level names fall
+        back to INFO with a warning, here and in LOG_MODULE_LEVELS.
+    LOG_MODULE_LEVELS: Per-module levels, e.g. "us_visa.utils.main_utils=WARNING,us_visa.components=INFO".
+        A module takes the level of its longest matching prefix; records of other libraries are
+        matched by logger name (e.g. "botocore=WARNING").
+    LOG_FORMAT: "text" (default) or "json", one JSON object per line.
+    LOG_FILE: Name of the log file; set by the first process importing this module and inherited by
+        its worker processes, so they all write to the same file.
 """
 
 # Importing the logging module to enable logging functionality in the script
@@ -10,35 +23,266 @@ import logging
 # Importing the os module, which provides a way to interact with the operating system, such as file handling
 import os
 
-# Importing from_root, a utility to help determine the root directory of the project (from_root must be installed and available)
-from from_root import from_root
+import atexit
+import copy
+import json
+import queue
+import sys
+import threading
+import warnings
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 
 # Importing datetime to work with date and time functions
 from datetime import datetime
 
 # Creating a log file name with the current date and time to ensure it is unique
 # Example format: "09_27_2024_14_35_12.log"
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
+# Worker processes inherit the name of their parent's file through the environment
+LOG_FILE = os.environ.setdefault("LOG_FILE", f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log")
 
 # Defining the directory name where log files will be stored
 log_dir = 'logs'
 
-# Creating the full path to the log file by joining the project's root directory, the logs directory, and the log file name
-logs_path = os.path.join(from_root(), log_dir, LOG_FILE)
-
-# Creating the 'logs' directory if it doesn't already exist; 'exist_ok=True' means no error if the directory is already there
-os.makedirs(name=log_dir, exist_ok=True)
-
-# Setting up basic configuration for logging:
-# - filename: Specifies the file to write log messages to
-# - format: Defines how log messages will be formatted, showing the time, logger name, level, and the actual message
-# - level: Sets the minimum level of messages to log; DEBUG means log everything (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-logging.basicConfig(
-    filename=logs_path,
-            # %(asctime)s: Shows the time when the log entry was created.
-            # %(name)s: Shows the name of the logger.
-            # %(levelname)s: Displays the level of the log (e.g., DEBUG, INFO, WARNING, ERROR, CRITICAL).
-            # %(message)s: Shows the actual log message.
-    format="[%(asctime)s] %(name)s - %(levelname)s - %(message)s",
-    level=logging.DEBUG,
-)
+# %(asctime)s: Shows the time when the log entry was created.
+# %(name)s: Shows the name of the logger.
+# %(levelname)s: Displays the level of the log (e.g., DEBUG, INFO, WARNING, ERROR, CRITICAL).
+# %(message)s: Shows the actual log message.
+LOG_FORMAT = "[%(asctime)s] %(name)s - %(levelname)s - %(message)s"
+
+# Directory containing the us_visa package, to name modules after their file path
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@lru_cache(maxsize=None)
+def _module_name(pathname: str) -> str:
+    """Returns the dotted module name of a source file, e.g. "us_visa.utils.main_utils"."""
+    relative_path = os.path.relpath(os.path.splitext(pathname)[0], _SOURCE_ROOT)
+    if relative_path.startswith(os.pardir):
+        return os.path.basename(relative_path)
+    return relative_path.replace(os.sep, ".")
+
+
+def get_record_module(record: logging.LogRecord) -> str:
+    """
+    Returns the module a record is attributed to: the dotted name of the calling module for the
+    root logger used throughout us_visa, the logger name for named loggers of other libraries.
+    """
+    if record.name != "root":
+        return record.name
+    return _module_name(record.pathname)
+
+
+class _LazyFileHandler(logging.FileHandler):
+    """
+    File handler resolving the log file path and creating the file with the first record, so
+    importing the logger neither walks the file system for the project root nor creates files.
+    """
+
+    def __init__(self):
+        # delay=True: FileHandler only records the path, which `_open` replaces
+        super().__init__(LOG_FILE, delay=True)
+
+    def _open(self):
+        # Importing from_root, a utility to help determine the root directory of the project (from_root must be installed and available)
+        from from_root import from_root
+
+        # Creating the full path to the log file by joining the project's root directory, the logs directory, and the log file name
+        self.baseFilename = os.path.join(from_root(), log_dir, LOG_FILE)
+
+        # Creating the 'logs' directory if it doesn't already exist; 'exist_ok=True' means no error if the directory is already there
+        os.makedirs(name=os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, for log shippers and `jq`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": get_record_module(record),
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Drops records below the level of their module, see `get_record_module`.
+
+    Attributes:
+        default_level (int): Level of modules without their own level.
+        module_levels (dict): Level by module name prefix.
+    """
+
+    def __init__(self, default_level: int, module_levels: dict):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = module_levels
+        self._levels = {}
+
+    def get_level(self, module: str) -> int:
+        level = self._levels.get(module)
+        if level is None:
+            prefixes = [prefix for prefix in self.module_levels
+                        if module == prefix or module.startswith(prefix + ".")]
+            level = self.module_levels[max(prefixes, key=len)] if prefixes else self.default_level
+            self._levels[module] = level
+        return level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.get_level(get_record_module(record))
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Queue handler whose records are written by a `QueueListener` thread, so the logging call
+    does no file I/O. The listener is started with the first record of every process, forked
+    workers included, and stopped (draining the queue) at exit, or when a multiprocessing worker,
+    which exits without running atexit handlers, finishes.
+    """
+
+    def __init__(self, *handlers: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.target_handlers = handlers
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.listener is None:
+                self.listener = QueueListener(self.queue, *self.target_handlers, respect_handler_level=True)
+                self.listener.start()
+                multiprocessing_util = sys.modules.get("multiprocessing.util")
+                if multiprocessing_util is not None:
+                    multiprocessing_util.Finalize(None, self.stop, exitpriority=10)
+
+    def stop(self):
+        """Writes the queued records and stops the listener thread."""
+        with self._start_lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def reset_after_fork(self):
+        # The listener thread does not survive a fork; records queued by the parent are its own to write
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what cannot wait for the listener is done here: merging the arguments into the
+        # message and rendering the traceback. The full format is applied once, by the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.listener is None:
+            self.start()
+        self.queue.put_nowait(record)
+
+
+_queue_handler = None
+_traceback_formatter = logging.Formatter()
+
+
+def _parse_level(level: str, setting: str) -> int:
+    """Returns the number of a level name, or INFO with a warning if the name is unknown."""
+    name = str(level).strip().upper()
+    levels = logging.getLevelNamesMapping()
+    if name in levels:
+        return levels[name]
+    warnings.warn(f"Unknown log level {level!r} in {setting}, using INFO")
+    return logging.INFO
+
+
+def _parse_module_levels(module_levels: str) -> dict:
+    levels = {}
+    for entry in filter(None, (entry.strip() for entry in module_levels.split(","))):
+        module, separator, level = entry.partition("=")
+        if not separator or not module.strip():
+            warnings.warn(f"Ignoring malformed entry {entry!r} in LOG_MODULE_LEVELS, expected module=LEVEL")
+            continue
+        levels[module.strip()] = _parse_level(level, setting=f"LOG_MODULE_LEVELS ({module.strip()})")
+    return levels
+
+
+def configure_logging(mode: str = "queue", level: str = "DEBUG", module_levels: str = "", log_format: str = "text"):
+    """
+    (Re)configures the root logger every us_visa module logs to.
+
+    Args:
+        mode (str): "queue" to write the log file on a background thread, "sync" to write it in the
+            calling thread.
+        level (str): Level of modules without their own level.
+        module_levels (str): Comma separated `module=LEVEL` pairs, see the module docstring.
+        log_format (str): "text" or "json".
+
+    Unknown modes, formats and level names fall back to the defaults ("queue", "text", INFO) with a
+    warning, so a typo in the environment never prevents importing the package.
+    """
+    global _queue_handler
+    if mode not in ("queue", "sync"):
+        warnings.warn(f"Unknown log mode {mode!r} in LOG_MODE, using 'queue'")
+        mode = "queue"
+    if log_format not in ("text", "json"):
+        warnings.warn(f"Unknown log format {log_format!r} in LOG_FORMAT, using 'text'")
+        log_format = "text"
+    root_logger = logging.getLogger()
+    if _queue_handler is not None:
+        _queue_handler.stop()
+        _queue_handler = None
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, (_LazyFileHandler, BackgroundQueueHandler)):
+            root_logger.removeHandler(handler)
+            handler.close()
+
+    default_level = _parse_level(level, setting="LOG_LEVEL")
+    levels = _parse_module_levels(module_levels)
+    file_handler = _LazyFileHandler()
+    file_handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(LOG_FORMAT))
+
+    if mode == "queue":
+        _queue_handler = BackgroundQueueHandler(file_handler)
+        handler = _queue_handler
+    else:
+        handler = file_handler
+    # Filtering on the handler drops records in the calling thread, before they are queued
+    if levels:
+        handler.addFilter(ModuleLevelFilter(default_level, levels))
+    root_logger.addHandler(handler)
+    # Records below every configured level are not even created
+    root_logger.setLevel(min([default_level, *levels.values()]))
+
+
+def _stop_queue_handler():
+    if _queue_handler is not None:
+        _queue_handler.stop()
+
+
+def _reset_queue_handler_after_fork():
+    if _queue_handler is not None:
+        _queue_handler.reset_after_fork()
+
+
+configure_logging(mode=os.getenv("LOG_MODE", "queue"),
+                  level=os.getenv("LOG_LEVEL", "DEBUG"),
+                  module_levels=os.getenv("LOG_MODULE_LEVELS", ""),
+                  log_format=os.getenv("LOG_FORMAT", "text"))
+atexit.register(_stop_queue_handler)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_queue_handler_after_fork)
@@ -0,0 +1,510 @@
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from us_visa.constants import (MODEL_PUSHER_MAX_CONCURRENCY, MODEL_PUSHER_MULTIPART_CHUNKSIZE,
+                               MODEL_PUSHER_MULTIPART_THRESHOLD, PREDICTION_MODEL_FILE_PATH)
+from us_visa.data_access.model_storage import get_model_storage
+from us_visa.entity.artifact_entity import BatchPredictionArtifact, MongoBatchPredictionArtifact
+from us_visa.entity.config_entity import BatchPredictionConfig, MongoBatchPredictionConfig, ServingConfig
+from us_visa.entity.estimator import TargetValueMapping
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.main_utils import (append_dataframe, compute_file_hash, iter_dataframe_chunks, load_object,
+                                     read_yaml_file, write_yaml_file)
+
+# Model of the current worker process, loaded once by `_init_worker`
+_worker_model = None
+
+
+def _init_worker(model_file_path: str):
+    """Loads the model once per worker process, instead of shipping it with every chunk."""
+    global _worker_model
+    _worker_model = load_object(file_path=model_file_path)
+
+
+def _predict_chunk(features: DataFrame) -> np.ndarray:
+    """Scores a chunk with the worker's model and returns the target codes."""
+    return np.asarray(_worker_model.predict(features)).astype(np.int8)
+
+
+def get_target_labels() -> np.ndarray:
+    """Returns the `case_status` labels indexed by their target code, to decode predictions vectorized."""
+    return np.array([label for _, label in sorted(TargetValueMapping().reverse_mapping().items())], dtype=object)
+
+
+def get_feature_columns(model):
+    """
+    Returns the input columns the model's preprocessing object was fitted on, so no other column
+    is read or shipped to a worker. None if the preprocessing object does not record them.
+    """
+    feature_names = getattr(model.preprocessing_object, "feature_names_in_", None)
+    return None if feature_names is None else list(feature_names)
+
+
+class ModelCache:
+    """
+    Keeps the latest `USvisaModel` pushed to the model storage loaded in memory, and swaps newer
+    versions in while serving.
+
+    Versions are keyed by the `model_version` of the manifest the `ModelPusher` writes (derived from
+    the model's SHA-256). A background thread reads the manifest every `poll_interval_seconds`; a
+    new version is downloaded, checksum verified and loaded on that thread, off the request path,
+    then made current with a single reference assignment, so every batch is scored by one whole
+    version, old or new. Up to `max_versions` loaded versions stay resident, the least recently
+    served evicted first, so switching back to a recent version (a rollback) needs no download or load.
+
+    Attributes:
+        current_version (Optional[str]): Version being served, None before the first load.
+    """
+
+    def __init__(self, serving_config: ServingConfig = ServingConfig()):
+        """
+        Args:
+            serving_config (ServingConfig): Model storage, polling and cache settings.
+
+        Raises:
+            USvisaException: If the model storage cannot be reached.
+        """
+        try:
+            self.serving_config = serving_config
+            self.model_storage = get_model_storage(storage_backend=serving_config.storage_backend,
+                                                   bucket_name=serving_config.bucket_name,
+                                                   local_storage_dir=serving_config.local_storage_dir,
+                                                   multipart_threshold=MODEL_PUSHER_MULTIPART_THRESHOLD,
+                                                   multipart_chunksize=MODEL_PUSHER_MULTIPART_CHUNKSIZE,
+                                                   max_concurrency=MODEL_PUSHER_MAX_CONCURRENCY)
+            # version -> model, most recently served last
+            self._models = OrderedDict()
+            # (version, model) being served, replaced as a whole so readers never see a mix
+            self._current = (None, None)
+            self._refresh_lock = threading.Lock()
+            self._stop_event = threading.Event()
+            self._poll_thread = None
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    @property
+    def current_version(self) -> Optional[str]:
+        return self._current[0]
+
+    def get_model(self) -> tuple:
+        """
+        Returns the version being served and its model. Callers should use the returned model for
+        a whole batch rather than calling this per record.
+
+        Returns:
+            tuple: `(version, model)`.
+        """
+        return self._current
+
+    def get_manifest(self) -> Optional[dict]:
+        """Returns the manifest of the latest pushed version, or None if no model was pushed yet."""
+        return self.model_storage.read_json(
+            f"{self.serving_config.s3_model_key_path}/{self.serving_config.manifest_file_name}")
+
+    def load_version(self, manifest: dict):
+        """
+        Downloads a version unless it is already in the local cache directory, verifies its
+        checksum and loads it.
+
+        Args:
+            manifest (dict): Manifest of the version.
+
+        Returns:
+            USvisaModel: The loaded model.
+        """
+        model_version = manifest["model_version"]
+        model_entry = manifest["files"]["model"]
+        model_file_path = os.path.join(self.serving_config.cache_dir, model_version,
+                                       os.path.basename(model_entry["key"]))
+        if not os.path.exists(model_file_path) or compute_file_hash(model_file_path) != model_entry["sha256"]:
+            logging.info(f"Downloading model {model_version} from {self.model_storage.get_uri(model_entry['key'])}")
+            self.model_storage.download_file(model_entry["key"], model_file_path)
+            if compute_file_hash(model_file_path) != model_entry["sha256"]:
+                raise Exception(f"Checksum of {model_file_path} does not match the manifest")
+        return load_object(file_path=model_file_path)
+
+    def refresh(self) -> bool:
+        """
+        Serves the version of the latest manifest, loading it if it is not resident.
+
+        Returns:
+            bool: True if the served version changed.
+
+        Raises:
+            USvisaException: If no model was pushed yet, or the new version cannot be loaded.
+        """
+        try:
+            with self._refresh_lock:
+                manifest = self.get_manifest()
+                if manifest is None:
+                    raise Exception(f"No model manifest found at "
+                                    f"{self.serving_config.s3_model_key_path}/{self.serving_config.manifest_file_name}")
+                model_version = manifest["model_version"]
+                if model_version == self.current_version:
+                    return False
+
+                model = self._models.get(model_version)
+                if model is None:
+                    start_time = time.perf_counter()
+                    model = self.load_version(manifest)
+                    logging.info(f"Loaded model {model_version} in {time.perf_counter() - start_time:.2f}s")
+                self._models[model_version] = model
+                self._models.move_to_end(model_version)
+
+                previous_version = self.current_version
+                self._current = (model_version, model)
+                logging.info(f"Serving model {model_version}" + (f" (was {previous_version})" if previous_version else ""))
+
+                while len(self._models) > max(self.serving_config.max_versions, 1):
+                    evicted_version, _ = self._models.popitem(last=False)
+                    logging.info(f"Evicted model {evicted_version} from memory")
+                return True
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def _poll(self):
+        while not self._stop_event.wait(self.serving_config.poll_interval_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the current version until a later poll succeeds
+                logging.info(f"Model refresh failed, still serving {self.current_version}: {e}")
+
+    def start(self):
+        """Loads the latest version and starts polling for new ones."""
+        self.refresh()
+        self._stop_event.clear()
+        self._poll_thread = threading.Thread(target=self._poll, name="model-cache-poll", daemon=True)
+        self._poll_thread.start()
+
+    def stop(self):
+        """Stops polling; the current version keeps being served."""
+        self._stop_event.set()
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+
+
+class USvisaClassifier:
+    """
+    Scores visa cases given as records, used by the online prediction service.
+
+    The model is either loaded once from a file, or taken from a `ModelCache` at the start of
+    every batch, so a version swapped in while serving is used from the next batch on.
+    """
+
+    def __init__(self, model_file_path: str = PREDICTION_MODEL_FILE_PATH, model_cache: Optional[ModelCache] = None):
+        """
+        Args:
+            model_file_path (str): Path to the saved `USvisaModel`, used without a `model_cache`.
+            model_cache (Optional[ModelCache]): Cache serving the latest pushed version.
+
+        Raises:
+            USvisaException: If the model cannot be loaded.
+        """
+        try:
+            self.model_cache = model_cache
+            self.labels = get_target_labels()
+            self._model = None if model_cache is not None else load_object(file_path=model_file_path)
+            # Feature columns by model identity, recomputed only when a new version is swapped in
+            self._feature_columns = (None, None)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    @property
+    def model(self):
+        return self._model if self.model_cache is None else self.model_cache.get_model()[1]
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return None if self.model_cache is None else self.model_cache.current_version
+
+    def predict(self, records: list) -> list:
+        """
+        Scores a list of records with one vectorized call.
+
+        Args:
+            records (list): Visa cases as dicts of input field values.
+
+        Returns:
+            list: The predicted `case_status` label of every record.
+
+        Raises:
+            USvisaException: If the prediction fails.
+        """
+        try:
+            model = self.model
+            if self._feature_columns[0] is not model:
+                self._feature_columns = (model, get_feature_columns(model))
+            dataframe = DataFrame.from_records(records, columns=self._feature_columns[1])
+            codes = np.asarray(model.predict(dataframe)).astype(np.int8)
+            return self.labels[codes].tolist()
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+
+class BatchPredictor:
+    """
+    Scores files of visa cases too large for memory with a saved `USvisaModel`.
+
+    The input, a CSV or Parquet file (or a directory of part files), is streamed in chunks of
+    `chunk_size` rows. Each chunk goes through the preprocessing object and the model in one
+    vectorized call, on a pool of worker processes that load the model once. Predictions are
+    written in input order as soon as every earlier chunk is done, and at most
+    `max_pending_chunks` chunks per worker are in flight, so memory depends on the chunk size and
+    not on the file size.
+
+    Attributes:
+        batch_prediction_config (BatchPredictionConfig): Model path, chunking and parallelism settings.
+        model: The loaded `USvisaModel`.
+    """
+
+    def __init__(self, batch_prediction_config: BatchPredictionConfig = BatchPredictionConfig()):
+        """
+        Args:
+            batch_prediction_config (BatchPredictionConfig): Configuration for batch scoring.
+
+        Raises:
+            USvisaException: If the model cannot be loaded.
+        """
+        try:
+            self.batch_prediction_config = batch_prediction_config
+            self.model = load_object(file_path=batch_prediction_config.model_file_path)
+            self.labels = get_target_labels()
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def write_chunk(self, output_file_path: str, chunk: DataFrame, codes: np.ndarray):
+        """Appends a scored chunk, with the predicted labels, to the output."""
+        append_dataframe(output_file_path, chunk.assign(**{self.batch_prediction_config.output_column:
+                                                           self.labels[codes]}))
+
+    def predict(self, input_file_path: str, output_file_path: str) -> BatchPredictionArtifact:
+        """
+        Scores every row of the input and writes it, with its predicted label, to the output.
+
+        Args:
+            input_file_path (str): CSV or Parquet file, or directory of part files, of visa cases.
+            output_file_path (str): CSV file or Parquet directory of part files to write, replaced if it exists.
+
+        Returns:
+            BatchPredictionArtifact: The output path, number of rows scored and throughput.
+
+        Raises:
+            USvisaException: If reading, scoring or writing fails.
+        """
+        logging.info("Entered predict method of BatchPredictor class")
+        try:
+            config = self.batch_prediction_config
+            if os.path.isdir(output_file_path):
+                shutil.rmtree(output_file_path)
+            elif os.path.exists(output_file_path):
+                os.remove(output_file_path)
+
+            feature_columns = get_feature_columns(self.model)
+            n_jobs = os.cpu_count() if config.n_jobs == -1 else config.n_jobs
+            chunks = iter_dataframe_chunks(input_file_path, chunk_size=config.chunk_size)
+            n_rows = 0
+            start = time.perf_counter()
+
+            if n_jobs == 1:
+                for chunk in chunks:
+                    features = chunk if feature_columns is None else chunk[feature_columns]
+                    self.write_chunk(output_file_path, chunk,
+                                     np.asarray(self.model.predict(features)).astype(np.int8))
+                    n_rows += len(chunk)
+            else:
+                # Chunks in submission order; the oldest is written as soon as it is scored
+                pending = deque()
+                with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                         initargs=(config.model_file_path,)) as executor:
+                    for chunk in chunks:
+                        features = chunk if feature_columns is None else chunk[feature_columns]
+                        pending.append((chunk, executor.submit(_predict_chunk, features)))
+                        while len(pending) >= n_jobs * config.max_pending_chunks:
+                            done_chunk, future = pending.popleft()
+                            self.write_chunk(output_file_path, done_chunk, future.result())
+                            n_rows += len(done_chunk)
+                    while pending:
+                        done_chunk, future = pending.popleft()
+                        self.write_chunk(output_file_path, done_chunk, future.result())
+                        n_rows += len(done_chunk)
+
+            elapsed = time.perf_counter() - start
+            batch_prediction_artifact = BatchPredictionArtifact(
+                output_file_path=output_file_path,
+                n_rows=n_rows,
+                elapsed_seconds=round(elapsed, 3),
+                rows_per_second=round(n_rows / elapsed, 1) if elapsed else 0.0,
+            )
+            logging.info(f"Scored {n_rows} rows of {input_file_path} in {elapsed:.2f}s "
+                         f"({batch_prediction_artifact.rows_per_second:,.0f} rows/sec) with {n_jobs} workers")
+            return batch_prediction_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+
+class MongoBatchPredictor:
+    """
+    Scores the documents of a MongoDB collection that have no prediction yet, in place.
+
+    Unscored documents are read in `_id` order, a page of `page_size` documents at a time, with
+    only `_id` and the model's input fields fetched. Each page is scored in one vectorized call
+    and its labels written back with one unordered `bulk_write`, on `n_workers` threads sharing
+    the connection pool of `MongoDBClient`. After every page, the `_id` up to which all pages are
+    written back is checkpointed; a restarted job continues after it, and documents of pages
+    that were in flight are picked up again since they still have no prediction.
+
+    Attributes:
+        mongo_batch_prediction_config (MongoBatchPredictionConfig): Model, collection, paging and concurrency settings.
+        model: The loaded `USvisaModel`.
+        usvisa_data (USvisaData): Access to the collection.
+    """
+
+    def __init__(self, mongo_batch_prediction_config: MongoBatchPredictionConfig = MongoBatchPredictionConfig()):
+        """
+        Args:
+            mongo_batch_prediction_config (MongoBatchPredictionConfig): Configuration for in-place scoring.
+
+        Raises:
+            USvisaException: If the model cannot be loaded or MongoDB cannot be reached.
+        """
+        try:
+            self.mongo_batch_prediction_config = mongo_batch_prediction_config
+            self.model = load_object(file_path=mongo_batch_prediction_config.model_file_path)
+            self.labels = get_target_labels()
+            # MongoDB access (and pymongo) is only imported by the jobs scoring a collection
+            from us_visa.data_access.usvisa_data import USvisaData
+
+            self.usvisa_data = USvisaData()
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def read_checkpoint(self):
+        """
+        Returns the `_id` up to which an earlier run scored the collection.
+
+        Returns:
+            The checkpointed `_id`, or None if there is no checkpoint for the collection.
+        """
+        try:
+            from bson import ObjectId
+
+            config = self.mongo_batch_prediction_config
+            if not os.path.exists(config.checkpoint_file_path):
+                return None
+            checkpoint = read_yaml_file(file_path=config.checkpoint_file_path)
+            if checkpoint["collection"] != config.collection_name:
+                logging.info(f"Checkpoint was recorded for collection {checkpoint['collection']}, ignoring it.")
+                return None
+            if checkpoint["type"] == "ObjectId":
+                return ObjectId(checkpoint["last_id"])
+            return checkpoint["last_id"]
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def write_checkpoint(self, last_id, n_documents: int):
+        """
+        Records the `_id` up to which every page is written back.
+
+        Args:
+            last_id: The largest `_id` of the contiguous written pages.
+            n_documents (int): Documents scored by the run so far, kept for reference.
+        """
+        try:
+            from bson import ObjectId
+
+            write_yaml_file(file_path=self.mongo_batch_prediction_config.checkpoint_file_path, content={
+                "collection": self.mongo_batch_prediction_config.collection_name,
+                "type": "ObjectId" if isinstance(last_id, ObjectId) else "raw",
+                "last_id": str(last_id) if isinstance(last_id, ObjectId) else last_id,
+                "documents": n_documents,
+                "updated_at": datetime.now().isoformat(),
+            }, replace=True)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def score_page(self, page: DataFrame) -> int:
+        """
+        Scores a page and writes the predicted labels back.
+
+        Args:
+            page (DataFrame): Documents with their `_id` column.
+
+        Returns:
+            int: Number of documents updated.
+        """
+        codes = np.asarray(self.model.predict(page.drop(columns=["_id"]))).astype(np.int8)
+        return self.usvisa_data.bulk_set_fields(
+            collection_name=self.mongo_batch_prediction_config.collection_name,
+            ids=page["_id"].tolist(),
+            fields={self.mongo_batch_prediction_config.prediction_field: self.labels[codes]})
+
+    def predict(self, reset: bool = False) -> MongoBatchPredictionArtifact:
+        """
+        Scores every document of the collection without a prediction.
+
+        Args:
+            reset (bool): Ignore the checkpoint and scan the whole collection for unscored documents.
+
+        Returns:
+            MongoBatchPredictionArtifact: Number of documents scored, throughput and checkpoint path.
+
+        Raises:
+            USvisaException: If reading, scoring or writing back fails.
+        """
+        logging.info("Entered predict method of MongoBatchPredictor class")
+        try:
+            config = self.mongo_batch_prediction_config
+            start_after = None if reset else self.read_checkpoint()
+            logging.info(f"Scoring {config.collection_name} documents without {config.prediction_field}"
+                         + (f" after _id {start_after}" if start_after is not None else ""))
+            pages = self.usvisa_data.iter_pages(collection_name=config.collection_name,
+                                                page_size=config.page_size,
+                                                query={config.prediction_field: {"$exists": False}},
+                                                start_after=start_after,
+                                                columns=get_feature_columns(self.model))
+            n_documents = 0
+            start = time.perf_counter()
+
+            def complete(last_id, future):
+                nonlocal n_documents
+                n_documents += future.result()
+                self.write_checkpoint(last_id, n_documents)
+
+            # Pages in read order; the checkpoint only advances past pages whose predecessors are written
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=config.n_workers) as executor:
+                for page in pages:
+                    last_id = page["_id"].iloc[-1:].tolist()[0]  # Python value, not a NumPy scalar
+                    pending.append((last_id, executor.submit(self.score_page, page)))
+                    while len(pending) >= config.n_workers * config.max_pending_pages:
+                        complete(*pending.popleft())
+                while pending:
+                    complete(*pending.popleft())
+
+            elapsed = time.perf_counter() - start
+            mongo_batch_prediction_artifact = MongoBatchPredictionArtifact(
+                collection_name=config.collection_name,
+                n_documents=n_documents,
+                elapsed_seconds=round(elapsed, 3),
+                documents_per_second=round(n_documents / elapsed, 1) if elapsed else 0.0,
+                checkpoint_file_path=config.checkpoint_file_path,
+            )
+            logging.info(f"Scored {n_documents} documents of {config.collection_name} in {elapsed:.2f}s "
+                         f"({mongo_batch_prediction_artifact.documents_per_second:,.0f} docs/sec) "
+                         f"with {config.n_workers} workers")
+            return mongo_batch_prediction_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e
@@ -1,10 +1,27 @@
+import os
 import sys
 from us_visa.components.data_ingestion import DataIngestion
-from us_visa.entity.config_entity import DataIngestionConfig, DataValidationConfig
-from us_visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from us_visa.components.data_transformation import DataTransformation
+from us_visa.components.model_evaluation import ModelEvaluation
+from us_visa.components.model_pusher import ModelPusher
+from us_visa.components.model_trainer import ModelTrainer
+from us_visa.data_access.trial_store import TrialStore
+from us_visa.data_access.usvisa_data import USvisaData
+from us_visa.entity.config_entity import (DataIngestionConfig, DataTransformationConfig, DataValidationConfig,
+                                          ModelEvaluationConfig, ModelPusherConfig, ModelTrainerConfig,
+                                          training_pipeline_config)
+from us_visa.entity.artifact_entity import (DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact,
+                                            ModelEvaluationArtifact, ModelPusherArtifact, ModelTrainerArtifact)
+from us_visa.entity.estimator import TargetValueMapping, USvisaModel
 from us_visa.exception import USvisaException
 from us_visa.logger import logging
 from us_visa.components.data_validation import DataValidation
+from us_visa.utils.dag_executor import DAGExecutor
+from us_visa.utils.instrumentation import annotate_step, reset_metrics, write_metrics
+from us_visa.utils import drift_utils, main_utils, model_search, resampling
+from us_visa.utils.main_utils import compute_file_hash
+from us_visa.utils.schema_validator import SchemaValidator
+from us_visa.utils.stage_cache import StageCache, get_code_version
 
 
 class TrainPipeline:
@@ -13,16 +30,69 @@ class TrainPipeline:
     data validation, and orchestrating subsequent training phases.
     """
 
-    def __init__(self):
+    def __init__(self, profile: bool = False):
         """
         Initializes the training pipeline with configurations for both data ingestion and validation.
 
+        Args:
+            profile (bool): Profile every stage with cProfile (also enabled by `TrainingPipelineConfig.profile`).
+
         Class Attributes:
+            training_pipeline_config (TrainingPipelineConfig): Run wide settings, including the stage cache.
             data_ingestion_config (DataIngestionConfig): Stores configuration settings required for the data ingestion process.
             data_validation_config (DataValidationConfig): Stores configuration settings required for the data validation process.
+            data_transformation_config (DataTransformationConfig): Stores configuration settings required for the data transformation process.
+            model_trainer_config (ModelTrainerConfig): Stores configuration settings required for the model training process.
+            model_evaluation_config (ModelEvaluationConfig): Stores configuration settings required for the model evaluation process.
+            model_pusher_config (ModelPusherConfig): Stores configuration settings required for the model pushing process.
+            stage_cache (StageCache): Cache of stage artifacts keyed by the hash of the stage inputs.
+            profile (bool): Whether every stage is profiled.
         """
+        self.training_pipeline_config = training_pipeline_config  # Run wide settings
         self.data_ingestion_config = DataIngestionConfig()  # Initialize data ingestion config
         self.data_validation_config = DataValidationConfig()  # Initialize data validation config
+        self.data_transformation_config = DataTransformationConfig()  # Initialize data transformation config
+        self.model_trainer_config = ModelTrainerConfig()  # Initialize model trainer config
+        self.model_evaluation_config = ModelEvaluationConfig()  # Initialize model evaluation config
+        self.model_pusher_config = ModelPusherConfig()  # Initialize model pusher config
+        self.stage_cache = StageCache(cache_dir=self.training_pipeline_config.stage_cache_dir)
+        self.profile = profile or self.training_pipeline_config.profile
+
+    def run_cached_stage(self, stage_name: str, artifact_class, config, code_version: str,
+                         data_fingerprint, run_stage):
+        """
+        Runs a stage unless an earlier run already produced its artifact from the same inputs.
+
+        The cache key combines the source data fingerprint, the schema.yaml hash, the stage config
+        values and the code version. Only successful stages are recorded, so after a failure the
+        next run reuses every stage that completed and resumes at the one that failed.
+
+        Args:
+            stage_name (str): Name of the stage, used to namespace its cache entries.
+            artifact_class: Dataclass of the stage's artifact.
+            config: The stage's config dataclass.
+            code_version (str): Hash of the code producing the stage's output.
+            data_fingerprint: JSON serializable description of the stage's input data.
+            run_stage (Callable): Computes the stage and returns its artifact.
+
+        Returns:
+            The cached or freshly computed artifact.
+        """
+        if not self.training_pipeline_config.use_stage_cache:
+            return run_stage()
+
+        key = self.stage_cache.make_key(stage_name=stage_name, data_fingerprint=data_fingerprint,
+                                        config=config, code_version=code_version)
+        artifact = self.stage_cache.load(stage_name=stage_name, key=key, artifact_class=artifact_class)
+        annotate_step(cached=artifact is not None)
+        if artifact is not None:
+            logging.info(f"Reusing cached {stage_name} artifact for key {key}: {artifact}")
+            return artifact
+
+        artifact = run_stage()
+        self.stage_cache.save(stage_name=stage_name, key=key, artifact=artifact)
+        logging.info(f"Cached {stage_name} artifact under key {key}")
+        return artifact
 
     def start_data_ingestion(self) -> DataIngestionArtifact:
         """
@@ -41,7 +111,18 @@ class TrainPipeline:
 
             # Create an instance of DataIngestion and initiate the ingestion process
             data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
-            data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            if self.data_ingestion_config.incremental:
+                # Incremental ingestion keeps its own state through the watermark
+                data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            else:
+                data_ingestion_artifact = self.run_cached_stage(
+                    stage_name="data_ingestion",
+                    artifact_class=DataIngestionArtifact,
+                    config=self.data_ingestion_config,
+                    code_version=get_code_version(DataIngestion, USvisaData, main_utils),
+                    data_fingerprint=USvisaData().get_collection_fingerprint(
+                        collection_name=self.data_ingestion_config.collection_name),
+                    run_stage=data_ingestion.initiate_data_ingestion)
 
             logging.info("Data ingestion completed successfully. Train and test datasets are prepared.")
             logging.info("Exiting the `start_data_ingestion` method of `TrainPipeline`.")
@@ -69,7 +150,18 @@ class TrainPipeline:
             # Create an instance of DataValidation and initialize the validation process
             data_validation = DataValidation(data_ingestion_artifact=data_ingestion_artifact,
                                              data_validation_config=self.data_validation_config)
-            data_validation_artifact = data_validation.initialize_data_validation()
+            baseline_profile_file_path = self.data_validation_config.baseline_profile_file_path
+            data_validation_artifact = self.run_cached_stage(
+                stage_name="data_validation",
+                artifact_class=DataValidationArtifact,
+                config=self.data_validation_config,
+                code_version=get_code_version(DataValidation, SchemaValidator, drift_utils, main_utils),
+                data_fingerprint={"train": compute_file_hash(data_ingestion_artifact.train_file_path),
+                                  "test": compute_file_hash(data_ingestion_artifact.test_file_path),
+                                  # The baseline drift status depends on the previous run's profile
+                                  "baseline_profile": compute_file_hash(baseline_profile_file_path)
+                                  if os.path.exists(baseline_profile_file_path) else None},
+                run_stage=data_validation.initialize_data_validation)
 
             logging.info("Data validation completed successfully.")
             logging.info("Exiting the `start_data_validation` method of `TrainPipeline`.")
@@ -78,28 +170,212 @@ class TrainPipeline:
         except Exception as e:
             raise USvisaException(e, sys) from e  # Handle and log errors
 
+    def start_data_transformation(self, data_ingestion_artifact: DataIngestionArtifact,
+                                  data_validation_artifact: DataValidationArtifact) -> DataTransformationArtifact:
+        """
+        Initiates the data transformation process, fitting the preprocessor on the training data and
+        writing the transformed train and test arrays.
+
+        Args:
+            data_ingestion_artifact (DataIngestionArtifact): The artifact containing paths to the ingested train and test data.
+            data_validation_artifact (DataValidationArtifact): The artifact containing the results of the validation process.
+
+        Returns:
+            DataTransformationArtifact: An artifact containing paths to the preprocessor and transformed arrays.
+
+        Raises:
+            USvisaException: If any error occurs during the data transformation process.
+        """
+        logging.info("Entered the `start_data_transformation` method of `TrainPipeline`.")
+        try:
+            data_transformation = DataTransformation(data_ingestion_artifact=data_ingestion_artifact,
+                                                     data_transformation_config=self.data_transformation_config,
+                                                     data_validation_artifact=data_validation_artifact)
+            data_transformation_artifact = self.run_cached_stage(
+                stage_name="data_transformation",
+                artifact_class=DataTransformationArtifact,
+                config=self.data_transformation_config,
+                code_version=get_code_version(DataTransformation, TargetValueMapping, resampling, main_utils),
+                data_fingerprint={"train": compute_file_hash(data_ingestion_artifact.train_file_path),
+                                  "test": compute_file_hash(data_ingestion_artifact.test_file_path),
+                                  "validation_status": data_validation_artifact.validation_status},
+                run_stage=data_transformation.initiate_data_transformation)
+
+            logging.info("Data transformation completed successfully.")
+            logging.info("Exiting the `start_data_transformation` method of `TrainPipeline`.")
+
+            return data_transformation_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e  # Handle and log errors
+
+    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact) -> ModelTrainerArtifact:
+        """
+        Initiates the model training process, searching the candidate models of the model config
+        and saving the best one.
+
+        Args:
+            data_transformation_artifact (DataTransformationArtifact): The artifact containing paths to the transformed data.
+
+        Returns:
+            ModelTrainerArtifact: An artifact containing the trained model path, search report and test metrics.
+
+        Raises:
+            USvisaException: If any error occurs during the model training process.
+        """
+        logging.info("Entered the `start_model_trainer` method of `TrainPipeline`.")
+        try:
+            model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
+                                         model_trainer_config=self.model_trainer_config)
+            model_trainer_artifact = self.run_cached_stage(
+                stage_name="model_trainer",
+                artifact_class=ModelTrainerArtifact,
+                config=self.model_trainer_config,
+                code_version=get_code_version(ModelTrainer, USvisaModel, TrialStore, model_search, resampling,
+                                              main_utils),
+                data_fingerprint={
+                    "train": compute_file_hash(data_transformation_artifact.transformed_train_file_path),
+                    "unresampled_train": compute_file_hash(
+                        data_transformation_artifact.transformed_unresampled_train_file_path)
+                    if data_transformation_artifact.transformed_unresampled_train_file_path else None,
+                    "test": compute_file_hash(data_transformation_artifact.transformed_test_file_path),
+                    "preprocessor": compute_file_hash(data_transformation_artifact.transformed_object_file_path),
+                    "model_config": compute_file_hash(self.model_trainer_config.model_config_file_path)},
+                run_stage=model_trainer.initiate_model_trainer)
+
+            logging.info("Model training completed successfully.")
+            logging.info("Exiting the `start_model_trainer` method of `TrainPipeline`.")
+
+            return model_trainer_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e  # Handle and log errors
+
+    def start_model_evaluation(self, data_ingestion_artifact: DataIngestionArtifact,
+                               model_trainer_artifact: ModelTrainerArtifact) -> ModelEvaluationArtifact:
+        """
+        Starts the model evaluation process, comparing the trained model with the production model
+        on the test split. Not cached: the production model can change between runs, and its test
+        predictions are cached by the stage itself.
+
+        Args:
+            data_ingestion_artifact (DataIngestionArtifact): The artifact containing the test split path.
+            model_trainer_artifact (ModelTrainerArtifact): The artifact containing the trained model path.
+
+        Returns:
+            ModelEvaluationArtifact: An artifact containing the acceptance decision and the evaluation report path.
+
+        Raises:
+            USvisaException: If any error occurs during the model evaluation process.
+        """
+        logging.info("Entered the `start_model_evaluation` method of `TrainPipeline`.")
+        try:
+            model_evaluation = ModelEvaluation(model_eval_config=self.model_evaluation_config,
+                                               data_ingestion_artifact=data_ingestion_artifact,
+                                               model_trainer_artifact=model_trainer_artifact)
+            model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
+            logging.info("Exiting the `start_model_evaluation` method of `TrainPipeline`.")
+            return model_evaluation_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e  # Handle and log errors
+
+    def start_model_pusher(self, data_transformation_artifact: DataTransformationArtifact,
+                           model_trainer_artifact: ModelTrainerArtifact,
+                           model_evaluation_artifact: ModelEvaluationArtifact):
+        """
+        Starts the model pushing process if the evaluation accepted the trained model.
+
+        Args:
+            data_transformation_artifact (DataTransformationArtifact): The artifact containing the preprocessing object path.
+            model_trainer_artifact (ModelTrainerArtifact): The artifact containing the trained model path.
+            model_evaluation_artifact (ModelEvaluationArtifact): The artifact containing the acceptance decision.
+
+        Returns:
+            Optional[ModelPusherArtifact]: The pushed model's location and version, None if the model was rejected.
+
+        Raises:
+            USvisaException: If any error occurs during the model pushing process.
+        """
+        logging.info("Entered the `start_model_pusher` method of `TrainPipeline`.")
+        try:
+            if not model_evaluation_artifact.is_model_accepted:
+                logging.info("Trained model is not better than the production model, not pushing it")
+                return None
+            model_pusher = ModelPusher(model_trainer_artifact=model_trainer_artifact,
+                                       data_transformation_artifact=data_transformation_artifact,
+                                       model_pusher_config=self.model_pusher_config)
+            model_pusher_artifact: ModelPusherArtifact = model_pusher.initiate_model_pusher()
+            logging.info("Exiting the `start_model_pusher` method of `TrainPipeline`.")
+            return model_pusher_artifact
+        except Exception as e:
+            raise USvisaException(e, sys) from e  # Handle and log errors
+
     def run_pipeline(self) -> None:
         """
-        Runs the entire training pipeline, starting from data ingestion to data validation.
+        Runs the entire training pipeline, starting from data ingestion to model training.
 
         Steps:
             1. Initiates data ingestion.
             2. Performs data validation after ingestion.
-            3. (In future implementations) Executes further training and evaluation tasks.
+            3. Transforms the validated data into feature arrays.
+            4. Searches and trains the best model.
+            5. Evaluates the trained model against the production model.
+            6. Pushes the trained model if it was accepted.
+
+        Wall time, CPU time, memory and row counts of every stage and sub-step are written to
+        `metrics.json` in the artifact directory, also when a stage fails; with profiling enabled,
+        a cProfile of every stage is written to the profile directory.
 
         Raises:
             USvisaException: If any error occurs while executing any step in the pipeline.
         """
         try:
             logging.info("Starting the training pipeline.")
+            reset_metrics(trace_memory=self.training_pipeline_config.trace_memory)
+            profile_dir = self.training_pipeline_config.profile_dir if self.profile else None
+
+            # Stages run as a dependency graph; each stage starts once the artifacts it needs exist
+            dag = DAGExecutor(name="training_pipeline", profile_dir=profile_dir)
 
             # Step 1: Start data ingestion
-            data_ingestion_artifact = self.start_data_ingestion()
+            dag.add_node("data_ingestion", self.start_data_ingestion)
 
             # Step 2: Start data validation
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+            dag.add_node("data_validation",
+                         lambda data_ingestion: self.start_data_validation(data_ingestion_artifact=data_ingestion),
+                         depends_on=("data_ingestion",))
+
+            # Step 3: Start data transformation
+            dag.add_node("data_transformation",
+                         lambda data_ingestion, data_validation: self.start_data_transformation(
+                             data_ingestion_artifact=data_ingestion, data_validation_artifact=data_validation),
+                         depends_on=("data_ingestion", "data_validation"))
+
+            # Step 4: Start model training
+            dag.add_node("model_trainer",
+                         lambda data_transformation: self.start_model_trainer(
+                             data_transformation_artifact=data_transformation),
+                         depends_on=("data_transformation",))
+
+            # Step 5: Start model evaluation
+            dag.add_node("model_evaluation",
+                         lambda data_ingestion, model_trainer: self.start_model_evaluation(
+                             data_ingestion_artifact=data_ingestion, model_trainer_artifact=model_trainer),
+                         depends_on=("data_ingestion", "model_trainer"))
+
+            # Step 6: Push the model if accepted
+            dag.add_node("model_pusher",
+                         lambda data_transformation, model_trainer, model_evaluation: self.start_model_pusher(
+                             data_transformation_artifact=data_transformation, model_trainer_artifact=model_trainer,
+                             model_evaluation_artifact=model_evaluation),
+                         depends_on=("data_transformation", "model_trainer", "model_evaluation"))
 
-            # Additional steps (e.g., model training) will follow here in future implementations.
+            try:
+                dag.run()
+            finally:
+                write_metrics(self.training_pipeline_config.metrics_file_path,
+                              pipeline=self.training_pipeline_config.pipline_name,
+                              artifact_dir=self.training_pipeline_config.artifact_dir,
+                              profile_dir=profile_dir)
+            dag.write_trace(file_path=self.training_pipeline_config.trace_file_path)
 
             logging.info("Training pipeline execution completed successfully.")
         except Exception as e:
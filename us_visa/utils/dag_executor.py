@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.instrumentation import measure
+from us_visa.utils.main_utils import write_yaml_file
+
+
+@dataclass
+class DAGNode:
+    """A unit of work in a `DAGExecutor` graph.
+
+    Attributes:
+        name (str): Unique name of the node.
+        func (Callable): Called with the results of its dependencies as keyword arguments, keyed by node name.
+        depends_on (tuple): Names of the nodes that must finish before this one starts.
+        executor (str): "thread" or "process". Process nodes need a picklable function and inputs.
+    """
+    name: str
+    func: Callable
+    depends_on: tuple = field(default_factory=tuple)
+    executor: str = "thread"
+
+
+class DAGExecutor:
+    """
+    Runs a graph of dependent tasks, starting every node as soon as all of its dependencies
+    have finished, so independent nodes run concurrently on a thread or process pool.
+
+    Every run records a timing trace (start, end and duration of each node relative to the
+    start of the run) from which the critical path, the chain of dependent nodes that
+    determined the total wall time, is derived. Thread nodes are also measured as steps
+    `<dag name>.<node name>` of the current run's metrics (see `us_visa.utils.instrumentation`),
+    with their row count when they return a DataFrame or array.
+
+    Example:
+        dag = DAGExecutor(name="validation")
+        dag.add_node("train", lambda: read_data(train_file_path))
+        dag.add_node("test", lambda: read_data(test_file_path))
+        dag.add_node("drift", lambda train, test: detect_drift(train, test), depends_on=("train", "test"))
+        results = dag.run()  # train and test load concurrently, drift starts when both are loaded
+    """
+
+    def __init__(self, name: str = "dag", max_workers: Optional[int] = None, profile_dir: Optional[str] = None):
+        """
+        Args:
+            name (str): Name of the graph, used in logs, the trace and the step names.
+            max_workers (Optional[int]): Size of each pool. Defaults to the executor's default.
+            profile_dir (Optional[str]): If set, every thread node is profiled with cProfile into
+                `<profile_dir>/<node name>.prof`.
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.profile_dir = profile_dir
+        self.nodes = {}
+        self.trace = []
+
+    def add_node(self, name: str, func: Callable, depends_on=(), executor: str = "thread") -> "DAGExecutor":
+        """
+        Adds a node to the graph.
+
+        Args:
+            name (str): Unique name of the node; its result is passed to dependants under this keyword.
+            func (Callable): The work to run.
+            depends_on (Iterable[str]): Names of nodes whose results `func` receives.
+            executor (str): "thread" or "process".
+
+        Returns:
+            DAGExecutor: The executor, to allow chaining.
+
+        Raises:
+            ValueError: If the node name is taken, a dependency is unknown or the executor is invalid.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Node {name} is already defined in {self.name}")
+        missing = [dependency for dependency in depends_on if dependency not in self.nodes]
+        if missing:
+            raise ValueError(f"Node {name} depends on unknown nodes {missing}; add dependencies first")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor {executor} for node {name}")
+        self.nodes[name] = DAGNode(name=name, func=func, depends_on=tuple(depends_on), executor=executor)
+        return self
+
+    def _run_node(self, node: DAGNode, kwargs: dict):
+        """Runs a thread node as a measured (and optionally profiled) step."""
+        profile_file_path = os.path.join(self.profile_dir, f"{node.name}.prof") if self.profile_dir else None
+        with measure(f"{self.name}.{node.name}", profile_file_path=profile_file_path) as step:
+            result = node.func(**kwargs)
+            shape = getattr(result, "shape", None)
+            if isinstance(shape, tuple) and shape:
+                step["rows"] = shape[0]
+            return result
+
+    def run(self) -> dict:
+        """
+        Runs all nodes, respecting their dependencies.
+
+        Returns:
+            dict: Result of every node, keyed by node name.
+
+        Raises:
+            USvisaException: If any node fails. Nodes that have not started yet are cancelled.
+        """
+        results, running = {}, {}
+        pending = dict(self.nodes)
+        self.trace = []
+        run_start = time.perf_counter()
+        pools = {"thread": ThreadPoolExecutor(max_workers=self.max_workers)}
+        try:
+            while pending or running:
+                # Submit every node whose dependencies have all finished
+                for name, node in list(pending.items()):
+                    if all(dependency in results for dependency in node.depends_on):
+                        if node.executor not in pools:
+                            pools[node.executor] = ProcessPoolExecutor(max_workers=self.max_workers)
+                        kwargs = {dependency: results[dependency] for dependency in node.depends_on}
+                        if node.executor == "thread":
+                            future = pools[node.executor].submit(self._run_node, node, kwargs)
+                        else:
+                            # Process nodes must stay picklable, they are only timed by the trace
+                            future = pools[node.executor].submit(node.func, **kwargs)
+                        running[future] = (node, time.perf_counter() - run_start)
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node, start = running.pop(future)
+                    end = time.perf_counter() - run_start
+                    results[node.name] = future.result()
+                    self.trace.append({"node": node.name, "executor": node.executor,
+                                       "depends_on": list(node.depends_on), "start": round(start, 6),
+                                       "end": round(end, 6), "duration": round(end - start, 6)})
+                    logging.info(f"[{self.name}] {node.name} finished in {end - start:.3f}s")
+            return results
+        except Exception as e:
+            for future in running:
+                future.cancel()
+            raise USvisaException(e, sys) from e
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def critical_path(self) -> list:
+        """
+        Returns the critical path of the last run: starting from the node that finished last,
+        repeatedly follows the dependency that finished last.
+
+        Returns:
+            list: Node names from the first to the last node of the path.
+        """
+        if not self.trace:
+            return []
+        timings = {entry["node"]: entry for entry in self.trace}
+        path = [max(self.trace, key=lambda entry: entry["end"])["node"]]
+        while timings[path[-1]]["depends_on"]:
+            path.append(max(timings[path[-1]]["depends_on"], key=lambda name: timings[name]["end"]))
+        return path[::-1]
+
+    def write_trace(self, file_path: str):
+        """
+        Writes the timing trace and critical path of the last run to a YAML file.
+
+        Args:
+            file_path (str): The path to the trace file.
+        """
+        total = max((entry["end"] for entry in self.trace), default=0.0)
+        critical_path = self.critical_path()
+        write_yaml_file(file_path=file_path, content={
+            "dag": self.name,
+            "wall_time": total,
+            "busy_time": round(sum(entry["duration"] for entry in self.trace), 6),
+            "critical_path": critical_path,
+            "nodes": sorted(self.trace, key=lambda entry: entry["start"]),
+        }, replace=True)
+        logging.info(f"[{self.name}] wall time {total:.3f}s, critical path: {' -> '.join(critical_path)}")
@@ -0,0 +1,374 @@
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from scipy import stats
+
+from us_visa.exception import USvisaException
+
+# Epsilon used for empty bins when computing the population stability index
+PSI_EPSILON = 1e-4
+
+
+def sample_indices(n_rows: int, sample_size: int, random_state: int = 42) -> np.ndarray:
+    """
+    Draws a uniform sample of row positions without replacement.
+
+    Args:
+        n_rows (int): Number of rows in the input.
+        sample_size (int): Number of rows to sample.
+        random_state (int): Seed of the random generator.
+
+    Returns:
+        np.ndarray: Sorted row positions of the sample (all rows if `n_rows <= sample_size`).
+    """
+    if n_rows <= sample_size:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_rows, size=sample_size, replace=False))
+
+
+def ks_test(reference: np.ndarray, current: np.ndarray) -> tuple:
+    """
+    Two-sample Kolmogorov-Smirnov test for every column of two numeric matrices at once.
+
+    Both samples are ranked together with one argsort per column; the difference of the two
+    empirical CDFs is the cumulative sum of +1/n (reference) and -1/m (current) steps, read at
+    the last position of every run of tied values.
+
+    Args:
+        reference (np.ndarray): Reference sample, shape (n, k), without NaN.
+        current (np.ndarray): Current sample, shape (m, k), without NaN.
+
+    Returns:
+        tuple: KS statistics and asymptotic p-values, each of shape (k,).
+    """
+    n, m = len(reference), len(current)
+    combined = np.concatenate([reference, current], axis=0)
+    order = np.argsort(combined, axis=0, kind="stable")
+    sorted_values = np.take_along_axis(combined, order, axis=0)
+    steps = np.where(order < n, 1.0 / n, -1.0 / m)
+    cdf_difference = np.cumsum(steps, axis=0)
+    # Only compare the CDFs after the last of several tied values
+    last_of_ties = np.ones_like(sorted_values, dtype=bool)
+    last_of_ties[:-1] = sorted_values[1:] != sorted_values[:-1]
+    statistic = np.abs(np.where(last_of_ties, cdf_difference, 0.0)).max(axis=0)
+    effective_size = np.round(n * m / (n + m))
+    p_value = stats.kstwo.sf(statistic, effective_size)
+    return statistic, p_value
+
+
+def chi_square_test(reference_counts: np.ndarray, current_counts: np.ndarray) -> tuple:
+    """
+    Chi-square goodness of fit of the current category counts against the reference proportions,
+    as done by Evidently's data drift profile. A category absent from the reference but present in
+    the current data yields an infinite statistic and a p-value of 0.
+
+    Args:
+        reference_counts (np.ndarray): Count of every category in the reference data.
+        current_counts (np.ndarray): Count of the same categories in the current data.
+
+    Returns:
+        tuple: The chi-square statistic and p-value.
+    """
+    expected = reference_counts * (current_counts.sum() / reference_counts.sum())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(expected > 0, (current_counts - expected) ** 2 / expected,
+                         np.where(current_counts > 0, np.inf, 0.0))
+    statistic = float(terms.sum())
+    p_value = float(stats.chi2.sf(statistic, max(len(reference_counts) - 1, 1)))
+    return statistic, p_value
+
+
+def population_stability_index(reference_counts: np.ndarray, current_counts: np.ndarray) -> float:
+    """
+    Population stability index between two binned distributions.
+
+    Args:
+        reference_counts (np.ndarray): Reference count per bin or category.
+        current_counts (np.ndarray): Current count per bin or category.
+
+    Returns:
+        float: The PSI; values above 0.2 are usually read as a significant shift.
+    """
+    reference_share = np.clip(reference_counts / max(reference_counts.sum(), 1), PSI_EPSILON, None)
+    current_share = np.clip(current_counts / max(current_counts.sum(), 1), PSI_EPSILON, None)
+    return float(np.sum((current_share - reference_share) * np.log(current_share / reference_share)))
+
+
+def quantile_bin_counts(reference: np.ndarray, current: np.ndarray, n_bins: int) -> tuple:
+    """
+    Counts both samples in bins delimited by the reference quantiles.
+
+    Args:
+        reference (np.ndarray): Reference values of one column.
+        current (np.ndarray): Current values of the same column.
+        n_bins (int): Number of quantile bins.
+
+    Returns:
+        tuple: Inner bin edges, reference counts and current counts.
+    """
+    edges = np.unique(np.quantile(reference, np.linspace(0, 1, n_bins + 1))[1:-1])
+    reference_counts = np.bincount(np.searchsorted(edges, reference, side="right"), minlength=len(edges) + 1)
+    current_counts = np.bincount(np.searchsorted(edges, current, side="right"), minlength=len(edges) + 1)
+    return edges, reference_counts, current_counts
+
+
+def align_category_counts(reference_counts: pd.Series, current_counts: pd.Series) -> tuple:
+    """
+    Aligns two category frequency tables on the union of their labels. Labels counted in neither
+    table (unused categories of a categorical dtype) are dropped, since they would add degrees of
+    freedom to the chi-square test without adding evidence, and weaken it.
+
+    Args:
+        reference_counts (pd.Series): Reference count per category.
+        current_counts (pd.Series): Current count per category.
+
+    Returns:
+        tuple: Category labels, reference counts and current counts.
+    """
+    labels = reference_counts.index.union(current_counts.index)
+    reference_counts = reference_counts.reindex(labels, fill_value=0).to_numpy(dtype=np.float64)
+    current_counts = current_counts.reindex(labels, fill_value=0).to_numpy(dtype=np.float64)
+    observed = (reference_counts > 0) | (current_counts > 0)
+    return labels[observed], reference_counts[observed], current_counts[observed]
+
+
+def category_counts(reference: pd.Series, current: pd.Series) -> tuple:
+    """
+    Counts the categories of two columns over the union of their observed categories, ignoring missing values.
+
+    Args:
+        reference (pd.Series): Reference column.
+        current (pd.Series): Current column.
+
+    Returns:
+        tuple: Category labels, reference counts and current counts.
+    """
+    return align_category_counts(reference.value_counts(dropna=True), current.value_counts(dropna=True))
+
+
+def summarize_drift(feature_reports: dict, drift_share: float) -> dict:
+    """
+    Builds the dataset level summary in the layout of Evidently's data drift profile metrics.
+
+    Args:
+        feature_reports (dict): Per-feature results, each holding a `drift_detected` flag.
+        drift_share (float): Share of drifted features from which the dataset is considered drifted.
+
+    Returns:
+        dict: `n_features`, `n_drifted_features`, `share_drifted_features`, `dataset_drift` and the
+        per-feature results.
+    """
+    n_features = len(feature_reports)
+    n_drifted_features = sum(report["drift_detected"] for report in feature_reports.values())
+    share_drifted_features = n_drifted_features / n_features if n_features else 0.0
+    return {
+        "n_features": n_features,
+        "n_drifted_features": n_drifted_features,
+        "share_drifted_features": share_drifted_features,
+        "dataset_drift": bool(n_features and share_drifted_features >= drift_share),
+        **feature_reports,
+    }
+
+
+def calculate_data_drift(reference_df: DataFrame, current_df: DataFrame,
+                         numerical_columns: list, categorical_columns: list,
+                         threshold: float = 0.05, drift_share: float = 0.5,
+                         n_bins: int = 10, sample_size: Optional[int] = None,
+                         random_state: int = 42) -> dict:
+    """
+    Computes per-feature drift between two dataframes: Kolmogorov-Smirnov for numerical columns,
+    chi-square for categorical columns and the PSI for both. A feature drifts when its test p-value
+    is below `threshold`; the dataset drifts when the share of drifted features reaches `drift_share`.
+    Identifier columns (every reference value distinct) are skipped since they always differ.
+
+    Args:
+        reference_df (DataFrame): Reference data (usually training data).
+        current_df (DataFrame): Current data (usually test data).
+        numerical_columns (list): Numerical columns to compare.
+        categorical_columns (list): Categorical columns to compare.
+        threshold (float): p-value under which a feature is considered drifted.
+        drift_share (float): Share of drifted features from which the dataset is considered drifted.
+        n_bins (int): Number of reference quantile bins used for the numerical PSI.
+        sample_size (Optional[int]): If set, frames with more rows are sampled down to this size.
+        random_state (int): Seed of the sampling.
+
+    Returns:
+        dict: The drift summary, see `summarize_drift`.
+
+    Raises:
+        USvisaException: If the drift cannot be computed.
+    """
+    try:
+        if sample_size is not None:
+            reference_df = reference_df.iloc[sample_indices(len(reference_df), sample_size, random_state)]
+            current_df = current_df.iloc[sample_indices(len(current_df), sample_size, random_state + 1)]
+
+        feature_reports = {}
+
+        numerical_columns = [column for column in numerical_columns
+                             if column in reference_df.columns and column in current_df.columns]
+        if numerical_columns:
+            reference = reference_df[numerical_columns].to_numpy(dtype=np.float64)
+            current = current_df[numerical_columns].to_numpy(dtype=np.float64)
+            if np.isnan(reference).any() or np.isnan(current).any():
+                # Columns with missing values have different lengths once NaNs are dropped
+                results = [ks_test(reference[~np.isnan(reference[:, i]), i:i + 1],
+                                   current[~np.isnan(current[:, i]), i:i + 1]) for i in range(len(numerical_columns))]
+                statistics = np.array([result[0][0] for result in results])
+                p_values = np.array([result[1][0] for result in results])
+            else:
+                statistics, p_values = ks_test(reference, current)
+
+            for i, column in enumerate(numerical_columns):
+                reference_values = reference[~np.isnan(reference[:, i]), i]
+                current_values = current[~np.isnan(current[:, i]), i]
+                _, reference_counts, current_counts = quantile_bin_counts(reference_values, current_values, n_bins)
+                feature_reports[column] = {
+                    "feature_type": "num",
+                    "stattest_name": "K-S p_value",
+                    "statistic": float(statistics[i]),
+                    "p_value": float(p_values[i]),
+                    "psi": population_stability_index(reference_counts, current_counts),
+                    "drift_detected": bool(p_values[i] < threshold),
+                }
+
+        for column in categorical_columns:
+            if column not in reference_df.columns or column not in current_df.columns:
+                continue
+            if reference_df[column].nunique() == len(reference_df):
+                continue
+            _, reference_counts, current_counts = category_counts(reference_df[column], current_df[column])
+            statistic, p_value = chi_square_test(reference_counts, current_counts)
+            feature_reports[column] = {
+                "feature_type": "cat",
+                "stattest_name": "chi-square p_value",
+                "statistic": statistic,
+                "p_value": p_value,
+                "psi": population_stability_index(reference_counts, current_counts),
+                "drift_detected": bool(p_value < threshold),
+            }
+
+        return summarize_drift(feature_reports, drift_share)
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+
+def build_reference_profile(reference_df: DataFrame, numerical_columns: list, categorical_columns: list,
+                            n_bins: int = 100) -> dict:
+    """
+    Summarizes the reference data into a compact, YAML serializable profile: fixed quantile-bin
+    histograms for numerical columns and frequency tables for categorical columns. Drift of a new
+    batch can then be computed against the profile without loading the reference data again.
+
+    Args:
+        reference_df (DataFrame): Reference data (usually training data).
+        numerical_columns (list): Numerical columns to profile.
+        categorical_columns (list): Categorical columns to profile. Identifier columns are skipped.
+        n_bins (int): Number of quantile bins per numerical column.
+
+    Returns:
+        dict: The reference profile.
+
+    Raises:
+        USvisaException: If the profile cannot be built.
+    """
+    try:
+        profile = {"n_rows": len(reference_df), "n_bins": n_bins, "numerical": {}, "categorical": {}}
+        for column in numerical_columns:
+            if column not in reference_df.columns:
+                continue
+            values = reference_df[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1))[1:-1]) if len(values) else np.array([])
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            profile["numerical"][column] = {
+                "edges": edges.tolist(),
+                "counts": counts.tolist(),
+                "missing": int(len(reference_df) - len(values)),
+                "min": float(values.min()) if len(values) else None,
+                "max": float(values.max()) if len(values) else None,
+            }
+        for column in categorical_columns:
+            if column not in reference_df.columns or reference_df[column].nunique() == len(reference_df):
+                continue
+            counts = reference_df[column].value_counts(dropna=True)
+            # Unused categories of a categorical dtype are not part of the reference distribution
+            counts = counts[counts > 0]
+            profile["categorical"][column] = {
+                "categories": [str(category) for category in counts.index],
+                "counts": counts.to_numpy().tolist(),
+                "missing": int(reference_df[column].isna().sum()),
+            }
+        return profile
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+
+def calculate_data_drift_from_profile(reference_profile: dict, current_df: DataFrame,
+                                      threshold: float = 0.05, drift_share: float = 0.5) -> dict:
+    """
+    Computes per-feature drift of a batch against a reference profile, in time and memory that
+    depend only on the batch size. Numerical columns are compared with a Kolmogorov-Smirnov test on
+    the profile's bin edges (exact at the edges, so the statistic is at most one bin width below the
+    raw data statistic) and categorical columns with a chi-square test on the frequency tables.
+
+    Args:
+        reference_profile (dict): Profile built by `build_reference_profile`.
+        current_df (DataFrame): The new batch.
+        threshold (float): p-value under which a feature is considered drifted.
+        drift_share (float): Share of drifted features from which the dataset is considered drifted.
+
+    Returns:
+        dict: The drift summary, see `summarize_drift`.
+
+    Raises:
+        USvisaException: If the drift cannot be computed.
+    """
+    try:
+        feature_reports = {}
+        for column, histogram in reference_profile["numerical"].items():
+            if column not in current_df.columns:
+                continue
+            values = current_df[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            edges = np.asarray(histogram["edges"], dtype=np.float64)
+            reference_counts = np.asarray(histogram["counts"], dtype=np.float64)
+            current_counts = np.bincount(np.searchsorted(edges, values, side="right"),
+                                         minlength=len(edges) + 1).astype(np.float64)
+            n, m = reference_counts.sum(), current_counts.sum()
+            if n == 0 or m == 0:
+                continue
+            statistic = float(np.abs(np.cumsum(reference_counts) / n - np.cumsum(current_counts) / m).max())
+            p_value = float(stats.kstwo.sf(statistic, np.round(n * m / (n + m))))
+            feature_reports[column] = {
+                "feature_type": "num",
+                "stattest_name": "K-S p_value (binned)",
+                "statistic": statistic,
+                "p_value": p_value,
+                "psi": population_stability_index(reference_counts, current_counts),
+                "drift_detected": bool(p_value < threshold),
+            }
+
+        for column, frequencies in reference_profile["categorical"].items():
+            if column not in current_df.columns:
+                continue
+            reference_counts = pd.Series(frequencies["counts"], index=frequencies["categories"], dtype=np.float64)
+            current_counts = current_df[column].dropna().astype(str).value_counts()
+            _, reference_counts, current_counts = align_category_counts(reference_counts, current_counts)
+            statistic, p_value = chi_square_test(reference_counts, current_counts)
+            feature_reports[column] = {
+                "feature_type": "cat",
+                "stattest_name": "chi-square p_value",
+                "statistic": statistic,
+                "p_value": p_value,
+                "psi": population_stability_index(reference_counts, current_counts),
+                "drift_detected": bool(p_value < threshold),
+            }
+
+        return summarize_drift(feature_reports, drift_share)
+    except Exception as e:
+        raise USvisaException(e, sys) from e
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# A test row falls in one of 8 cells: (true label, prediction of model A, prediction of model B)
+N_CELLS = 8
+
+
+def get_outcome_cells(y_true: np.ndarray, y_pred_a: np.ndarray, y_pred_b: np.ndarray) -> np.ndarray:
+    """
+    Encodes every test row as its joint outcome cell `4 * y_true + 2 * y_pred_a + y_pred_b`.
+
+    Args:
+        y_true (np.ndarray): Binary true labels.
+        y_pred_a (np.ndarray): Binary predictions of the first model.
+        y_pred_b (np.ndarray): Binary predictions of the second model.
+
+    Returns:
+        np.ndarray: Cell of every row, in [0, 8).
+    """
+    return (4 * np.asarray(y_true, dtype=np.int64) + 2 * np.asarray(y_pred_a, dtype=np.int64)
+            + np.asarray(y_pred_b, dtype=np.int64))
+
+
+def scores_from_cell_counts(cell_counts: np.ndarray) -> dict:
+    """
+    Computes F1, precision and recall of both models from joint outcome cell counts, for any
+    number of samples at once.
+
+    Args:
+        cell_counts (np.ndarray): Counts of the 8 cells, shape (8,) or (n_samples, 8).
+
+    Returns:
+        dict: `{"a": {"f1_score", "precision_score", "recall_score"}, "b": {...}}`, arrays of shape (n_samples,)
+            or scalars.
+    """
+    counts = np.asarray(cell_counts, dtype=np.float64).reshape(-1, 2, 2, 2)  # (sample, true, pred_a, pred_b)
+    scores = {}
+    for model, axis in (("a", 3), ("b", 2)):
+        # Sum out the other model's prediction: (sample, true, pred)
+        confusion = counts.sum(axis=axis)
+        tp, fp, fn = confusion[:, 1, 1], confusion[:, 0, 1], confusion[:, 1, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores[model] = {
+                "f1_score": np.nan_to_num(2 * tp / (2 * tp + fp + fn)),
+                "precision_score": np.nan_to_num(tp / (tp + fp)),
+                "recall_score": np.nan_to_num(tp / (tp + fn)),
+            }
+    if np.ndim(cell_counts) == 1:
+        scores = {model: {name: float(value[0]) for name, value in values.items()} for model, values in scores.items()}
+    return scores
+
+
+def bootstrap_score_difference(cells: np.ndarray, n_bootstrap: int, confidence_level: float, n_jobs: int = -1,
+                               chunk_size: int = 10000, random_state: int = 42, metric: str = "f1_score") -> dict:
+    """
+    Bootstrap confidence interval of `metric(model a) - metric(model b)` on a test set.
+
+    Resampling n rows with replacement only matters through how many resampled rows fall in each
+    of the 8 joint outcome cells, and those counts follow a multinomial distribution with the
+    observed cell frequencies. Every resample is therefore drawn as 8 multinomial counts instead
+    of n row indices, so its cost does not depend on the test set size. Resamples are drawn in
+    chunks of `chunk_size`, on `n_jobs` threads with independent seeded streams.
+
+    Args:
+        cells (np.ndarray): Joint outcome cell of every test row, see `get_outcome_cells`.
+        n_bootstrap (int): Number of bootstrap resamples.
+        confidence_level (float): Coverage of the interval, e.g. 0.95.
+        n_jobs (int): Threads drawing resamples; -1 uses all cores.
+        chunk_size (int): Resamples drawn per task.
+        random_state (int): Seed of the resamples.
+        metric (str): "f1_score", "precision_score" or "recall_score".
+
+    Returns:
+        dict: The observed difference, its bootstrap standard error and interval bounds, and the share of
+            resamples where model a scores higher.
+    """
+    n_rows = len(cells)
+    frequencies = np.bincount(cells, minlength=N_CELLS) / n_rows
+    n_chunks = -(-n_bootstrap // chunk_size)
+    seeds = np.random.SeedSequence(random_state).spawn(n_chunks)
+    sizes = [min(chunk_size, n_bootstrap - i * chunk_size) for i in range(n_chunks)]
+
+    def draw(seed, size):
+        counts = np.random.default_rng(seed).multinomial(n_rows, frequencies, size=size)
+        scores = scores_from_cell_counts(counts)
+        return scores["a"][metric] - scores["b"][metric]
+
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        differences = np.concatenate(list(executor.map(draw, seeds, sizes)))
+
+    observed = scores_from_cell_counts(np.bincount(cells, minlength=N_CELLS))
+    alpha = (1 - confidence_level) / 2
+    lower, upper = np.quantile(differences, [alpha, 1 - alpha])
+    return {
+        "metric": metric,
+        "difference": observed["a"][metric] - observed["b"][metric],
+        "standard_error": float(differences.std(ddof=1)),
+        "ci_lower": float(lower),
+        "ci_upper": float(upper),
+        "confidence_level": confidence_level,
+        "prob_a_better": float((differences > 0).mean()),
+        "n_bootstrap": n_bootstrap,
+    }
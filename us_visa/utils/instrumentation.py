@@ -0,0 +1,251 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional
+
+from us_visa.logger import logging
+
+_MB = 1024 * 1024
+
+
+def get_rss_bytes() -> Optional[int]:
+    """Returns the current resident set size of the process (Linux), or None where /proc is missing."""
+    try:
+        with open("/proc/self/statm", "rb") as file_obj:
+            return int(file_obj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def get_peak_rss_bytes() -> Optional[int]:
+    """Returns the largest resident set size the process reached so far, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def get_children_cpu_seconds() -> float:
+    """Returns the CPU time of the finished child processes (e.g. process pool workers)."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _to_mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / _MB, 1)
+
+
+class MetricsRecorder:
+    """
+    Records wall time, CPU time, memory and row counts of named steps, for example the stages of
+    `TrainPipeline` and their sub-steps.
+
+    Each step records:
+        - wall time;
+        - CPU time of the whole process, of the step's own thread, and of child processes that
+          finished during the step;
+        - resident set size at start and end, and the peak sampled every `sample_interval` seconds
+          by a background thread while steps run;
+        - optionally, the peak of the Python allocations traced by tracemalloc;
+        - the rows it reported, and any other field set through `annotate`.
+
+    Steps may nest and run concurrently. Process-wide figures (process CPU time, memory) then
+    include the concurrent steps' share. A step can also be profiled with cProfile; the profile
+    only covers the step's own thread.
+
+    Example:
+        recorder = MetricsRecorder()
+        with recorder.measure("data_ingestion.export") as step:
+            dataframe = export()
+            step["rows"] = len(dataframe)
+        recorder.write(file_path)
+    """
+
+    def __init__(self, sample_interval: float = 0.01, trace_memory: bool = False):
+        """
+        Args:
+            sample_interval (float): Seconds between resident set size samples while steps run.
+            trace_memory (bool): Record the peak Python allocations of every step with tracemalloc.
+        """
+        self.sample_interval = sample_interval
+        self.trace_memory = trace_memory
+        self.steps = []
+        self.start_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+        self.start_children_cpu_time = get_children_cpu_seconds()
+        self._lock = threading.Lock()
+        self._active = []
+        self._sampler = None
+        self._local = threading.local()
+
+    def _sample(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                rss = get_rss_bytes()
+                for entry in self._active:
+                    entry["_peak_rss"] = max(entry["_peak_rss"], rss)
+            time.sleep(self.sample_interval)
+
+    def _fold_traced_peak(self):
+        # tracemalloc has one process-wide peak; it is folded into every running step before a reset
+        peak = tracemalloc.get_traced_memory()[1]
+        for entry in self._active:
+            entry["_peak_traced"] = max(entry["_peak_traced"], peak)
+
+    def _start_step(self, entry: dict):
+        with self._lock:
+            entry["_peak_rss"] = entry["_rss_start"] = get_rss_bytes() or 0
+            if self.trace_memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                self._fold_traced_peak()
+                tracemalloc.reset_peak()
+                entry["_traced_start"] = entry["_peak_traced"] = tracemalloc.get_traced_memory()[0]
+            self._active.append(entry)
+            if self._sampler is None and entry["_rss_start"]:
+                self._sampler = threading.Thread(target=self._sample, name="metrics-sampler", daemon=True)
+                self._sampler.start()
+
+    def _end_step(self, entry: dict):
+        with self._lock:
+            rss = get_rss_bytes()
+            entry["_peak_rss"] = max(entry["_peak_rss"], rss or 0)
+            if self.trace_memory and tracemalloc.is_tracing():
+                self._fold_traced_peak()
+                entry["peak_traced_mb"] = _to_mb(entry["_peak_traced"] - entry["_traced_start"])
+            self._active.remove(entry)
+            entry["rss_start_mb"] = _to_mb(entry["_rss_start"] or None)
+            entry["rss_end_mb"] = _to_mb(rss)
+            entry["peak_rss_mb"] = _to_mb(entry["_peak_rss"] or None)
+            for key in [key for key in entry if key.startswith("_")]:
+                del entry[key]
+            self.steps.append(entry)
+
+    @contextmanager
+    def measure(self, name: str, rows: Optional[int] = None, profile_file_path: Optional[str] = None):
+        """
+        Measures the enclosed block as step `name`.
+
+        Args:
+            name (str): Name of the step, by convention `<stage>.<sub-step>`.
+            rows (Optional[int]): Rows processed, if known up front; can also be set on the yielded dict.
+            profile_file_path (Optional[str]): If set, the step is profiled with cProfile and the
+                statistics are written to this `.prof` file, with a text summary next to it.
+
+        Yields:
+            dict: The step's record, to which fields such as "rows" can be added.
+        """
+        entry = {"name": name, "start": round(time.perf_counter() - self.start_time, 4), "rows": rows}
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(entry)
+        self._start_step(entry)
+        wall_start, cpu_start, thread_cpu_start = time.perf_counter(), time.process_time(), time.thread_time()
+        children_cpu_start = get_children_cpu_seconds()
+        profiler = cProfile.Profile() if profile_file_path else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield entry
+            entry["status"] = "ok"
+        except BaseException:
+            entry["status"] = "failed"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            entry["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+            entry["cpu_seconds"] = round(time.process_time() - cpu_start, 4)
+            entry["thread_cpu_seconds"] = round(time.thread_time() - thread_cpu_start, 4)
+            entry["children_cpu_seconds"] = round(get_children_cpu_seconds() - children_cpu_start, 4)
+            if profiler is not None:
+                self.write_profile(profiler, profile_file_path)
+                entry["profile_file_path"] = profile_file_path
+            stack.pop()
+            self._end_step(entry)
+
+    @staticmethod
+    def write_profile(profiler: cProfile.Profile, file_path: str, top: int = 50):
+        """Writes the statistics of a profiler to `file_path` and its `top` functions by cumulative time to a `.txt` file."""
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        profiler.dump_stats(file_path)
+        with open(os.path.splitext(file_path)[0] + ".txt", "w") as file_obj:
+            pstats.Stats(profiler, stream=file_obj).sort_stats("cumulative").print_stats(top)
+
+    def annotate(self, **fields):
+        """Adds fields (e.g. `rows=...`, `cached=True`) to the innermost step running in the calling thread."""
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            stack[-1].update(fields)
+
+    def get_metrics(self, **run_info) -> dict:
+        """
+        Returns the run totals and the recorded steps, ordered by start time.
+
+        Args:
+            **run_info: Fields added to the run totals, e.g. the artifact directory.
+        """
+        with self._lock:
+            steps = sorted(self.steps, key=lambda entry: entry["start"])
+        run = dict(run_info,
+                   wall_seconds=round(time.perf_counter() - self.start_time, 4),
+                   cpu_seconds=round(time.process_time() - self.start_cpu_time, 4),
+                   children_cpu_seconds=round(get_children_cpu_seconds() - self.start_children_cpu_time, 4),
+                   peak_rss_mb=_to_mb(get_peak_rss_bytes()))
+        return {"run": run, "steps": steps}
+
+    def write(self, file_path: str, **run_info) -> dict:
+        """Writes `get_metrics` to a JSON file and returns it."""
+        metrics = self.get_metrics(**run_info)
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, "w") as file_obj:
+            json.dump(metrics, file_obj, indent=2)
+        return metrics
+
+
+# Recorder shared by the pipeline and its components, replaced by `reset_metrics` at the start of a run
+_recorder = MetricsRecorder()
+
+
+def reset_metrics(trace_memory: bool = False) -> MetricsRecorder:
+    """Starts recording a new run, discarding the steps recorded so far."""
+    global _recorder
+    _recorder = MetricsRecorder(trace_memory=trace_memory)
+    return _recorder
+
+
+def get_recorder() -> MetricsRecorder:
+    return _recorder
+
+
+def measure(name: str, rows: Optional[int] = None, profile_file_path: Optional[str] = None):
+    """Measures the enclosed block as a step of the current run, see `MetricsRecorder.measure`."""
+    return _recorder.measure(name, rows=rows, profile_file_path=profile_file_path)
+
+
+def annotate_step(**fields):
+    """Adds fields to the innermost step running in the calling thread, see `MetricsRecorder.annotate`."""
+    _recorder.annotate(**fields)
+
+
+def write_metrics(file_path: str, **run_info) -> dict:
+    """Writes the metrics of the current run to a JSON file, logging a line per step."""
+    metrics = _recorder.write(file_path, **run_info)
+    for entry in metrics["steps"]:
+        logging.info(f"[metrics] {entry['name']}: wall {entry['wall_seconds']:.3f}s, cpu {entry['cpu_seconds']:.3f}s, "
+                     f"peak rss {entry['peak_rss_mb']}MB" + (f", rows {entry['rows']}" if entry["rows"] is not None else ""))
+    return metrics
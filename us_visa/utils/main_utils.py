@@ -1,11 +1,15 @@
+import hashlib
 import os
 import sys
 import numpy as np
-import dill
 import yaml
-from pandas import DataFrame
+import pandas as pd
+from pandas import DataFrame, Series
+from pandas.api.types import union_categoricals
+from us_visa.constants import SCHEMA_FILE_PATH
 from us_visa.exception import USvisaException
 from us_visa.logger import logging
+from us_visa.utils.model_artifact import dump_object, is_model_artifact, load_object_file
 
 def read_yaml_file(file_path: str):
     """
@@ -52,50 +56,131 @@ def write_yaml_file(file_path: str, content: dict, replace: bool = False):
 
 def save_numpy_array_data(file_path: str, array: np.array):
     """
-    Saves a NumPy array to a binary file.
+    Saves a NumPy array to a binary file. SciPy sparse matrices are saved in the sparse `.npz`
+    layout instead, which `load_numpy_array_data` detects when loading.
 
     Args:
         file_path (str): The path to save the NumPy array.
-        array (np.array): The NumPy array to save.
+        array (np.array): The NumPy array or SciPy sparse matrix to save.
 
     Raises:
         USvisaException: If there is an error in saving the NumPy array.
     """
     try:
+        from scipy import sparse
+
         dir_path = os.path.dirname(file_path)
         # Create the directory if it does not exist
         os.makedirs(dir_path, exist_ok=True)
         with open(file=file_path, mode="wb") as file_obj:
-            np.save(file_obj, array)
+            if sparse.issparse(array):
+                sparse.save_npz(file_obj, array, compressed=False)
+            else:
+                np.save(file_obj, array)
 
     except Exception as e:
         raise USvisaException(e, sys) from e
 
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode=None) -> np.array:
     """
-    Loads a NumPy array from a binary file.
+    Loads a NumPy array, or a SciPy sparse matrix saved by `save_numpy_array_data`, from a binary file.
 
     Args:
         file_path (str): The path to the NumPy array file.
+        mmap_mode (str): If set (e.g. "r"), dense arrays are memory mapped instead of read into memory.
 
     Returns:
-        np.array: The loaded NumPy array.
+        np.array: The loaded NumPy array or SciPy sparse matrix.
 
     Raises:
         USvisaException: If there is an error in loading the NumPy array.
     """
     try:
-        with open(file=file_path, mode='rb') as file_obj:
-            return np.load(file_obj)
+        array = np.load(file_path, mmap_mode=mmap_mode)
+        if isinstance(array, np.lib.npyio.NpzFile):
+            from scipy import sparse
+
+            array.close()
+            return sparse.load_npz(file_path)
+        return array
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def publish_shared_array(directory: str, name: str, array, row_order=None, chunk_size: int = 65536) -> dict:
+    """
+    Writes an array as C-contiguous `.npy` files that other processes attach to with
+    `attach_shared_array` as read-only memory maps, so all of them share one copy of the data
+    through the page cache instead of each holding a private copy.
+
+    Args:
+        directory (str): Directory of the published files, ideally RAM backed (e.g. /dev/shm).
+        name (str): Name of the array, used in the file names.
+        array: Dense array (including a memory map) or SciPy sparse matrix.
+        row_order (np.ndarray): Optional permutation of the rows. Dense rows are gathered chunk by
+            chunk straight into the published file, so no reordered copy is held in memory.
+        chunk_size (int): Rows gathered per chunk.
+
+    Returns:
+        dict: Description of the published array for `attach_shared_array`.
+
+    Raises:
+        USvisaException: If the array cannot be published.
+    """
+    try:
+        from scipy import sparse
+
+        os.makedirs(directory, exist_ok=True)
+        if sparse.issparse(array):
+            array = sparse.csr_matrix(array[row_order] if row_order is not None else array)
+            spec = {"kind": "csr", "shape": array.shape}
+            for part in ("data", "indices", "indptr"):
+                spec[part] = os.path.join(directory, f"{name}_{part}.npy")
+                np.save(spec[part], getattr(array, part))
+            return spec
+
+        file_path = os.path.join(directory, f"{name}.npy")
+        published = np.lib.format.open_memmap(file_path, mode="w+", dtype=array.dtype, shape=array.shape)
+        for start in range(0, array.shape[0], chunk_size):
+            rows = slice(start, start + chunk_size)
+            published[rows] = array[row_order[rows]] if row_order is not None else array[rows]
+        published.flush()
+        del published
+        return {"kind": "dense", "path": file_path}
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def attach_shared_array(spec: dict):
+    """
+    Attaches to an array published by `publish_shared_array` without copying it.
+
+    Args:
+        spec (dict): The description returned by `publish_shared_array`.
+
+    Returns:
+        A read-only memory-mapped array, or a CSR matrix over read-only memory-mapped buffers.
+
+    Raises:
+        USvisaException: If the array cannot be attached.
+    """
+    try:
+        if spec["kind"] == "csr":
+            from scipy import sparse
+
+            parts = [np.load(spec[part], mmap_mode="r") for part in ("data", "indices", "indptr")]
+            return sparse.csr_matrix(tuple(parts), shape=tuple(spec["shape"]), copy=False)
+        return np.load(spec["path"], mmap_mode="r")
     except Exception as e:
         raise USvisaException(e, sys) from e
 
-def load_object(file_path: str):
+def load_object(file_path: str, mmap_arrays: bool = True):
     """
-    Loads a Python object from a binary file using dill.
+    Loads a Python object saved by `save_object`. Files in the model artifact format have their
+    arrays memory mapped (see `us_visa.utils.model_artifact`); files without its magic header
+    are plain dill pickles written by earlier versions and are loaded with dill.
 
     Args:
         file_path (str): The path to the file containing the object.
+        mmap_arrays (bool): Memory map the arrays of model artifacts instead of reading them.
 
     Returns:
         object: The loaded Python object.
@@ -105,8 +190,13 @@ def load_object(file_path: str):
     """
     logging.info("Entered the load_object method of utils")
     try:
-        with open(file=file_path, mode='rb') as file_obj:
-            obj = dill.load(file_obj)
+        if is_model_artifact(file_path):
+            obj = load_object_file(file_path, mmap_arrays=mmap_arrays)
+        else:
+            import dill
+
+            with open(file=file_path, mode='rb') as file_obj:
+                obj = dill.load(file_obj)
 
         logging.info("Exited the load_object method of utils")
         return obj
@@ -115,7 +205,9 @@ def load_object(file_path: str):
 
 def save_object(file_path: str, obj: object):
     """
-    Saves a Python object to a binary file using dill.
+    Saves a Python object to a binary file in the model artifact format: a pickle protocol 5
+    stream (dill for objects the standard pickler rejects) with the large NumPy arrays stored
+    as aligned blocks that `load_object` memory maps.
 
     Args:
         file_path (str): The path to save the object.
@@ -128,7 +220,7 @@ def save_object(file_path: str, obj: object):
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         with open(file=file_path, mode='wb') as file_obj:
-            dill.dump(obj, file_obj)
+            dump_object(obj, file_obj)
 
         logging.info("Exited the save_object method of utils")
         return obj
@@ -151,8 +243,395 @@ def drop_columns(df: DataFrame, cols):
     """
     logging.info("Entered the drop_columns method of utils")
     try:
-        df = df.drop(columns=cols, axis=1)
+        df = df.drop(columns=cols)
         logging.info("Exited the drop_columns method of utils")
         return df
     except Exception as e:
         raise USvisaException(e, sys) from e
+
+def compute_file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 of a file, or of all files below a directory in sorted order, reading
+    in fixed-size blocks so large artifacts are never loaded whole.
+
+    Args:
+        file_path (str): The path to the file or directory.
+        chunk_size (int): Number of bytes read per block.
+
+    Returns:
+        str: The hex digest.
+
+    Raises:
+        USvisaException: If there is an error in reading the files.
+    """
+    try:
+        if os.path.isdir(file_path):
+            file_paths = sorted(os.path.join(root, name) for root, _, names in os.walk(file_path) for name in names)
+        else:
+            file_paths = [file_path]
+
+        digest = hashlib.sha256()
+        for path in file_paths:
+            digest.update(os.path.relpath(path, file_path).encode())
+            with open(path, mode="rb") as file_obj:
+                for block in iter(lambda: file_obj.read(chunk_size), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def get_file_format(file_path: str) -> str:
+    """
+    Returns the feature store format of a path from its extension.
+
+    Args:
+        file_path (str): Path to a file, or to a directory of part files, ending in
+            `.parquet`, `.feather`/`.arrow` or `.csv`.
+
+    Returns:
+        str: One of "parquet", "feather" or "csv".
+
+    Raises:
+        ValueError: If the extension is not a supported format.
+    """
+    extension = os.path.splitext(file_path.rstrip(os.sep))[1].lstrip(".").lower()
+    if extension in ("feather", "arrow"):
+        return "feather"
+    if extension in ("parquet", "csv"):
+        return extension
+    raise ValueError(f"Unsupported feature store format for path: {file_path}")
+
+def write_dataframe(file_path: str, dataframe: DataFrame):
+    """
+    Writes a DataFrame in the format given by the file extension. Parquet and Feather keep the
+    column dtypes, with categorical columns stored dictionary encoded.
+
+    Args:
+        file_path (str): The path to write to.
+        dataframe (DataFrame): The DataFrame to write.
+
+    Raises:
+        USvisaException: If there is an error in writing the file.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_format = get_file_format(file_path)
+        if file_format == "parquet":
+            dataframe.to_parquet(file_path, index=False)
+        elif file_format == "feather":
+            # Uncompressed Arrow IPC can be memory mapped without decoding
+            dataframe.reset_index(drop=True).to_feather(file_path, compression="uncompressed")
+        else:
+            dataframe.to_csv(file_path, index=False, header=True)
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def _read_dataframe_file(file_path: str, columns=None, memory_map: bool = True) -> DataFrame:
+    """Reads a single feature store file, see `read_dataframe`."""
+    file_format = get_file_format(file_path)
+    if file_format == "parquet":
+        return pd.read_parquet(file_path, columns=columns, memory_map=memory_map)
+    if file_format == "feather":
+        from pyarrow import feather
+        return feather.read_table(file_path, columns=columns, memory_map=memory_map).to_pandas()
+    return pd.read_csv(file_path, usecols=columns)
+
+def read_dataframe(file_path: str, columns=None, memory_map: bool = True) -> DataFrame:
+    """
+    Reads a DataFrame written by `write_dataframe` or `append_dataframe`. The format is given by
+    the file extension; a directory is read as the concatenation of its part files.
+
+    Args:
+        file_path (str): The path to a file or a directory of part files.
+        columns (list): Columns to read. Columnar formats only read these columns from disk. Defaults to all.
+        memory_map (bool): Memory map Parquet/Feather files instead of reading them into buffers.
+
+    Returns:
+        DataFrame: The loaded DataFrame.
+
+    Raises:
+        USvisaException: If there is an error in reading the file.
+    """
+    try:
+        if os.path.isdir(file_path):
+            part_paths = [os.path.join(file_path, name) for name in sorted(os.listdir(file_path))
+                          if not name.startswith(".")]
+            return concat_typed_chunks(_read_dataframe_file(part_path, columns, memory_map)
+                                       for part_path in part_paths)
+        return _read_dataframe_file(file_path, columns, memory_map)
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def _iter_dataframe_file_chunks(file_path: str, chunk_size: int, columns=None):
+    """Yields chunks of a single feature store file, see `iter_dataframe_chunks`."""
+    file_format = get_file_format(file_path)
+    if file_format == "parquet":
+        from pyarrow import parquet
+        for batch in parquet.ParquetFile(file_path, memory_map=True).iter_batches(batch_size=chunk_size,
+                                                                                  columns=columns):
+            yield batch.to_pandas()
+    elif file_format == "feather":
+        from pyarrow import feather
+        table = feather.read_table(file_path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_size, na_values=["na"])
+
+def iter_dataframe_chunks(file_path: str, chunk_size: int, columns=None):
+    """
+    Reads a DataFrame written by `write_dataframe` or `append_dataframe` in chunks of at most
+    `chunk_size` rows, so files larger than memory can be processed.
+
+    Args:
+        file_path (str): The path to a file or a directory of part files.
+        chunk_size (int): Maximum number of rows per chunk.
+        columns (list): Columns to read. Defaults to all.
+
+    Yields:
+        DataFrame: The next chunk.
+
+    Raises:
+        USvisaException: If there is an error in reading the file.
+    """
+    try:
+        part_paths = [file_path]
+        if os.path.isdir(file_path):
+            part_paths = [os.path.join(file_path, name) for name in sorted(os.listdir(file_path))
+                          if not name.startswith(".")]
+        for part_path in part_paths:
+            yield from _iter_dataframe_file_chunks(part_path, chunk_size, columns)
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def append_dataframe(file_path: str, dataframe: DataFrame):
+    """
+    Appends the rows of a DataFrame to a feature store path without rewriting what is already there.
+
+    CSV rows are appended to the file, writing the header only when the file is new and the columns
+    in the order of the existing header. Columnar formats cannot be appended to in place, so the path
+    is a directory and every call adds a new part file to it.
+
+    Args:
+        file_path (str): The path to the CSV file or to the directory of part files.
+        dataframe (DataFrame): The rows to append.
+
+    Raises:
+        USvisaException: If there is an error in writing the file.
+    """
+    try:
+        if get_file_format(file_path) == "csv":
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if os.path.exists(file_path):
+                header = pd.read_csv(file_path, nrows=0).columns.to_list()
+                dataframe[header].to_csv(file_path, mode="a", index=False, header=False)
+            else:
+                dataframe.to_csv(file_path, index=False, header=True)
+            return
+
+        os.makedirs(file_path, exist_ok=True)
+        extension = os.path.splitext(file_path.rstrip(os.sep))[1]
+        part_number = len([name for name in os.listdir(file_path) if name.startswith("part-")])
+        write_dataframe(os.path.join(file_path, f"part-{part_number:05d}{extension}"), dataframe)
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def concat_typed_chunks(chunks) -> DataFrame:
+    """
+    Concatenates typed chunks column by column, merging categorical dictionaries instead of
+    falling back to object columns when the chunks saw different categories.
+
+    Args:
+        chunks (Iterable[DataFrame]): Typed chunks sharing the same schema.
+
+    Returns:
+        DataFrame: The concatenated DataFrame with a fresh RangeIndex.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    if any(list(chunk.columns) != list(chunks[0].columns) for chunk in chunks):
+        # Documents with differing fields: let pandas align the columns
+        return pd.concat(chunks, ignore_index=True)
+
+    columns = {}
+    for column in chunks[0].columns:
+        parts = [chunk[column] for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[column] = pd.Series(union_categoricals(parts), name=column)
+        else:
+            columns[column] = pd.Series(np.concatenate([part.to_numpy() for part in parts]), name=column)
+    return pd.DataFrame(columns)
+
+def get_schema_column_types(schema_config: dict) -> dict:
+    """
+    Flattens the `columns` section of the schema into a column to type mapping.
+
+    Args:
+        schema_config (dict): The schema configuration loaded from schema.yaml.
+
+    Returns:
+        dict: Mapping of column name to its declared type (e.g. "category" or "int").
+
+    Raises:
+        USvisaException: If the schema does not have a valid `columns` section.
+    """
+    try:
+        column_types = {}
+        for column in schema_config["columns"]:
+            column_types.update(column)
+        return column_types
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def cast_to_schema_type(series: Series, column_type: str) -> Series:
+    """
+    Casts a column to the type declared for it in the schema. Missing value markers ("na")
+    become NaN, "int" columns become the smallest integer type (or float64 when the values
+    are not whole numbers or contain NaN) and "category" columns become pandas categoricals.
+
+    Args:
+        series (Series): The column to cast.
+        column_type (str): The schema type of the column.
+
+    Returns:
+        Series: The typed column.
+
+    Raises:
+        USvisaException: If there is an error in casting the column.
+    """
+    try:
+        if column_type == "int":
+            series = pd.to_numeric(series, errors="coerce")
+            if series.notna().all() and (series % 1 == 0).all():
+                return pd.to_numeric(series, downcast="integer")
+            return series.astype("float64")
+        if column_type == "category":
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                return series
+            return series.replace({"na": np.nan}).astype("category")
+        return series.replace({"na": np.nan})
+    except Exception as e:
+        raise USvisaException(e, sys) from e
+
+def get_schema_read_options(schema_config: dict, columns=None) -> dict:
+    """
+    Builds the `usecols`, `dtype` and missing value options for reading a CSV file from the schema,
+    so categorical columns are parsed straight into categoricals instead of object strings.
+
+    Args:
+        schema_config (dict): The schema configuration loaded from schema.yaml.
+        columns (list): Columns to read. Defaults to all schema columns.
+
+    Returns:
+        dict: Keyword arguments for `pd.read_csv`.
+    """
+    column_types = get_schema_column_types(schema_config)
+    usecols = list(columns) if columns is not None else list(column_types)
+    return {
+        "usecols": lambda column: column in usecols,
+        "dtype": {column: "category" for column in usecols if column_types.get(column) == "category"},
+        "na_values": ["na"],
+    }
+
+def get_memory_report(dataframe: DataFrame) -> DataFrame:
+    """
+    Reports, per column, the memory of the typed DataFrame against the memory the same column takes
+    when loaded untyped (object strings for text columns, 64 bit values for numeric columns).
+
+    Args:
+        dataframe (DataFrame): A DataFrame typed from the schema.
+
+    Returns:
+        DataFrame: One row per column with the dtype, untyped and typed size in bytes, the bytes saved
+        and the reduction factor.
+    """
+    rows = []
+    for column in dataframe.columns:
+        series = dataframe[column]
+        typed_bytes = int(series.memory_usage(index=False, deep=True))
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # One pointer per row plus one string object per row, sized from the dictionary
+            category_sizes = np.fromiter((sys.getsizeof(value) for value in series.cat.categories),
+                                         dtype=np.int64, count=len(series.cat.categories))
+            codes = series.cat.codes.to_numpy()
+            untyped_bytes = int(8 * len(series) + category_sizes[codes[codes >= 0]].sum())
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            untyped_bytes = 8 * len(series)
+        else:
+            untyped_bytes = typed_bytes
+        rows.append({
+            "column": column,
+            "dtype": str(series.dtype),
+            "untyped_bytes": untyped_bytes,
+            "typed_bytes": typed_bytes,
+            "saved_bytes": untyped_bytes - typed_bytes,
+            "reduction": round(untyped_bytes / typed_bytes, 2) if typed_bytes else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+def cast_dataframe_to_schema(dataframe: DataFrame, column_types: dict) -> DataFrame:
+    """
+    Casts the schema columns of a DataFrame in place with `cast_to_schema_type`; other columns are left as they are.
+
+    Args:
+        dataframe (DataFrame): The untyped DataFrame.
+        column_types (dict): Column to schema type mapping, see `get_schema_column_types`.
+
+    Returns:
+        DataFrame: The typed DataFrame.
+    """
+    for column in dataframe.columns:
+        if column in column_types:
+            dataframe[column] = cast_to_schema_type(dataframe[column], column_types[column])
+    return dataframe
+
+def log_memory_report(dataframe: DataFrame, file_path: str):
+    """
+    Logs the memory saved per column of a typed DataFrame, see `get_memory_report`.
+
+    Args:
+        dataframe (DataFrame): A DataFrame typed from the schema.
+        file_path (str): The file it was loaded from, for the log message.
+    """
+    report = get_memory_report(dataframe)
+    for row in report.itertuples(index=False):
+        logging.info(f"{row.column}: {row.dtype}, {row.typed_bytes} bytes "
+                     f"({row.saved_bytes} bytes saved, {row.reduction}x smaller than untyped)")
+    logging.info(f"Loaded {file_path} with shape {dataframe.shape}: {report['typed_bytes'].sum()} bytes, "
+                 f"{report['saved_bytes'].sum()} bytes saved by schema typing")
+
+def read_typed_dataframe(file_path: str, columns=None, schema_file_path: str = SCHEMA_FILE_PATH,
+                         report_memory: bool = True) -> DataFrame:
+    """
+    Loads a feature store file with the dtypes declared in the schema: categorical columns as
+    categoricals, "int" columns downcast to the smallest integer type that holds them, and only
+    the requested columns read from disk.
+
+    Args:
+        file_path (str): The path to a Parquet/Feather/CSV file or a directory of part files.
+        columns (list): Columns to read. Defaults to all columns.
+        schema_file_path (str): Path to the schema describing the column types.
+        report_memory (bool): Log the memory saved per column compared to an untyped load.
+
+    Returns:
+        DataFrame: The typed DataFrame.
+
+    Raises:
+        USvisaException: If there is an error in reading or typing the file.
+    """
+    try:
+        schema_config = read_yaml_file(file_path=schema_file_path)
+        column_types = get_schema_column_types(schema_config)
+
+        if not os.path.isdir(file_path) and get_file_format(file_path) == "csv":
+            dataframe = pd.read_csv(file_path, **get_schema_read_options(schema_config, columns))
+        else:
+            dataframe = read_dataframe(file_path=file_path, columns=columns)
+
+        dataframe = cast_dataframe_to_schema(dataframe, column_types)
+        if report_memory:
+            log_memory_report(dataframe, file_path)
+        return dataframe
+    except Exception as e:
+        raise USvisaException(e, sys) from e
@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-record requests into micro-batches for a vectorized predict function.
+
+    Requests are queued on the event loop. A background task takes the first waiting request,
+    then keeps collecting until `max_batch_size` requests are gathered or `max_wait_ms` has passed
+    since the first one, and runs `predict_fn` once for the whole batch on an executor thread, so
+    the event loop keeps accepting requests meanwhile. Every caller awaits its own result.
+
+    Attributes:
+        predict_fn (Callable[[list], list]): Scores a list of records, returning one result per record.
+        max_batch_size (int): Largest number of requests scored together.
+        max_wait_ms (float): Longest time the first request of a batch waits for others.
+
+    Example:
+        batcher = MicroBatcher(classifier.predict, max_batch_size=64, max_wait_ms=5)
+        await batcher.start()
+        label = await batcher.submit({"continent": "Asia", ...})
+    """
+
+    def __init__(self, predict_fn: Callable[[list], list], max_batch_size: int, max_wait_ms: float,
+                 executor=None, latency_window: int = 10000):
+        """
+        Args:
+            predict_fn (Callable[[list], list]): Scores a list of records, returning one result per record.
+            max_batch_size (int): Largest number of requests scored together.
+            max_wait_ms (float): Longest time the first request of a batch waits for others.
+            executor: Executor running `predict_fn`. Defaults to the event loop's default executor.
+            latency_window (int): Number of most recent requests the latency percentiles are computed over.
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._completed = 0
+        self._started_at = None
+
+    async def start(self):
+        """Starts the background batching task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        logging.info(f"Micro-batcher started: max batch size {self.max_batch_size}, max wait {self.max_wait_ms}ms")
+
+    async def stop(self):
+        """Stops the background task; the batch being scored and requests still queued are failed."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            self._fail_batch([self._queue.get_nowait()], RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, record):
+        """
+        Queues a record and waits for its result.
+
+        Args:
+            record: The input of a single prediction.
+
+        Returns:
+            The result `predict_fn` returned for the record.
+
+        Raises:
+            USvisaException: If scoring the batch holding the record failed.
+            RuntimeError: If the batcher is not started, or was stopped before the record was scored.
+        """
+        if self._task is None:
+            raise RuntimeError("Micro-batcher is not started")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self, batch: list):
+        """
+        Waits for a request, then gathers more into `batch` until it is full or the wait is over.
+        Requests are added to the caller's list as they are taken, so a cancelled collection
+        leaves none of them unaccounted for.
+        """
+        batch.append(await self._queue.get())
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            # Requests already waiting are taken without yielding to the event loop
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    @staticmethod
+    def _fail_batch(batch: list, error: Exception):
+        """Fails the requests of a batch that have no result yet."""
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run(self):
+        """Scores batches one after the other until cancelled; the batch in flight is then failed."""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = []
+                await self._collect_batch(batch)
+                records = [record for record, _, _ in batch]
+                try:
+                    results = await loop.run_in_executor(self.executor, self.predict_fn, records)
+                    if len(results) != len(batch):
+                        raise ValueError(f"predict_fn returned {len(results)} results for {len(batch)} records")
+                except Exception as e:
+                    logging.info(f"Micro-batch of {len(batch)} requests failed: {e}")
+                    self._fail_batch(batch, USvisaException(e, sys))
+                    continue
+
+                finished_at = time.perf_counter()
+                for (_, future, queued_at), result in zip(batch, results):
+                    self._latencies.append(finished_at - queued_at)
+                    if not future.done():
+                        future.set_result(result)
+                self._batch_sizes.append(len(batch))
+                self._completed += len(batch)
+        except asyncio.CancelledError:
+            self._fail_batch(batch, RuntimeError("Micro-batcher stopped"))
+            raise
+
+    def get_metrics(self) -> dict:
+        """
+        Returns the serving metrics: latency percentiles over the most recent requests, measured
+        from queueing to result, batch sizes and throughput since start.
+
+        Returns:
+            dict: Request counts, p50/p99 latency in milliseconds, mean batch size and requests per second.
+        """
+        latencies = np.fromiter(self._latencies, dtype=np.float64) * 1000
+        uptime = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "requests": self._completed,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+            "latency_p99_ms": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+            "mean_batch_size": round(float(np.mean(self._batch_sizes)), 2) if self._batch_sizes else None,
+            "throughput_rps": round(self._completed / uptime, 1) if uptime else 0.0,
+            "uptime_seconds": round(uptime, 1),
+        }
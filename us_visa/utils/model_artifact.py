@@ -0,0 +1,165 @@
+import io
+import json
+import mmap
+import pickle
+import struct
+
+import numpy as np
+
+# File layout: MAGIC | header length (uint64, little endian) | JSON header | pickle stream | buffers,
+# the pickle stream and every buffer starting on an ALIGNMENT byte boundary
+MAGIC = b"USVMODL1"
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+# Arrays smaller than this stay inside the pickle stream
+MIN_BUFFER_BYTES = 1024
+
+_PREFIX = struct.Struct("<8sQ")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _get_dill_array_pickler():
+    """
+    Returns a dill pickler class keeping NumPy's protocol 5 reduction of arrays, which hands their
+    data to the buffer callback; dill's own array handling pickles them in-band. dill is only
+    imported when an object needs it.
+    """
+    import dill
+
+    class _DillArrayPickler(dill.Pickler):
+        def reducer_override(self, obj):
+            if type(obj) is np.ndarray:
+                return obj.__reduce_ex__(self.proto)
+            return NotImplemented
+
+    return _DillArrayPickler
+
+
+def _pickle(obj, min_buffer_bytes: int) -> tuple:
+    """
+    Pickles with protocol 5, falling back to dill for objects the standard pickler rejects.
+
+    Returns:
+        tuple: The serializer name, the pickle stream and the out-of-band buffers, in the order the
+            stream references them.
+    """
+    buffers = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        # A false value takes the buffer out of band
+        if buffer.raw().nbytes < min_buffer_bytes:
+            return True
+        buffers.append(buffer)
+        return False
+
+    try:
+        return "pickle", pickle.dumps(obj, protocol=5, buffer_callback=buffer_callback), buffers
+    except (pickle.PicklingError, AttributeError, TypeError):
+        # The failed attempt may have handed over buffers already; the dill stream only references its own
+        buffers.clear()
+        stream = io.BytesIO()
+        _get_dill_array_pickler()(stream, protocol=5, buffer_callback=buffer_callback).dump(obj)
+        return "dill", stream.getvalue(), buffers
+
+
+def dump_object(obj, file_obj, min_buffer_bytes: int = MIN_BUFFER_BYTES) -> dict:
+    """
+    Writes an object in the memory-mappable model artifact format.
+
+    The object is pickled with protocol 5, which hands the data of contiguous NumPy arrays (tree
+    node tables, KNN training data, encoder categories, ...) to a callback instead of copying it
+    into the pickle stream. Those buffers are written after the stream, each aligned to 64 bytes,
+    and located by a small JSON header, so `load_object_file` can map them straight from the file.
+
+    Args:
+        obj (object): The object to save.
+        file_obj: Binary file opened for writing.
+        min_buffer_bytes (int): Arrays smaller than this are kept inside the pickle stream.
+
+    Returns:
+        dict: The header written, with the serializer and buffer locations.
+    """
+    serializer, payload, buffers = _pickle(obj, min_buffer_bytes)
+
+    # Offsets are relative to the end of the header, which is padded to the alignment
+    offset = _aligned(len(payload))
+    layout = []
+    for buffer in buffers:
+        nbytes = buffer.raw().nbytes
+        layout.append([offset, nbytes])
+        offset = _aligned(offset + nbytes)
+    header = json.dumps({"version": FORMAT_VERSION, "serializer": serializer, "pickle_nbytes": len(payload),
+                         "buffers": layout}).encode()
+    data_start = _aligned(_PREFIX.size + len(header))
+
+    file_obj.write(_PREFIX.pack(MAGIC, len(header)))
+    file_obj.write(header)
+    file_obj.write(b"\0" * (data_start - _PREFIX.size - len(header)))
+    position = 0
+    for chunk, (start, nbytes) in zip([payload] + [buffer.raw() for buffer in buffers],
+                                      [(0, len(payload))] + layout):
+        file_obj.write(b"\0" * (start - position))
+        file_obj.write(chunk)
+        position = start + nbytes
+    return json.loads(header)
+
+
+def is_model_artifact(file_path: str) -> bool:
+    """Returns True if the file starts with the model artifact magic header, False for plain dill pickles."""
+    with open(file_path, "rb") as file_obj:
+        return file_obj.read(len(MAGIC)) == MAGIC
+
+
+def _read_header(file_obj) -> tuple:
+    """Reads the header of an open artifact, returning it with the offset where the data starts."""
+    magic, header_nbytes = _PREFIX.unpack(file_obj.read(_PREFIX.size))
+    if magic != MAGIC:
+        raise ValueError(f"{file_obj.name} is not a model artifact")
+    return json.loads(file_obj.read(header_nbytes)), _aligned(_PREFIX.size + header_nbytes)
+
+
+def read_header(file_path: str) -> dict:
+    """
+    Returns the metadata header of an artifact: format version, serializer, size of the pickle
+    stream and the offset and size of every array buffer.
+    """
+    with open(file_path, "rb") as file_obj:
+        return _read_header(file_obj)[0]
+
+
+def load_object_file(file_path: str, mmap_arrays: bool = True):
+    """
+    Loads an object written by `dump_object`.
+
+    With `mmap_arrays` the file is mapped copy-on-write and the arrays are rebuilt over the mapped
+    buffers without copying: loading costs little more than unpickling the small object graph, and
+    processes loading the same file share its pages through the page cache. Estimators that copy
+    arrays into their own structures when unpickled (e.g. scikit-learn trees) still hold
+    private copies.
+
+    Args:
+        file_path (str): Path to the artifact.
+        mmap_arrays (bool): Map the array buffers from the file instead of reading them into memory.
+
+    Returns:
+        object: The loaded object.
+    """
+    with open(file_path, "rb") as file_obj:
+        header, data_start = _read_header(file_obj)
+        if mmap_arrays:
+            # Private mapping: pages are shared until written, so arrays stay writable
+            data = memoryview(mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_COPY))[data_start:]
+        else:
+            file_obj.seek(data_start)
+            data = memoryview(bytearray(file_obj.read()))
+
+    buffers = [data[start:start + nbytes] for start, nbytes in header["buffers"]]
+    payload = data[:header["pickle_nbytes"]]
+    if header["serializer"] == "dill":
+        import dill
+
+        return dill.loads(payload.tobytes(), buffers=buffers)
+    return pickle.loads(payload, buffers=buffers)
@@ -0,0 +1,438 @@
+import hashlib
+import importlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, cross_validate
+
+from us_visa.data_access.trial_store import TrialStore
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.main_utils import attach_shared_array, publish_shared_array, read_yaml_file
+
+# Training data of the worker processes, set once per worker by `_init_worker`
+_worker_data = {}
+
+
+@dataclass
+class ModelCandidate:
+    """One model family of the model config.
+
+    Attributes:
+        name (str): Key of the model in the config (e.g. `module_0`).
+        class_name (str): Estimator class name.
+        module (str): Module the estimator class is imported from.
+        params (dict): Parameters applied to every configuration.
+        search_param_grid (dict): Parameter grid searched on top of `params`.
+    """
+    name: str
+    class_name: str
+    module: str
+    params: dict
+    search_param_grid: dict
+
+
+@dataclass
+class SearchResult:
+    """Outcome of a `ParallelModelSearch`.
+
+    Attributes:
+        best_model: The best configuration refitted on the full training data.
+        best_model_name (str): Estimator class name of the best configuration.
+        best_params (dict): Parameters of the best configuration.
+        best_score (float): Cross-validated score of the best configuration on the last rung it reached.
+        results (pd.DataFrame): One row per evaluated configuration and rung, with scores and timings.
+    """
+    best_model: object
+    best_model_name: str
+    best_params: dict
+    best_score: float
+    results: pd.DataFrame
+
+
+def load_model_candidates(model_config: dict) -> list:
+    """
+    Reads the candidate models from a model config in the `neuro_mf` layout
+    (`model_selection.<module_n>.{class, module, params, search_param_grid}`).
+
+    Args:
+        model_config (dict): The parsed model config.
+
+    Returns:
+        list: The `ModelCandidate` of every model family.
+    """
+    return [ModelCandidate(name=name, class_name=entry["class"], module=entry["module"],
+                           params=dict(entry.get("params") or {}),
+                           search_param_grid=dict(entry.get("search_param_grid") or {}))
+            for name, entry in model_config["model_selection"].items()]
+
+
+def build_model(class_name: str, module: str, params: dict):
+    """Instantiates an estimator from its module, class name and parameters."""
+    model_class = getattr(importlib.import_module(module), class_name)
+    return model_class(**params)
+
+
+def hash_arrays(*arrays) -> str:
+    """Hashes the contents of dense arrays or sparse matrices, used as the data key of the trial store."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        parts = (array.data, array.indices, array.indptr) if sparse.issparse(array) else (array,)
+        for part in parts:
+            digest.update(np.ascontiguousarray(part).tobytes())
+    return digest.hexdigest()
+
+
+def _init_worker(shared_arrays: dict):
+    """
+    Process pool initializer: attaches read-only views of the published training data, so workers
+    start without receiving the data and all of them share one copy of it.
+    """
+    for name, spec in shared_arrays.items():
+        _worker_data[name] = attach_shared_array(spec)
+
+
+def cross_validate_resampled(model, features, target, cv, scoring: str, resampler) -> dict:
+    """
+    Cross-validates a model whose training folds are resampled, like an imblearn `Pipeline` of the
+    resampler and the model: the validation folds keep their original rows, so synthetic samples and
+    the neighbours removed by cleaning never reach them and the score estimates performance on real data.
+
+    Args:
+        model: Unfitted estimator, cloned for every fold.
+        features: Features, a dense array, memory map or sparse matrix.
+        target (np.ndarray): Class labels.
+        cv: Cross-validation splitter.
+        scoring (str): Scikit-learn scorer name.
+        resampler: Object with a `fit_resample(features, target)` method, e.g. `SMOTEENNResampler`.
+
+    Returns:
+        dict: `test_score`, `fit_time` (resampling included) and `score_time` arrays, as `cross_validate` returns them.
+    """
+    scorer = get_scorer(scoring)
+    scores = {"test_score": [], "fit_time": [], "score_time": []}
+    for train_index, test_index in cv.split(np.zeros(target.shape[0]), target):
+        start = time.perf_counter()
+        fold_features, fold_target = resampler.fit_resample(features[train_index], target[train_index])
+        fold_model = clone(model).fit(fold_features, fold_target)
+        scores["fit_time"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        scores["test_score"].append(scorer(fold_model, features[test_index], target[test_index]))
+        scores["score_time"].append(time.perf_counter() - start)
+    return {name: np.asarray(values) for name, values in scores.items()}
+
+
+def evaluate_configuration(task: dict) -> dict:
+    """
+    Cross-validates one configuration on the first `n_samples` rows of the worker's shuffled training
+    data, resampling the training folds when the task has a `resampler`.
+
+    Args:
+        task (dict): `candidate`, `class_name`, `module`, `params`, `rung`, `n_samples`, `cv`, `scoring`,
+            `random_state` and `resampler`.
+
+    Returns:
+        dict: The task description with its mean score and fit and score times.
+    """
+    start = time.perf_counter()
+    features, target = _worker_data["features"], _worker_data["target"]
+    model = build_model(task["class_name"], task["module"], task["params"])
+    # One core per configuration, the pool provides the parallelism
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    n_samples = task["n_samples"]
+    cv = StratifiedKFold(n_splits=task["cv"], shuffle=True, random_state=task["random_state"])
+    if task["resampler"] is None:
+        scores = cross_validate(model, features[:n_samples], target[:n_samples], cv=cv, scoring=task["scoring"],
+                                n_jobs=1, error_score="raise")
+    else:
+        scores = cross_validate_resampled(model, features[:n_samples], np.asarray(target[:n_samples]), cv=cv,
+                                          scoring=task["scoring"], resampler=task["resampler"])
+    return {
+        "candidate": task["candidate"],
+        "model": task["class_name"],
+        "params": task["params"],
+        "rung": task["rung"],
+        "n_samples": n_samples,
+        "score": float(np.mean(scores["test_score"])),
+        "score_std": float(np.std(scores["test_score"])),
+        "fit_time": float(np.sum(scores["fit_time"])),
+        "score_time": float(np.sum(scores["score_time"])),
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+class ParallelModelSearch:
+    """
+    Hyperparameter search over every model family and parameter grid of the model config,
+    evaluated concurrently on a process pool.
+
+    With successive halving, all configurations are first scored on a small subsample of the
+    training data; only the best `1 / halving_factor` of them advance to the next rung, which uses
+    `halving_factor` times more rows, until the last rung scores the remaining configurations on
+    all rows. Weak configurations are therefore dropped after a fraction of their full cost.
+    Without successive halving every configuration is scored on all rows, like a grid search.
+
+    With a `resampler`, the search data is the training data before resampling and only the
+    training folds are resampled, so the scores are measured on real rows; the best configuration
+    is then refitted on the resampled training data.
+
+    With a `TrialStore`, configurations already scored on the same data, preprocessing and rung
+    are not evaluated again, and with `warm_start_top_k` a search only evaluates configurations
+    that no earlier search has tried plus the `warm_start_top_k` best earlier ones, so repeated
+    retrains spend their compute on new or promising areas of the search space.
+
+    The shuffled training data is published once as memory-mapped `.npy` files in `shared_data_dir`
+    and every worker attaches read-only views of it, so memory stays close to one copy of the data
+    however many workers run, and worker start-up does not involve sending the data.
+
+    Example:
+        search = ParallelModelSearch(model_config_path="config/model/yaml", n_jobs=-1)
+        result = search.fit(x_train, y_train)
+        result.best_model, result.results.sort_values("score")
+    """
+
+    def __init__(self, model_config_path: str, n_jobs: int = -1, successive_halving: bool = True,
+                 halving_factor: int = 3, min_resources: int = 1000, random_state: int = 42,
+                 trial_store: Optional[TrialStore] = None, warm_start_top_k: int = 0,
+                 shared_data_dir: Optional[str] = None, resampler=None):
+        """
+        Args:
+            model_config_path (str): Path to the model config in the `neuro_mf` layout.
+            n_jobs (int): Worker processes; -1 uses all cores.
+            successive_halving (bool): Drop weak configurations on subsamples before scoring on all rows.
+            halving_factor (int): Share of configurations kept per rung is 1 / halving_factor.
+            min_resources (int): Rows used by the first rung.
+            random_state (int): Seed of the row shuffle and the cross-validation folds.
+            trial_store (Optional[TrialStore]): Store of earlier trials, reused and extended by the search.
+            warm_start_top_k (int): If positive and earlier trials exist, configurations tried before are only
+                searched again if they are among the `warm_start_top_k` best. 0 disables the warm start.
+            shared_data_dir (Optional[str]): Where the training data is published for the workers. Defaults to
+                /dev/shm when available, else the system temporary directory.
+            resampler: Object with a `fit_resample(features, target)` method applied to the training folds of
+                every cross-validation, e.g. a single threaded `SMOTEENNResampler`. None cross-validates the data as is.
+        """
+        try:
+            self.model_config = read_yaml_file(model_config_path)
+            search_params = (self.model_config.get("grid_search") or {}).get("params") or {}
+            self.cv = search_params.get("cv", 5)
+            # F1, like the test metrics and the evaluation gate, unless the model config sets a scorer
+            self.scoring = search_params.get("scoring", "f1")
+            self.candidates = load_model_candidates(self.model_config)
+            self.n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+            self.successive_halving = successive_halving
+            self.halving_factor = halving_factor
+            self.min_resources = min_resources
+            self.random_state = random_state
+            self.trial_store = trial_store
+            self.warm_start_top_k = warm_start_top_k
+            if shared_data_dir is None and os.path.isdir("/dev/shm"):
+                shared_data_dir = "/dev/shm"
+            self.shared_data_dir = shared_data_dir
+            self.resampler = resampler
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def get_configurations(self) -> list:
+        """
+        Expands the parameter grid of every candidate.
+
+        Returns:
+            list: One `(candidate, params)` pair per configuration; `params` includes the fixed `params`.
+        """
+        return [(candidate, {**candidate.params, **grid_params})
+                for candidate in self.candidates
+                for grid_params in ParameterGrid(candidate.search_param_grid)]
+
+    @staticmethod
+    def get_trial_key(candidate: ModelCandidate, params: dict) -> tuple:
+        """Returns the `(model, params_key)` identifying a configuration in the trial store."""
+        return f"{candidate.module}.{candidate.class_name}", TrialStore.params_key(params)
+
+    def warm_start(self, configurations: list) -> list:
+        """
+        Drops the configurations earlier searches have tried, unless they are among the best earlier ones.
+
+        Args:
+            configurations (list): `(candidate, params)` pairs from `get_configurations`.
+
+        Returns:
+            list: The best earlier configurations first, then the configurations never tried.
+        """
+        evaluated = self.trial_store.get_evaluated_configurations()
+        best = {key: rank for rank, key in enumerate(self.trial_store.get_best_configurations(self.warm_start_top_k))}
+        promising = sorted((configuration for configuration in configurations
+                            if self.get_trial_key(*configuration) in best),
+                           key=lambda configuration: best[self.get_trial_key(*configuration)])
+        new = [configuration for configuration in configurations if self.get_trial_key(*configuration) not in evaluated]
+        if not promising and not new:
+            return configurations
+        logging.info(f"Warm start: {len(promising)} promising earlier configurations, {len(new)} new ones, "
+                     f"{len(configurations) - len(promising) - len(new)} skipped")
+        return promising + new
+
+    def get_schedule(self, n_configurations: int, n_samples: int) -> list:
+        """
+        Computes the rows used by each rung.
+
+        Args:
+            n_configurations (int): Number of configurations entering the first rung.
+            n_samples (int): Rows of the training data.
+
+        Returns:
+            list: Rows per rung; the last rung always uses all rows.
+        """
+        if not self.successive_halving or self.halving_factor <= 1:
+            return [n_samples]
+        # Enough rungs to reduce the configurations to one, but no rung smaller than min_resources
+        n_rungs = min(math.ceil(math.log(max(n_configurations, 1), self.halving_factor)),
+                      int(math.log(max(n_samples / self.min_resources, 1), self.halving_factor))) + 1
+        return [min(n_samples, int(n_samples / self.halving_factor ** (n_rungs - 1 - rung))) for rung in range(n_rungs)]
+
+    def publish_training_data(self, directory: str, features, target) -> dict:
+        """
+        Publishes the training data, shuffled once so every rung's subsample is a prefix of the
+        same permutation, for the workers to attach to.
+
+        Args:
+            directory (str): Directory of the published files.
+            features: Training features, a dense array, memory map or sparse matrix.
+            target: Training target.
+
+        Returns:
+            dict: Published array descriptions for `_init_worker`.
+        """
+        order = np.random.default_rng(self.random_state).permutation(target.shape[0])
+        shared_arrays = {"features": publish_shared_array(directory, "features", features, row_order=order),
+                         "target": publish_shared_array(directory, "target", target, row_order=order)}
+        logging.info(f"Published training data for the workers in {directory}")
+        return shared_arrays
+
+    def evaluate_rung(self, executor, configurations: list, tasks: list, data_hash: Optional[str],
+                      preprocessing_hash: str) -> list:
+        """
+        Scores the configurations of one rung, reusing the trial store's earlier scores.
+
+        Args:
+            executor (ProcessPoolExecutor): Pool of workers holding the training data.
+            configurations (list): `(candidate, params)` pairs of the rung.
+            tasks (list): The matching `evaluate_configuration` tasks.
+            data_hash (Optional[str]): Key of the training data in the trial store.
+            preprocessing_hash (str): Key of the preprocessing object in the trial store.
+
+        Returns:
+            list: One result per task, in task order, with `cached` set for reused scores.
+        """
+        cached = {}
+        if self.trial_store is not None:
+            cached = self.trial_store.get_trials(data_hash=data_hash, preprocessing_hash=preprocessing_hash,
+                                                 n_samples=tasks[0]["n_samples"], cv=self.cv, scoring=self.scoring,
+                                                 random_state=self.random_state)
+        keys = [self.get_trial_key(*configuration) for configuration in configurations]
+        pending = [task for key, task in zip(keys, tasks) if key not in cached]
+        evaluated = iter(executor.map(evaluate_configuration, pending))
+
+        results = []
+        for key, task in zip(keys, tasks):
+            if key in cached:
+                result = {"candidate": task["candidate"], "model": task["class_name"], "params": task["params"],
+                          "rung": task["rung"], "n_samples": task["n_samples"], **cached[key], "cached": True}
+            else:
+                result = {**next(evaluated), "cached": False}
+            results.append(result)
+
+        if self.trial_store is not None and pending:
+            self.trial_store.add_trials(
+                data_hash=data_hash, preprocessing_hash=preprocessing_hash, cv=self.cv, scoring=self.scoring,
+                random_state=self.random_state,
+                trials=[{**result, "model": key[0]} for key, result in zip(keys, results) if not result["cached"]])
+        if cached:
+            logging.info(f"Reused {len(tasks) - len(pending)} of {len(tasks)} trials from the trial store")
+        return results
+
+    def fit(self, features, target, data_hash: Optional[str] = None, preprocessing_hash: str = "",
+            refit_features=None, refit_target=None) -> SearchResult:
+        """
+        Runs the search and refits the best configuration on all rows.
+
+        Args:
+            features: Training features.
+            target: Training target.
+            data_hash (Optional[str]): Key of the training data in the trial store. Defaults to a hash of the arrays.
+            preprocessing_hash (str): Key of the preprocessing object in the trial store.
+            refit_features: Features the best configuration is refitted on, e.g. the resampled training
+                data. Defaults to `features`.
+            refit_target: Target matching `refit_features`.
+
+        Returns:
+            SearchResult: The best model and the table of scores and timings.
+
+        Raises:
+            USvisaException: If the search fails.
+        """
+        try:
+            target = np.asarray(target)
+            if self.trial_store is not None:
+                data_hash = data_hash or hash_arrays(features, target)
+                if self.resampler is not None:
+                    # Scores on resampled folds are not comparable with scores on the data as is
+                    resampler_key = json.dumps([type(self.resampler).__name__, vars(self.resampler)],
+                                               sort_keys=True, default=str)
+                    data_hash = hashlib.sha256(f"{data_hash}:{resampler_key}".encode()).hexdigest()
+            configurations = self.get_configurations()
+            if self.trial_store is not None:
+                if self.warm_start_top_k > 0:
+                    configurations = self.warm_start(configurations)
+            schedule = self.get_schedule(len(configurations), target.shape[0])
+            logging.info(f"Searching {len(configurations)} configurations with {self.n_jobs} workers, "
+                         f"rungs of {schedule} rows")
+
+            results = []
+            with tempfile.TemporaryDirectory(prefix="usvisa_search_", dir=self.shared_data_dir) as shared_dir, \
+                    ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                        initargs=(self.publish_training_data(shared_dir, features, target),)
+                                        ) as executor:
+                for rung, n_samples in enumerate(schedule):
+                    tasks = [{"candidate": candidate.name, "class_name": candidate.class_name,
+                              "module": candidate.module, "params": params, "n_samples": n_samples, "rung": rung,
+                              "cv": self.cv, "scoring": self.scoring, "random_state": self.random_state,
+                              "resampler": self.resampler}
+                             for candidate, params in configurations]
+                    rung_results = self.evaluate_rung(executor, configurations, tasks, data_hash, preprocessing_hash)
+                    results.extend(rung_results)
+                    logging.info(f"Rung {rung}: scored {len(tasks)} configurations on {n_samples} rows, "
+                                 f"best {max(result['score'] for result in rung_results):.4f}")
+
+                    if rung < len(schedule) - 1:
+                        # Keep the best 1 / halving_factor of the configurations for the next rung
+                        n_keep = max(1, math.ceil(len(configurations) / self.halving_factor))
+                        ranking = np.argsort([-result["score"] for result in rung_results], kind="stable")
+                        configurations = [configurations[index] for index in ranking[:n_keep]]
+
+            results_df = pd.DataFrame(results)
+            last_rung = results_df[results_df["rung"] == results_df["rung"].max()]
+            best = last_rung.loc[last_rung["score"].idxmax()]
+            best_candidate = next(candidate for candidate in self.candidates if candidate.name == best["candidate"])
+
+            best_model = build_model(best_candidate.class_name, best_candidate.module, best["params"])
+            if refit_features is None:
+                refit_features, refit_target = features, target
+            best_model.fit(refit_features, np.ascontiguousarray(refit_target))
+            logging.info(f"Best model {best['model']} {best['params']} with score {best['score']:.4f}")
+
+            return SearchResult(best_model=best_model, best_model_name=best["model"], best_params=best["params"],
+                                best_score=float(best["score"]), results=results_df)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
@@ -0,0 +1,178 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.neighbors import KDTree, NearestNeighbors
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+
+
+class SMOTEENNResampler:
+    """
+    SMOTE over-sampling followed by Edited Nearest Neighbours cleaning, equivalent to
+    `imblearn.combine.SMOTEENN` with its default SMOTE and ENN, built for large datasets.
+
+    Neighbour searches use a KD-tree (brute force on sparse input) and are split into chunks of
+    `chunk_size` query rows that run concurrently on `n_jobs` threads. The cleaning step computes
+    its keep mask chunk by chunk, so besides the data only the neighbours of one chunk per thread
+    are held in memory. With the same random state, the synthetic samples are drawn exactly as
+    imblearn draws them.
+
+    Example:
+        resampler = SMOTEENNResampler(sampling_strategy="minority", n_jobs=-1, chunk_size=50000)
+        x_res, y_res = resampler.fit_resample(x_train, y_train)
+    """
+
+    def __init__(self, sampling_strategy: str = "minority", k_neighbors: int = 5, n_neighbors: int = 3,
+                 n_jobs: int = -1, chunk_size: Optional[int] = None, random_state: Optional[int] = None):
+        """
+        Args:
+            sampling_strategy (str): Classes to over-sample: "minority" (the smallest class) or "auto" /
+                "not majority" (every class but the largest), up to the size of the largest class.
+            k_neighbors (int): Neighbours of the same class used to interpolate synthetic samples.
+            n_neighbors (int): Neighbours that must all share a sample's class for the cleaning step to keep it.
+            n_jobs (int): Threads running the neighbour queries; -1 uses all cores.
+            chunk_size (Optional[int]): Query rows per task. Bounds the memory of the neighbour tables.
+                Defaults to an even split of the rows over the threads.
+            random_state (Optional[int]): Seed of the synthetic sample generation.
+        """
+        if sampling_strategy not in ("minority", "auto", "not majority"):
+            raise ValueError(f"Unsupported sampling_strategy {sampling_strategy}")
+        self.sampling_strategy = sampling_strategy
+        self.k_neighbors = k_neighbors
+        self.n_neighbors = n_neighbors
+        self.n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+
+    def _get_chunks(self, n_rows: int) -> list:
+        chunk_size = self.chunk_size or max(1, int(np.ceil(n_rows / self.n_jobs)))
+        return [slice(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+
+    def _map_neighbors(self, index_data, query_data, n_neighbors: int, reduce):
+        """
+        Finds the `n_neighbors` nearest rows of `index_data` for every row of `query_data`, chunk by
+        chunk on the thread pool, and applies `reduce(chunk, neighbor_indices)` to each chunk.
+
+        Returns:
+            list: The reduced chunks, in row order.
+        """
+        if sparse.issparse(index_data):
+            index = NearestNeighbors(n_neighbors=n_neighbors, algorithm="brute").fit(index_data)
+
+            def query(rows):
+                return index.kneighbors(query_data[rows], return_distance=False)
+        else:
+            index = KDTree(np.asarray(index_data))
+
+            def query(rows):
+                return index.query(np.asarray(query_data[rows]), k=n_neighbors, return_distance=False)
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            return list(executor.map(lambda rows: reduce(rows, query(rows)), self._get_chunks(query_data.shape[0])))
+
+    def get_sampling_targets(self, target: np.ndarray) -> dict:
+        """
+        Returns the number of synthetic samples to generate per class.
+
+        Args:
+            target (np.ndarray): The class labels.
+
+        Returns:
+            dict: Class label to number of samples to generate.
+        """
+        classes, counts = np.unique(target, return_counts=True)
+        n_majority = counts.max()
+        if self.sampling_strategy == "minority":
+            minority = classes[np.argmin(counts)]
+            return {minority: int(n_majority - counts.min())}
+        return {label: int(n_majority - count) for label, count in zip(classes, counts) if count < n_majority}
+
+    def over_sample(self, features, target: np.ndarray):
+        """
+        Generates SMOTE samples: each is drawn on the segment between a random sample of the class
+        and one of its `k_neighbors` nearest neighbours in the class.
+
+        Args:
+            features: Features, a dense array or sparse matrix.
+            target (np.ndarray): Class labels.
+
+        Returns:
+            tuple: The features and labels with the synthetic samples appended.
+        """
+        random_state = np.random.RandomState(self.random_state)
+        new_features, new_target = [features], [target]
+        for label, n_samples in self.get_sampling_targets(target).items():
+            if n_samples == 0:
+                continue
+            class_features = features[np.flatnonzero(target == label)]
+            # The first neighbour of every sample is the sample itself
+            neighbors = np.concatenate(self._map_neighbors(
+                class_features, class_features, self.k_neighbors + 1,
+                reduce=lambda rows, indices: indices[:, 1:]))
+
+            # Same draws as imblearn: a (sample, neighbour) pair, then the step along the segment
+            sample_indices = random_state.randint(low=0, high=neighbors.size, size=n_samples)
+            steps = random_state.uniform(size=n_samples)[:, np.newaxis]
+            rows = np.floor_divide(sample_indices, neighbors.shape[1])
+            cols = np.mod(sample_indices, neighbors.shape[1])
+
+            diffs = class_features[neighbors[rows, cols]] - class_features[rows]
+            if sparse.issparse(features):
+                samples = class_features[rows] + sparse.csr_matrix(diffs).multiply(steps)
+            else:
+                samples = class_features[rows] + steps * diffs
+            new_features.append(samples.astype(features.dtype))
+            new_target.append(np.full(n_samples, fill_value=label, dtype=target.dtype))
+            logging.info(f"Generated {n_samples} synthetic samples of class {label}")
+
+        if sparse.issparse(features):
+            return sparse.vstack(new_features, format="csr"), np.concatenate(new_target)
+        return np.concatenate(new_features), np.concatenate(new_target)
+
+    def clean(self, features, target: np.ndarray):
+        """
+        Edited Nearest Neighbours: drops every sample whose `n_neighbors` nearest neighbours do not
+        all share its class.
+
+        Args:
+            features: Features, a dense array or sparse matrix.
+            target (np.ndarray): Class labels.
+
+        Returns:
+            tuple: The kept features and labels.
+        """
+        def keep_chunk(rows, indices):
+            # Skip the first neighbour, the sample itself
+            return np.all(target[indices[:, 1:]] == target[rows, np.newaxis], axis=1)
+
+        keep = np.concatenate(self._map_neighbors(features, features, self.n_neighbors + 1, reduce=keep_chunk))
+        logging.info(f"Edited nearest neighbours removed {int((~keep).sum())} of {len(keep)} samples")
+        # Grouped by class, in the order imblearn returns them
+        kept_indices = np.concatenate([np.flatnonzero(keep & (target == label)) for label in np.unique(target)])
+        return features[kept_indices], target[kept_indices]
+
+    def fit_resample(self, features, target):
+        """
+        Over-samples with SMOTE, then cleans with Edited Nearest Neighbours.
+
+        Args:
+            features: Features, a dense array or sparse matrix.
+            target: Class labels.
+
+        Returns:
+            tuple: The resampled features and labels.
+
+        Raises:
+            USvisaException: If resampling fails.
+        """
+        try:
+            target = np.asarray(target)
+            features, target = self.over_sample(features, target)
+            return self.clean(features, target)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
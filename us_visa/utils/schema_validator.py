@@ -0,0 +1,220 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.main_utils import get_schema_column_types, iter_dataframe_chunks
+
+# Number of offending values kept per column in the report
+MAX_EXAMPLE_VALUES = 5
+
+
+class SchemaValidator:
+    """
+    Validates dataframes against schema.yaml in a single vectorized pass per chunk.
+
+    The schema is compiled once into per-column checks: presence, declared type ("int" columns
+    must hold numeric values), allowed values from `constraints.<column>.allowed`, numeric range
+    from `constraints.<column>.min` / `max` and the maximum share of missing values from
+    `constraints.<column>.max_null_rate`. Chunks are accumulated with `update`, so inputs larger
+    than memory can be validated with `validate_file`, and `report` returns the per-column result.
+
+    Example:
+        validator = SchemaValidator(read_yaml_file(SCHEMA_FILE_PATH))
+        report = validator.validate_file("train.parquet", chunk_size=100000)
+        report["valid"], report["columns"]["continent"]["out_of_domain_count"]
+    """
+
+    def __init__(self, schema_config: dict):
+        """
+        Args:
+            schema_config (dict): The schema configuration loaded from schema.yaml.
+
+        Raises:
+            USvisaException: If the schema cannot be compiled.
+        """
+        try:
+            self.column_types = get_schema_column_types(schema_config)
+            constraints = schema_config.get("constraints") or {}
+            self.numeric_columns = [column for column, column_type in self.column_types.items()
+                                    if column_type == "int"]
+            self.allowed_values = {column: pd.Index(constraints[column]["allowed"])
+                                   for column in self.column_types
+                                   if constraints.get(column, {}).get("allowed") is not None}
+            self.ranges = {column: (constraints[column].get("min"), constraints[column].get("max"))
+                           for column in self.column_types
+                           if column in constraints and ("min" in constraints[column] or "max" in constraints[column])}
+            self.max_null_rates = {column: constraints[column]["max_null_rate"] for column in self.column_types
+                                   if constraints.get(column, {}).get("max_null_rate") is not None}
+            self.reset()
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def reset(self):
+        """Clears the accumulated statistics, to validate another input."""
+        self.n_rows = 0
+        self.seen_columns = None
+        self.unexpected_columns = set()
+        self.dtypes = {}
+        self.null_counts = dict.fromkeys(self.column_types, 0)
+        self.invalid_type_counts = dict.fromkeys(self.numeric_columns, 0)
+        self.out_of_domain_counts = dict.fromkeys(self.allowed_values, 0)
+        self.out_of_range_counts = dict.fromkeys(self.ranges, 0)
+        self.minimums, self.maximums = {}, {}
+        self.examples = {column: [] for column in self.column_types}
+
+    def _add_examples(self, column: str, values):
+        examples = self.examples[column]
+        for value in pd.unique(np.asarray(values))[:MAX_EXAMPLE_VALUES - len(examples)]:
+            if value not in examples:
+                examples.append(value.item() if hasattr(value, "item") else value)
+
+    def update(self, chunk: DataFrame) -> "SchemaValidator":
+        """
+        Accumulates the checks of one chunk.
+
+        Args:
+            chunk (DataFrame): The next chunk of the input.
+
+        Returns:
+            SchemaValidator: The validator, to allow chaining.
+
+        Raises:
+            USvisaException: If the chunk cannot be checked.
+        """
+        try:
+            present = [column for column in self.column_types if column in chunk.columns]
+            self.seen_columns = set(present) if self.seen_columns is None else self.seen_columns & set(present)
+            self.unexpected_columns.update(column for column in chunk.columns if column not in self.column_types)
+            self.n_rows += len(chunk)
+
+            # Null counts of all columns in one call
+            for column, null_count in chunk[present].isna().sum().items():
+                self.null_counts[column] += int(null_count)
+
+            for column in present:
+                series = chunk[column]
+                self.dtypes.setdefault(column, str(series.dtype))
+
+                if column in self.invalid_type_counts:
+                    if not pd.api.types.is_numeric_dtype(series.dtype):
+                        numeric = pd.to_numeric(series.astype("object"), errors="coerce")
+                        invalid = numeric.isna() & series.notna()
+                        self.invalid_type_counts[column] += int(invalid.sum())
+                        if invalid.any():
+                            self._add_examples(column, series[invalid])
+                        series = numeric
+
+                if column in self.out_of_domain_counts:
+                    invalid = ~series.isin(self.allowed_values[column]) & series.notna()
+                    self.out_of_domain_counts[column] += int(invalid.sum())
+                    if invalid.any():
+                        self._add_examples(column, series[invalid])
+
+                if column in self.ranges and pd.api.types.is_numeric_dtype(series.dtype):
+                    values = series.to_numpy(dtype="float64", na_value=np.nan)
+                    if np.isfinite(values).any():
+                        chunk_min, chunk_max = float(np.nanmin(values)), float(np.nanmax(values))
+                        self.minimums[column] = min(self.minimums.get(column, chunk_min), chunk_min)
+                        self.maximums[column] = max(self.maximums.get(column, chunk_max), chunk_max)
+                    low, high = self.ranges[column]
+                    invalid = np.zeros(len(values), dtype=bool)
+                    if low is not None:
+                        invalid |= values < low
+                    if high is not None:
+                        invalid |= values > high
+                    self.out_of_range_counts[column] += int(invalid.sum())
+                    if invalid.any():
+                        self._add_examples(column, values[invalid])
+            return self
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def report(self) -> dict:
+        """
+        Returns the validation report of the chunks seen since the last `reset`.
+
+        Returns:
+            dict: `valid`, `n_rows`, `n_columns`, `missing_columns`, `unexpected_columns` and a
+            `columns` section with the statistics and `errors` of every schema column.
+        """
+        seen_columns = self.seen_columns or set()
+        columns = {}
+        for column, column_type in self.column_types.items():
+            entry = {"type": column_type, "present": column in seen_columns, "errors": []}
+            if not entry["present"]:
+                entry["errors"].append("missing")
+                columns[column] = entry
+                continue
+            entry["dtype"] = self.dtypes.get(column)
+            entry["null_count"] = self.null_counts[column]
+            entry["null_rate"] = self.null_counts[column] / self.n_rows if self.n_rows else 0.0
+            if column in self.max_null_rates and entry["null_rate"] > self.max_null_rates[column]:
+                entry["errors"].append(f"null rate {entry['null_rate']:.4g} above {self.max_null_rates[column]}")
+            if column in self.invalid_type_counts:
+                entry["invalid_type_count"] = self.invalid_type_counts[column]
+                if entry["invalid_type_count"]:
+                    entry["errors"].append(f"{entry['invalid_type_count']} values are not {column_type}")
+            if column in self.out_of_domain_counts:
+                entry["out_of_domain_count"] = self.out_of_domain_counts[column]
+                if entry["out_of_domain_count"]:
+                    entry["errors"].append(f"{entry['out_of_domain_count']} values outside the allowed values")
+            if column in self.ranges:
+                entry["min"], entry["max"] = self.minimums.get(column), self.maximums.get(column)
+                entry["out_of_range_count"] = self.out_of_range_counts[column]
+                if entry["out_of_range_count"]:
+                    entry["errors"].append(f"{entry['out_of_range_count']} values outside {list(self.ranges[column])}")
+            if self.examples[column]:
+                entry["examples"] = list(self.examples[column])
+            columns[column] = entry
+
+        missing_columns = [column for column in self.column_types if column not in seen_columns]
+        return {
+            "valid": all(not entry["errors"] for entry in columns.values()) and not self.unexpected_columns,
+            "n_rows": self.n_rows,
+            "n_columns": len(seen_columns) + len(self.unexpected_columns),
+            "missing_columns": missing_columns,
+            "unexpected_columns": sorted(self.unexpected_columns),
+            "columns": columns,
+        }
+
+    def validate(self, dataframe: DataFrame) -> dict:
+        """
+        Validates an in-memory dataframe.
+
+        Args:
+            dataframe (DataFrame): The dataframe to validate.
+
+        Returns:
+            dict: The validation report, see `report`.
+        """
+        self.reset()
+        return self.update(dataframe).report()
+
+    def validate_file(self, file_path: str, chunk_size: int = 100000) -> dict:
+        """
+        Validates a feature store file or directory of part files chunk by chunk, holding at most
+        `chunk_size` rows in memory.
+
+        Args:
+            file_path (str): The file to validate.
+            chunk_size (int): Rows per chunk.
+
+        Returns:
+            dict: The validation report, see `report`.
+
+        Raises:
+            USvisaException: If the file cannot be read.
+        """
+        try:
+            self.reset()
+            for chunk in iter_dataframe_chunks(file_path, chunk_size=chunk_size):
+                self.update(chunk)
+            report = self.report()
+            logging.info(f"Schema validation of {file_path}: {report['n_rows']} rows, valid: {report['valid']}")
+            return report
+        except Exception as e:
+            raise USvisaException(e, sys) from e
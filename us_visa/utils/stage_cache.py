@@ -0,0 +1,155 @@
+import hashlib
+import inspect
+import json
+import os
+import sys
+from dataclasses import asdict, fields, is_dataclass
+from typing import Optional
+
+from us_visa.constants import SCHEMA_FILE_PATH
+from us_visa.exception import USvisaException
+from us_visa.logger import logging
+from us_visa.utils.main_utils import compute_file_hash, read_yaml_file, write_yaml_file
+
+
+def get_config_values(config) -> dict:
+    """
+    Returns the values of a config dataclass that influence a stage's output. Path and directory
+    fields are left out because they change with every run's timestamp.
+
+    Args:
+        config: A config dataclass instance.
+
+    Returns:
+        dict: Field name to value for the non-path fields.
+    """
+    return {field.name: getattr(config, field.name) for field in fields(config)
+            if not field.name.endswith(("_dir", "_path"))}
+
+
+def get_code_version(*objects) -> str:
+    """
+    Hashes the source files defining the given classes, functions or modules, so a cached
+    artifact is invalidated when the code producing it changes.
+
+    Args:
+        *objects: Classes, functions or modules whose source files are hashed.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    for source_file in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        digest.update(compute_file_hash(source_file).encode())
+    return digest.hexdigest()
+
+
+def _build_artifact(artifact_class, values: dict):
+    """Rebuilds an artifact dataclass, including nested artifact dataclasses, from its `asdict` form."""
+    for field in fields(artifact_class):
+        if is_dataclass(field.type) and isinstance(values.get(field.name), dict):
+            values[field.name] = _build_artifact(field.type, values[field.name])
+    return artifact_class(**values)
+
+
+class StageCache:
+    """
+    Content-addressed cache of pipeline stage artifacts.
+
+    Each stage computes a key from everything its output depends on (source data fingerprint,
+    schema.yaml hash, config values and code version). After a stage succeeds its artifact is
+    recorded under that key; a later run with the same key reuses the recorded artifact instead
+    of recomputing the stage. Since only successful stages are recorded, re-running a failed
+    pipeline resumes from the first stage that did not complete.
+
+    Attributes:
+        cache_dir (str): Directory holding one manifest per stage and key.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache manifests.
+        """
+        self.cache_dir = cache_dir
+
+    def make_key(self, stage_name: str, data_fingerprint, config, code_version: str) -> str:
+        """
+        Builds the cache key of a stage.
+
+        Args:
+            stage_name (str): Name of the stage.
+            data_fingerprint: JSON serializable description of the stage's input data.
+            config: The stage's config dataclass.
+            code_version (str): Hash of the code producing the stage's output.
+
+        Returns:
+            str: The hex digest identifying the stage inputs.
+
+        Raises:
+            USvisaException: If the key cannot be computed.
+        """
+        try:
+            inputs = {
+                "stage": stage_name,
+                "data": data_fingerprint,
+                "schema": compute_file_hash(SCHEMA_FILE_PATH),
+                "config": get_config_values(config),
+                "code": code_version,
+            }
+            return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def _manifest_path(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, f"{key}.yaml")
+
+    def load(self, stage_name: str, key: str, artifact_class) -> Optional[object]:
+        """
+        Returns the artifact recorded for a stage key, if any and if its files still exist.
+
+        Args:
+            stage_name (str): Name of the stage.
+            key (str): The stage's cache key.
+            artifact_class: Dataclass the artifact is rebuilt as.
+
+        Returns:
+            Optional[object]: The cached artifact, or None on a cache miss.
+
+        Raises:
+            USvisaException: If the manifest exists but cannot be read.
+        """
+        try:
+            manifest_path = self._manifest_path(stage_name, key)
+            if not os.path.exists(manifest_path):
+                return None
+            artifact_values = read_yaml_file(file_path=manifest_path)["artifact"]
+            missing_paths = [value for name, value in artifact_values.items()
+                             if name.endswith("_path") and isinstance(value, str) and not os.path.exists(value)]
+            if missing_paths:
+                logging.info(f"Cached {stage_name} artifact is stale, missing files: {missing_paths}")
+                return None
+            return _build_artifact(artifact_class, artifact_values)
+        except Exception as e:
+            raise USvisaException(e, sys) from e
+
+    def save(self, stage_name: str, key: str, artifact):
+        """
+        Records the artifact of a successful stage under its key.
+
+        Args:
+            stage_name (str): Name of the stage.
+            key (str): The stage's cache key.
+            artifact: The stage's artifact dataclass.
+
+        Raises:
+            USvisaException: If the manifest cannot be written.
+        """
+        try:
+            if not is_dataclass(artifact):
+                raise TypeError(f"Only dataclass artifacts can be cached, got {type(artifact)}")
+            write_yaml_file(file_path=self._manifest_path(stage_name, key),
+                            content={"stage": stage_name, "key": key, "artifact": asdict(artifact)},
+                            replace=True)
+        except Exception as e:
+            raise USvisaException(e, sys) from e